@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized DataFrame aggregation against a pure-Python reference.
+
+Pre-encodes pages of source rows as the API would return them (JSON and CSV),
+then runs the same grouped aggregation several ways from those payloads and
+checks that every result agrees with the reference:
+
+    python-loop      json.loads + dict accumulation, how the daily jobs are written today
+    pandas-json      json.loads + aggregate_pages() (frames built from row dicts)
+    pandas-csv       read_csv_frame() + aggregate_frames(), what fetch_frames() does
+    pandas-csv-spill the same with a tiny memory budget, so partials spill to /tmp
+
+plus the aggregation step alone, over already decoded rows / parsed frames:
+
+    python-agg-only  dict accumulation over decoded pages
+    pandas-agg-only  aggregate_frames() over parsed frames
+
+Usage:
+    python scripts/bench_dataframe.py --rows 1000000 --groups 5000
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import sys
+import time
+
+# Add the project root to the Python path for imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+BY = ["client", "active"]
+METRICS = {"amount": ["sum", "count", "mean", "min", "max"], "quantity": ["sum", "max"]}
+DTYPES = {"client": "category", "amount": "float64", "quantity": "int64", "active": "bool"}
+
+
+def generate_rows(start, end, groups):
+    return [
+        {
+            "id": row_id,
+            "client": f"client-{row_id % groups}",
+            "amount": round(row_id * 1.25 % 1000, 2),
+            "quantity": row_id % 17,
+            "active": row_id % 3 != 0,
+            "updated_at": "2024-01-01T00:00:00",
+        }
+        for row_id in range(start, end)
+    ]
+
+
+def encode_csv(rows):
+    """PostgREST-style CSV: header row, lower-case booleans"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows({k: str(v).lower() if isinstance(v, bool) else v for k, v in row.items()} for row in rows)
+    return buffer.getvalue().encode()
+
+
+def build_payloads(rows, groups, json_page_size, csv_page_size):
+    json_pages = [
+        json.dumps(generate_rows(start, min(start + json_page_size, rows + 1), groups)).encode()
+        for start in range(1, rows + 1, json_page_size)
+    ]
+    csv_pages = [
+        encode_csv(generate_rows(start, min(start + csv_page_size, rows + 1), groups))
+        for start in range(1, rows + 1, csv_page_size)
+    ]
+    return json_pages, csv_pages
+
+
+def python_reference(pages):
+    """Pure-Python grouped aggregation over row dicts"""
+    groups = {}
+    for page in pages:
+        for row in page:
+            key = tuple(row[col] for col in BY)
+            state = groups.get(key)
+            if state is None:
+                state = groups[key] = {
+                    col: {"sum": 0, "count": 0, "min": None, "max": None} for col in METRICS
+                }
+            for col in METRICS:
+                value = row[col]
+                totals = state[col]
+                totals["sum"] += value
+                totals["count"] += 1
+                if totals["min"] is None or value < totals["min"]:
+                    totals["min"] = value
+                if totals["max"] is None or value > totals["max"]:
+                    totals["max"] = value
+
+    result = {}
+    for key, state in groups.items():
+        values = {}
+        for col, aggs in METRICS.items():
+            totals = state[col]
+            for agg in aggs:
+                values[f"{col}_{agg}"] = totals["sum"] / totals["count"] if agg == "mean" else totals[agg]
+        result[key] = values
+    return result
+
+
+def frame_to_reference(frame):
+    """Same shape as python_reference() for comparison"""
+    value_columns = [col for col in frame.columns if col not in BY]
+    return {
+        tuple(row[col] for col in BY): {col: row[col] for col in value_columns}
+        for row in frame.to_dict("records")
+    }
+
+
+def results_match(expected, actual):
+    if expected.keys() != actual.keys():
+        return False
+    for key, values in expected.items():
+        for col, value in values.items():
+            if not math.isclose(float(value), float(actual[key][col]), rel_tol=1e-9, abs_tol=1e-6):
+                return False
+    return True
+
+
+def best_of(repeat, func):
+    """(result, best wall time in seconds) over `repeat` runs"""
+    best, result = None, None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vectorized vs pure-Python aggregation')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--groups', type=int, default=1000, help='Distinct clients')
+    parser.add_argument('--json-page-size', type=int, default=1000, help='Rows per JSON page (fetch_pages)')
+    parser.add_argument('--csv-page-size', type=int, default=10000, help='Rows per CSV page (fetch_frames)')
+    parser.add_argument('--spill-budget-mb', type=float, default=0.05,
+                        help='Memory budget for the spilling run')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant, best is reported')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    from src.functions.data_sync.dataframe_pipeline import (
+        GroupedAggregation, aggregate_frames, aggregate_pages, read_csv_frame
+    )
+
+    print(f"Encoding {args.rows} rows ({args.groups} clients)...")
+    json_pages, csv_pages = build_payloads(args.rows, args.groups, args.json_page_size, args.csv_page_size)
+
+    def csv_frames():
+        return (read_csv_frame(page, DTYPES) for page in csv_pages)
+
+    spill_files = []
+
+    def run_spilling():
+        aggregation = GroupedAggregation(BY, METRICS, memory_budget_mb=args.spill_budget_mb)
+        for frame in csv_frames():
+            aggregation.update(frame)
+        spill_files.append(aggregation.spilled_files)
+        return aggregation.result()
+
+    decoded_pages = [json.loads(page) for page in json_pages]
+    parsed_frames = list(csv_frames())
+
+    variants = {
+        "python-loop": lambda: python_reference(json.loads(page) for page in json_pages),
+        "pandas-json": lambda: aggregate_pages((json.loads(page) for page in json_pages), BY, METRICS, DTYPES),
+        "pandas-csv": lambda: aggregate_frames(csv_frames(), BY, METRICS),
+        "pandas-csv-spill": run_spilling,
+        "python-agg-only": lambda: python_reference(decoded_pages),
+        "pandas-agg-only": lambda: aggregate_frames(parsed_frames, BY, METRICS),
+    }
+
+    reference = None
+    results = []
+    ok = True
+    for name, func in variants.items():
+        result, seconds = best_of(args.repeat, func)
+        if reference is None:
+            reference = result
+            matches = True
+        else:
+            actual = result if isinstance(result, dict) else frame_to_reference(result)
+            matches = results_match(reference, actual)
+        ok = ok and matches
+        results.append({"name": name, "seconds": round(seconds, 4), "matches_reference": matches})
+
+    for entry in results:
+        # Aggregation-only variants are compared with the aggregation-only loop
+        baseline = next(
+            r["seconds"] for r in results
+            if r["name"] == ("python-agg-only" if entry["name"].endswith("agg-only") else "python-loop")
+        )
+        entry["speedup"] = round(baseline / entry["seconds"], 2) if entry["seconds"] else None
+        extra = f"  ({spill_files[-1]} spill files)" if entry["name"].endswith("spill") and spill_files else ""
+        print(f"  {entry['name']:<18} {entry['seconds']:8.3f} s  {entry['speedup']:6.2f}x  "
+              f"matches reference: {entry['matches_reference']}{extra}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"rows": args.rows, "groups": args.groups, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encoders on representative response payloads.
+
+Compares the stdlib json module, orjson (if installed) and src.utils.serializer
+in both of its encoder modes. numpy/pandas payloads are skipped when those
+packages aren't installed.
+"""
+import argparse
+import datetime
+import decimal
+import json
+import os
+import sys
+import timeit
+
+# Add the project root to the Python path for imports
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def build_payloads(rows):
+    """Build the benchmark payloads, keyed by name"""
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+    records = [
+        {
+            "id": i,
+            "client": f"client-{i % 97}",
+            "amount": i * 1.25,
+            "active": i % 3 == 0,
+            "tags": ["a", "b", "c"],
+        }
+        for i in range(rows)
+    ]
+    payloads = {
+        "small_dict": {"message": "Hello from Lambda!", "supabase_url": "https://example.supabase.co"},
+        "records": records,
+        "records_typed": [
+            {**record, "created_at": now, "balance": decimal.Decimal("1234.56")}
+            for record in records
+        ],
+    }
+
+    try:
+        import numpy as np
+        payloads["ndarray"] = np.arange(rows * 5, dtype="float64").reshape(rows, 5)
+    except ImportError:
+        print("numpy not installed, skipping ndarray payload")
+
+    try:
+        import pandas as pd
+        payloads["dataframe"] = pd.DataFrame.from_records(records).drop(columns=["tags"])
+    except ImportError:
+        print("pandas not installed, skipping DataFrame payload")
+
+    return payloads
+
+
+def stdlib_dumps(obj):
+    """Plain stdlib baseline: what the managers did before the serializer"""
+    if hasattr(obj, "to_dict"):
+        obj = obj.to_dict("records")
+    elif hasattr(obj, "tolist"):
+        obj = obj.tolist()
+    return json.dumps(obj, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON encoders')
+    parser.add_argument('--rows', type=int, default=5000, help='Rows in the list/frame payloads')
+    parser.add_argument('--repeat', type=int, default=20, help='Encodes per measurement')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    from src.utils import serializer
+
+    encoders = {"json.dumps": stdlib_dumps}
+    encoders["serializer[stdlib]"] = lambda obj: serializer.dumps(obj, use_orjson=False)
+    try:
+        import orjson
+        encoders["orjson.dumps"] = lambda obj: orjson.dumps(
+            obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY
+        )
+        encoders["serializer[orjson]"] = lambda obj: serializer.dumps(obj, use_orjson=True)
+    except ImportError:
+        print("orjson not installed, skipping orjson encoders")
+
+    results = []
+    for payload_name, payload in build_payloads(args.rows).items():
+        print(f"\n{payload_name}")
+        for encoder_name, encode in encoders.items():
+            try:
+                size = len(encode(payload))
+                seconds = min(timeit.repeat(lambda: encode(payload), number=args.repeat, repeat=3))
+            except TypeError as ex:
+                print(f"  {encoder_name:<20} failed: {ex}")
+                continue
+            per_call_ms = seconds / args.repeat * 1000
+            print(f"  {encoder_name:<20} {per_call_ms:10.3f} ms/call  {size:>10} bytes")
+            results.append({
+                "payload": payload_name,
+                "encoder": encoder_name,
+                "ms_per_call": round(per_call_ms, 4),
+                "bytes": size,
+            })
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
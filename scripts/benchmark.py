@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmark for the Lambda handlers, built on local_test.py.
+
+Replays the events/*.json fixtures (and optionally JSONL event files, one event
+per line) against the API and Event handlers in two modes:
+
+    warm  - handlers imported once, each event invoked N times in-process
+    cold  - each invocation runs in a fresh interpreter (INIT + first invoke)
+
+Reports p50/p90/p99 latency, throughput, peak RSS and allocations per route,
+writes the results to a JSON file and fails when a stored baseline regresses
+past the threshold. Secrets are served from local_secrets.json (or the
+committed local_secrets.example.json), so no AWS access is needed.
+
+Route response caching is off, so warm samples time the handler path rather
+than a cache lookup. Set RESPONSE_CACHE_ENABLED=true to measure cache hits.
+
+Usage:
+    python scripts/benchmark.py --iterations 200 --cold-iterations 5 --output bench.json
+    python scripts/benchmark.py --baseline bench-baseline.json --threshold 0.2
+    python scripts/benchmark.py --events-file traffic.jsonl --mode warm
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from local_test import DEFAULT_SECRETS_FILE, MockLambdaContext, PROJECT_ROOT
+
+# Handlers log to stderr and emit EMF lines to stdout; keep both quiet
+os.environ.setdefault('METRICS_ENABLED', 'false')
+# Repeated events would otherwise be replayed from the idempotency store
+os.environ.setdefault('IDEMPOTENCY_ENABLED', 'false')
+# A single benchmark client would spend any route quota in the first few requests
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+# Warm samples would otherwise be route cache hits, not the handler path
+os.environ.setdefault('RESPONSE_CACHE_ENABLED', 'false')
+
+# Allocation tracking slows invocations down, so it runs as a separate pass
+ALLOCATION_SAMPLES = 20
+
+COMPARED_METRICS = ("p50_ms", "p99_ms")
+
+
+def load_events(events_files=None):
+    """
+    Load the benchmark events as (route, kind, event) tuples.
+    Fixtures come from events/*.json, extra events from JSONL files.
+    """
+    events = []
+    for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, 'events', '*.json'))):
+        with open(path, 'r') as f:
+            events.append(json.load(f))
+    for path in events_files or []:
+        with open(path, 'r') as f:
+            events.extend(json.loads(line) for line in f if line.strip())
+    return [(route_of(event), kind_of(event), event) for event in events]
+
+
+def kind_of(event):
+    """'api' for API Gateway proxy events, 'event' for everything else"""
+    return 'api' if 'httpMethod' in event else 'event'
+
+
+def route_of(event):
+    if kind_of(event) == 'api':
+        return f"api:{event.get('httpMethod', 'GET')} {event.get('resource') or event.get('path')}"
+    return f"event:{event.get('name', 'UNKNOWN')}"
+
+
+def get_handler(kind):
+    if kind == 'api':
+        from src.api.app import lambda_handler
+    else:
+        from src.event.app import lambda_handler
+    return lambda_handler
+
+
+def silence_logs():
+    import logging
+    logging.getLogger('WFGClients').disabled = True
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(latencies_ms, wall_secs):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p90_ms": round(percentile(latencies_ms, 90), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "throughput_rps": round(len(latencies_ms) / wall_secs, 1) if wall_secs > 0 else None,
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_warm(events, iterations):
+    """Invoke every event `iterations` times against already-imported handlers"""
+    silence_logs()
+    results = {}
+    for route, kind, event in events:
+        handler = get_handler(kind)
+        handler(event, MockLambdaContext())  # first call pays any lazy init
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            context = MockLambdaContext()
+            t0 = time.perf_counter()
+            handler(event, context)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        wall_secs = time.perf_counter() - started
+
+        tracemalloc.start()
+        allocated = 0
+        peak = 0
+        for _ in range(min(iterations, ALLOCATION_SAMPLES)):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            snapshot_start = tracemalloc.take_snapshot()
+            handler(event, MockLambdaContext())
+            stats = tracemalloc.take_snapshot().compare_to(snapshot_start, 'filename')
+            allocated += sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        samples = min(iterations, ALLOCATION_SAMPLES)
+        tracemalloc.stop()
+
+        results[route] = {
+            **summarize(latencies, wall_secs),
+            "alloc_kb_per_invoke": round(allocated / samples / 1024, 2) if samples else None,
+            "peak_alloc_kb": round(peak / 1024, 2),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"  warm {route:<40} p50 {results[route]['p50_ms']:8.3f} ms  "
+              f"p99 {results[route]['p99_ms']:8.3f} ms  {results[route]['throughput_rps']} rps")
+    return results
+
+
+def child_main(kind, event_json):
+    """Fresh-interpreter cold start: import the handler and invoke it once"""
+    t0 = time.perf_counter()
+    handler = get_handler(kind)
+    init_ms = (time.perf_counter() - t0) * 1000
+    silence_logs()
+    t1 = time.perf_counter()
+    handler(json.loads(event_json), MockLambdaContext())
+    invoke_ms = (time.perf_counter() - t1) * 1000
+    sys.stdout.write(json.dumps({
+        "init_ms": init_ms,
+        "invoke_ms": invoke_ms,
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def run_cold(events, iterations):
+    """Run each event `iterations` times, each time in a new interpreter"""
+    results = {}
+    env = {**os.environ, "PYTHONPATH": PROJECT_ROOT}
+    for route, kind, event in events:
+        totals, inits, invokes, rss = [], [], [], []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', kind, json.dumps(event)],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            sample = json.loads(output.strip().splitlines()[-1])
+            inits.append(sample["init_ms"])
+            invokes.append(sample["invoke_ms"])
+            totals.append(sample["init_ms"] + sample["invoke_ms"])
+            rss.append(sample["peak_rss_mb"])
+        wall_secs = time.perf_counter() - started
+
+        results[route] = {
+            **summarize(totals, wall_secs),
+            "init_p50_ms": round(percentile(inits, 50), 3),
+            "first_invoke_p50_ms": round(percentile(invokes, 50), 3),
+            "peak_rss_mb": max(rss),
+        }
+        print(f"  cold {route:<40} p50 {results[route]['p50_ms']:8.3f} ms  "
+              f"(init {results[route]['init_p50_ms']:.1f} ms)  rss {results[route]['peak_rss_mb']} MB")
+    return results
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """
+    Returns:
+        list: Human readable regressions, empty when none
+    """
+    regressions = []
+    for mode, routes in results.items():
+        for route, stats in routes.items():
+            base_stats = baseline.get(mode, {}).get(route)
+            if not base_stats:
+                continue
+            for metric in COMPARED_METRICS:
+                base, current = base_stats.get(metric), stats.get(metric)
+                if base and current and current > base * (1 + threshold):
+                    regressions.append(
+                        f"{mode} {route} {metric}: {current} ms vs baseline {base} ms "
+                        f"(+{(current / base - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Benchmark Lambda handlers locally')
+    parser.add_argument('--mode', choices=['warm', 'cold', 'all'], default='all')
+    parser.add_argument('--iterations', '-n', type=int, default=100,
+                        help='Warm invocations per event')
+    parser.add_argument('--cold-iterations', type=int, default=5,
+                        help='Fresh-interpreter invocations per event')
+    parser.add_argument('--events-file', action='append',
+                        help='Extra JSONL file of events (may be repeated)')
+    parser.add_argument('--secrets-file', default=DEFAULT_SECRETS_FILE,
+                        help='Local secrets file served instead of Secrets Manager '
+                             '(default: local_secrets.json, else local_secrets.example.json)')
+    parser.add_argument('--output', '-o', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative regression vs baseline (0.2 = 20%%)')
+    parser.add_argument('--child', nargs=2, metavar=('KIND', 'EVENT'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    if args.child:
+        child_main(*args.child)
+        sys.exit(0)
+
+    if not os.path.exists(args.secrets_file):
+        sys.exit(f"Secrets file not found: {args.secrets_file} (needed to run offline)")
+    # Local mode: secrets come from the file, never from AWS
+    os.environ.pop('AWS_EXECUTION_ENV', None)
+    os.environ['LOCAL_SECRETS_PATH'] = os.path.abspath(args.secrets_file)
+
+    events = load_events(args.events_file)
+    print(f"Benchmarking {len(events)} events...")
+
+    results = {}
+    if args.mode in ('warm', 'all'):
+        results['warm'] = run_warm(events, args.iterations)
+    if args.mode in ('cold', 'all'):
+        results['cold'] = run_cold(events, args.cold_iterations)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Local API Gateway emulator for load testing the API handler.
+
+Serves real HTTP, turns each request into an API Gateway (REST, proxy
+integration) event and invokes src.api.app.lambda_handler on a pool of
+simulated containers. Each container is a separate process with its own warm
+module state and handles one request at a time, like a Lambda execution
+environment:
+
+  - an idle warm container is reused when one is available
+  - otherwise a new container is started (a cold start: fresh interpreter,
+    module INIT, plus --cold-start-delay-ms) while under --concurrency
+  - at the concurrency limit the request waits up to --queue-timeout and
+    is then throttled with a 429, like a Lambda reserved-concurrency throttle
+  - containers idle longer than --idle-timeout are reclaimed, so the next
+    request after a quiet period pays a cold start again
+
+Usage:
+    python scripts/local_api_gateway.py --port 3000 --concurrency 8 --prewarm 2
+    curl -i http://localhost:3000/hello
+    hey -z 30s -c 16 http://localhost:3000/health
+
+Secrets come from local_secrets.json (or --secrets-file; local_secrets.example.json when
+there is no local_secrets.json), so no AWS access is needed.
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from local_test import DEFAULT_SECRETS_FILE, MockLambdaContext, PROJECT_ROOT
+
+# The stack's BinaryMediaTypes (template.yaml). API Gateway base64 encodes the
+# body of every request whose Content-Type matches, which with */* is all of them
+BINARY_MEDIA_TYPES = ("*/*",)
+
+# Hop-by-hop / length headers the emulator sets itself
+SKIPPED_RESPONSE_HEADERS = {"content-length", "connection", "transfer-encoding"}
+
+
+class ContainerContext(MockLambdaContext):
+    """Lambda context whose remaining time counts down from the function timeout"""
+
+    def __init__(self, request_id, timeout_secs):
+        super().__init__()
+        self.aws_request_id = request_id
+        self.log_stream_name = request_id
+        self._expires_at = time.monotonic() + timeout_secs
+
+    def get_remaining_time_in_millis(self):
+        return max(int((self._expires_at - time.monotonic()) * 1000), 0)
+
+
+def container_main(connection, cold_start_delay_ms, timeout_secs, quiet):
+    """
+    Entry point of a container process: INIT once, then serve invocations
+    received over `connection` until it's closed.
+    """
+    sys.path.insert(0, PROJECT_ROOT)
+    started_at = time.perf_counter()
+    time.sleep(cold_start_delay_ms / 1000)
+    if quiet:
+        import logging
+        logging.getLogger('WFGClients').disabled = True
+    from src.api.app import lambda_handler
+    connection.send({"init_ms": (time.perf_counter() - started_at) * 1000})
+
+    while True:
+        try:
+            event = connection.recv()
+        except EOFError:
+            return
+        context = ContainerContext(event["requestContext"]["requestId"], timeout_secs)
+        try:
+            response = lambda_handler(event, context)
+        except Exception as ex:
+            # An unhandled error surfaces as API Gateway's generic 502
+            sys.stderr.write(f"Unhandled handler error: {ex}\n")
+            response = {"statusCode": 502, "body": '{"message": "Internal server error"}'}
+        connection.send(response)
+
+
+class Container:
+    """Parent-side handle on a container process"""
+
+    def __init__(self, mp_context, cold_start_delay_ms, timeout_secs, quiet):
+        self.id = uuid.uuid4().hex[:8]
+        self.connection, child_connection = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=container_main,
+            args=(child_connection, cold_start_delay_ms, timeout_secs, quiet),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.init_ms = self.connection.recv()["init_ms"]
+        self.invocations = 0
+        self.last_used = time.monotonic()
+
+    def invoke(self, event):
+        self.connection.send(event)
+        response = self.connection.recv()
+        self.invocations += 1
+        self.last_used = time.monotonic()
+        return response
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        self.connection.close()
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class Throttled(Exception):
+    """No container became available within the queue timeout"""
+
+
+class ContainerPool:
+    """
+    Simulated Lambda scaling: warm containers are reused, new ones are cold
+    started up to `concurrency`, beyond that requests queue and then throttle.
+    """
+
+    def __init__(self, concurrency, cold_start_delay_ms=0, idle_timeout_secs=None,
+                 queue_timeout_secs=1.0, timeout_secs=30, quiet=True):
+        self.concurrency = concurrency
+        self.cold_start_delay_ms = cold_start_delay_ms
+        self.idle_timeout_secs = idle_timeout_secs
+        self.queue_timeout_secs = queue_timeout_secs
+        self.timeout_secs = timeout_secs
+        self.quiet = quiet
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._total = 0
+        self._condition = threading.Condition()
+        self.stats = {"invocations": 0, "cold_starts": 0, "throttles": 0, "reclaimed": 0}
+
+    def prewarm(self, count):
+        for _ in range(count):
+            with self._condition:
+                if self._total >= self.concurrency:
+                    return
+                self._total += 1
+            container = self._start_container()
+            with self._condition:
+                self._idle.append(container)
+                self._condition.notify()
+
+    def _start_container(self):
+        """Start a container in a slot already reserved in _total (caller doesn't hold the lock)"""
+        with self._condition:
+            self.stats["cold_starts"] += 1
+        try:
+            return Container(self._mp_context, self.cold_start_delay_ms, self.timeout_secs, self.quiet)
+        except Exception:
+            # Give the slot back so a queued request can use it
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+
+    def _reclaim_idle(self):
+        """Stop containers idle past the idle timeout (caller holds the lock)"""
+        if not self.idle_timeout_secs:
+            return []
+        now = time.monotonic()
+        expired = [c for c in self._idle if now - c.last_used > self.idle_timeout_secs]
+        for container in expired:
+            self._idle.remove(container)
+            self._total -= 1
+            self.stats["reclaimed"] += 1
+            # The freed slot can be cold started by a queued request
+            self._condition.notify()
+        return expired
+
+    def _acquire(self):
+        """
+        Returns:
+            tuple: (container, cold_start)
+        """
+        deadline = time.monotonic() + self.queue_timeout_secs
+        with self._condition:
+            while True:
+                for container in self._reclaim_idle():
+                    threading.Thread(target=container.stop, daemon=True).start()
+                if self._idle:
+                    # Most recently used first, as Lambda keeps hot containers hot
+                    return self._idle.pop(), False
+                if self._total < self.concurrency:
+                    # Reserve the slot before releasing the lock, so concurrent
+                    # requests can't all see room and overshoot concurrency
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["throttles"] += 1
+                    raise Throttled()
+                self._condition.wait(remaining)
+        return self._start_container(), True
+
+    def _release(self, container):
+        with self._condition:
+            if container.alive():
+                self._idle.append(container)
+            else:
+                self._total -= 1
+            self._condition.notify()
+
+    def invoke(self, event):
+        """
+        Returns:
+            tuple: (response dict, container, cold_start)
+        """
+        container, cold_start = self._acquire()
+        try:
+            response = container.invoke(event)
+        except (EOFError, OSError):
+            response = {"statusCode": 502, "body": json.dumps({"message": "Container crashed"})}
+        finally:
+            self._release(container)
+        with self._condition:
+            self.stats["invocations"] += 1
+        return response, container, cold_start
+
+    def snapshot(self):
+        with self._condition:
+            return {**self.stats, "containers": self._total, "idle": len(self._idle)}
+
+    def shutdown(self):
+        with self._condition:
+            containers, self._idle = self._idle, []
+        for container in containers:
+            container.stop()
+
+
+def resolve_resource(method, path):
+    """
+    Match a concrete path to its route the way API Gateway matches a resource.
+
+    Returns:
+        tuple: (resource template, path parameters or None)
+    """
+    from src.api.controllers.api_controller import REGISTRY
+    route, path_params = REGISTRY.resolve(path.strip("/"), method, path=path)
+    if route is None:
+        return path, None
+    return "/" + route["name"], path_params or None
+
+
+def is_binary_media_type(content_type: str, media_types=BINARY_MEDIA_TYPES) -> bool:
+    """Whether API Gateway treats a request Content-Type as binary"""
+    media_type = content_type.split(";", 1)[0].strip().lower() or "*/*"
+    major = media_type.split("/", 1)[0]
+    return any(
+        pattern in ("*/*", media_type) or pattern == f"{major}/*"
+        for pattern in media_types
+    )
+
+
+def build_proxy_event(method, raw_path, headers, body: bytes, source_ip, stage):
+    """Build an API Gateway REST proxy integration event from an HTTP request"""
+    url = urlsplit(raw_path)
+    path = url.path or "/"
+
+    query, multi_query = {}, {}
+    for key, value in parse_qsl(url.query, keep_blank_values=True):
+        query[key] = value
+        multi_query.setdefault(key, []).append(value)
+
+    single_headers, multi_headers = {}, {}
+    for key, value in headers.items():
+        single_headers[key] = value
+        multi_headers.setdefault(key, []).append(value)
+    single_headers.setdefault("X-Forwarded-For", source_ip)
+
+    content_type = single_headers.get("Content-Type", "")
+    is_base64 = bool(body) and is_binary_media_type(content_type)
+    if not body:
+        event_body = None
+    elif is_base64:
+        event_body = base64.b64encode(body).decode("ascii")
+    else:
+        event_body = body.decode("utf-8", errors="replace")
+
+    resource, path_params = resolve_resource(method, path)
+    request_id = str(uuid.uuid4())
+    return {
+        "resource": resource,
+        "path": path,
+        "httpMethod": method,
+        "headers": single_headers,
+        "multiValueHeaders": multi_headers,
+        "queryStringParameters": query or None,
+        "multiValueQueryStringParameters": multi_query or None,
+        "pathParameters": path_params,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": resource,
+            "httpMethod": method,
+            "path": f"/{stage}{path}",
+            "stage": stage,
+            "requestId": request_id,
+            "requestTimeEpoch": int(time.time() * 1000),
+            "identity": {"sourceIp": source_ip, "userAgent": single_headers.get("User-Agent")},
+        },
+        "body": event_body,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def make_handler(pool, stage, verbose):
+    class GatewayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _dispatch(self):
+            if self.path == "/__gateway/stats":
+                return self._send(200, {"Content-Type": "application/json"},
+                                  json.dumps(pool.snapshot()).encode("utf-8"))
+
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            event = build_proxy_event(
+                self.command, self.path, self.headers, body, self.client_address[0], stage
+            )
+
+            started_at = time.perf_counter()
+            try:
+                response, container, cold_start = pool.invoke(event)
+            except Throttled:
+                return self._send(429, {"Content-Type": "application/json", "Retry-After": "1"},
+                                  b'{"message": "Rate Exceeded."}')
+            latency_ms = (time.perf_counter() - started_at) * 1000
+
+            headers = dict(response.get("headers") or {})
+            headers["X-Container-Id"] = container.id
+            headers["X-Cold-Start"] = "true" if cold_start else "false"
+            if cold_start:
+                headers["X-Init-Duration-Ms"] = f"{container.init_ms:.1f}"
+
+            payload = response.get("body") or ""
+            if response.get("isBase64Encoded"):
+                payload = base64.b64decode(payload)
+            elif not isinstance(payload, bytes):
+                payload = str(payload).encode("utf-8")
+
+            if verbose:
+                sys.stderr.write(
+                    f"{self.command} {self.path} -> {response.get('statusCode', 200)} "
+                    f"{latency_ms:.1f}ms container={container.id}{' COLD' if cold_start else ''}\n"
+                )
+            self._send(int(response.get("statusCode", 200)), headers, payload)
+
+        def _send(self, status, headers, payload: bytes):
+            self.send_response(status)
+            for key, value in headers.items():
+                if key.lower() not in SKIPPED_RESPONSE_HEADERS:
+                    self.send_header(key, str(value))
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _dispatch
+
+        def log_message(self, format, *args):
+            pass
+
+    return GatewayHandler
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Local API Gateway emulator for the API function')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--concurrency', '-c', type=int, default=4,
+                        help='Maximum concurrent containers')
+    parser.add_argument('--prewarm', type=int, default=0,
+                        help='Containers started (and INIT-ed) before serving')
+    parser.add_argument('--cold-start-delay-ms', type=int, default=0,
+                        help='Extra delay added to every cold start (sandbox/runtime start-up)')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='Seconds after which an idle container is reclaimed')
+    parser.add_argument('--queue-timeout', type=float, default=1.0,
+                        help='Seconds a request waits for a container before a 429')
+    parser.add_argument('--function-timeout', type=float, default=30,
+                        help='Function timeout in seconds, as seen by get_remaining_time_in_millis()')
+    parser.add_argument('--stage', default='local')
+    parser.add_argument('--secrets-file', default=DEFAULT_SECRETS_FILE,
+                        help='Local secrets file served instead of Secrets Manager '
+                             '(default: local_secrets.json, else local_secrets.example.json)')
+    parser.add_argument('--metrics', action='store_true', help='Keep the EMF metric lines')
+    parser.add_argument('--handler-logs', action='store_true', help='Keep the handler log output')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every request')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    if not os.path.exists(args.secrets_file):
+        sys.exit(f"Secrets file not found: {args.secrets_file} (needed to run offline)")
+    # Containers inherit the environment: local secrets, never AWS
+    os.environ.pop('AWS_EXECUTION_ENV', None)
+    os.environ['LOCAL_SECRETS_PATH'] = os.path.abspath(args.secrets_file)
+    if not args.metrics:
+        os.environ['METRICS_ENABLED'] = 'false'
+
+    pool = ContainerPool(
+        args.concurrency,
+        cold_start_delay_ms=args.cold_start_delay_ms,
+        idle_timeout_secs=args.idle_timeout,
+        queue_timeout_secs=args.queue_timeout,
+        timeout_secs=args.function_timeout,
+        quiet=not args.handler_logs,
+    )
+    if args.prewarm:
+        print(f"Pre-warming {args.prewarm} container(s)...")
+        pool.prewarm(args.prewarm)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(pool, args.stage, args.verbose))
+    server.daemon_threads = True
+    print(f"API Gateway emulator listening on http://{args.host}:{args.port} "
+          f"(concurrency {args.concurrency}, stats at /__gateway/stats)")
+    # Stop cleanly on Ctrl+C and on SIGTERM (background jobs ignore SIGINT)
+    def stop(signum, frame):
+        raise KeyboardInterrupt()
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.shutdown()
+        print(f"Stopped: {json.dumps(pool.snapshot())}")
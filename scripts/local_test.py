@@ -17,12 +17,18 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)  # Go up one level from scripts directory
 sys.path.insert(0, PROJECT_ROOT)
 
+# local_secrets.json when there is one, else the committed non-secret example
+DEFAULT_SECRETS_FILE = os.path.join(PROJECT_ROOT, 'local_secrets.json')
+if not os.path.exists(DEFAULT_SECRETS_FILE):
+    DEFAULT_SECRETS_FILE = os.path.join(PROJECT_ROOT, 'local_secrets.example.json')
+
 # Define event file paths
 EVENT_FILES = {
     'api-hello': 'events/api-hello.json',
     'api-health': 'events/api-health.json',
     'event-daily-processing': 'events/event-daily-processing.json',
-    'event-data-sync': 'events/event-data-sync.json'
+    'event-data-sync': 'events/event-data-sync.json',
+    'event-warmup': 'events/event-warmup.json'
 }
 
 class MockLambdaContext:
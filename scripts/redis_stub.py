@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Local Redis-compatible stand-in, enough of the RESP2 protocol for the shared
+rate limit backend (src/utils/rate_limiter.py) and redis-py clients to talk to
+it without a Redis server.
+
+Supported commands:
+    PING, ECHO, SELECT, CLIENT, TIME, DBSIZE, FLUSHDB, FLUSHALL,
+    GET, SET [EX|PX] [NX|XX], DEL, EXISTS, INCR, INCRBY, EXPIRE, PEXPIRE, TTL, PTTL,
+    WATCH, UNWATCH, MULTI, EXEC, DISCARD
+
+Commands run one at a time under a lock, like Redis' single thread, and
+WATCHed keys abort EXEC when another client wrote them in between.
+
+Usage:
+    python scripts/redis_stub.py --port 6379
+    # then run with RATE_LIMIT_REDIS_URL=redis://localhost:6379/0
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+
+class RespError(Exception):
+    pass
+
+
+class StubState:
+    """Keyspace with per-key expiry and write versions, plus command counts"""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+        self.versions = {}
+        self.commands = {}
+        self.lock = threading.Lock()
+
+    def _expire_if_due(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+
+    def get(self, key):
+        self._expire_if_due(key)
+        return self.values.get(key)
+
+    def set(self, key, value, ttl_secs=None):
+        self.values[key] = value
+        self.versions[key] = self.versions.get(key, 0) + 1
+        if ttl_secs is None:
+            self.expires.pop(key, None)
+        else:
+            self.expires[key] = time.time() + ttl_secs
+
+    def delete(self, key):
+        existed = self.values.pop(key, None) is not None
+        self.expires.pop(key, None)
+        self.versions[key] = self.versions.get(key, 0) + 1
+        return existed
+
+    def version(self, key):
+        self._expire_if_due(key)
+        return self.versions.get(key, 0)
+
+
+def _encode(value):
+    """RESP2 encoding of a reply"""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return f":{int(value)}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str):
+        # Simple strings are status replies (+OK)
+        return f"+{value}\r\n".encode()
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+class NullArray:
+    """The nil multi-bulk reply EXEC sends for an aborted transaction"""
+
+
+def _read_command(rfile):
+    """Read one command as a list of bytes, or None at end of stream"""
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = rfile.readline()
+        if not header.startswith(b"$"):
+            raise RespError("ERR Protocol error: expected '$'")
+        length = int(header[1:])
+        args.append(rfile.read(length + 2)[:-2])
+    return args
+
+
+class Session:
+    """Per connection transaction state"""
+
+    def __init__(self, state: StubState):
+        self.state = state
+        self.watched = {}
+        self.queued = None
+
+    def handle(self, args):
+        name = args[0].decode().upper()
+        with self.state.lock:
+            self.state.commands[name] = self.state.commands.get(name, 0) + 1
+            if self.queued is not None and name not in ("EXEC", "DISCARD", "MULTI", "WATCH"):
+                self.queued.append(args)
+                return "QUEUED"
+            return self.run(name, args[1:])
+
+    def run(self, name, args):
+        state = self.state
+        if name == "MULTI":
+            if self.queued is not None:
+                return RespError("ERR MULTI calls can not be nested")
+            self.queued = []
+            return "OK"
+        if name == "EXEC":
+            if self.queued is None:
+                return RespError("ERR EXEC without MULTI")
+            queued, self.queued = self.queued, None
+            watched, self.watched = self.watched, {}
+            if any(state.version(key) != version for key, version in watched.items()):
+                return NullArray
+            return [self.run(command[0].decode().upper(), command[1:]) for command in queued]
+        if name == "DISCARD":
+            if self.queued is None:
+                return RespError("ERR DISCARD without MULTI")
+            self.queued, self.watched = None, {}
+            return "OK"
+        if name == "WATCH":
+            if self.queued is not None:
+                return RespError("ERR WATCH inside MULTI is not allowed")
+            for key in args:
+                self.watched.setdefault(key, state.version(key))
+            return "OK"
+        if name == "UNWATCH":
+            self.watched = {}
+            return "OK"
+
+        handler = COMMANDS.get(name)
+        if handler is None:
+            return RespError(f"ERR unknown command '{name}'")
+        try:
+            return handler(state, *args)
+        except (TypeError, ValueError):
+            return RespError(f"ERR wrong number or type of arguments for '{name.lower()}' command")
+
+
+def _set(state, key, value, *options):
+    options = [option.decode().upper() for option in options]
+    ttl_secs = None
+    if "EX" in options:
+        ttl_secs = float(options[options.index("EX") + 1])
+    elif "PX" in options:
+        ttl_secs = float(options[options.index("PX") + 1]) / 1000
+    exists = state.get(key) is not None
+    if ("NX" in options and exists) or ("XX" in options and not exists):
+        return None
+    state.set(key, value, ttl_secs)
+    return "OK"
+
+
+def _incr(state, key, amount=b"1"):
+    value = int(state.get(key) or 0) + int(amount)
+    ttl = state.expires.get(key)
+    state.set(key, str(value).encode(), None if ttl is None else ttl - time.time())
+    return value
+
+
+def _expire(state, key, ttl_secs):
+    value = state.get(key)
+    if value is None:
+        return 0
+    state.set(key, value, ttl_secs)
+    return 1
+
+
+def _ttl(state, key, scale):
+    if state.get(key) is None:
+        return -2
+    expires_at = state.expires.get(key)
+    return -1 if expires_at is None else int((expires_at - time.time()) * scale)
+
+
+def _time(state):
+    now = time.time()
+    return [str(int(now)).encode(), str(int(now % 1 * 1_000_000)).encode()]
+
+
+def _flush(state, *options):
+    state.values.clear()
+    state.expires.clear()
+    state.versions = {key: version + 1 for key, version in state.versions.items()}
+    return "OK"
+
+
+COMMANDS = {
+    "PING": lambda state, *args: args[0] if args else "PONG",
+    "ECHO": lambda state, message: message,
+    "SELECT": lambda state, index: "OK",
+    "CLIENT": lambda state, *args: "OK",
+    "TIME": _time,
+    "DBSIZE": lambda state: sum(state.get(key) is not None for key in list(state.values)),
+    "FLUSHDB": _flush,
+    "FLUSHALL": _flush,
+    "GET": lambda state, key: state.get(key),
+    "SET": _set,
+    "DEL": lambda state, *keys: sum(state.get(key) is not None and state.delete(key) for key in keys),
+    "EXISTS": lambda state, *keys: sum(state.get(key) is not None for key in keys),
+    "INCR": _incr,
+    "INCRBY": _incr,
+    "EXPIRE": lambda state, key, secs: _expire(state, key, float(secs)),
+    "PEXPIRE": lambda state, key, millis: _expire(state, key, float(millis) / 1000),
+    "TTL": lambda state, key: _ttl(state, key, 1),
+    "PTTL": lambda state, key: _ttl(state, key, 1000),
+}
+
+
+def make_handler(state: StubState):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            session = Session(state)
+            while True:
+                try:
+                    args = _read_command(self.rfile)
+                except RespError as ex:
+                    self.wfile.write(_encode(ex))
+                    return
+                except (ConnectionError, ValueError):
+                    return
+                if args is None:
+                    return
+                if not args:
+                    continue
+                reply = session.handle(args)
+                self.wfile.write(b"*-1\r\n" if reply is NullArray else _encode(reply))
+
+    return Handler
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def start_stub(port=0):
+    """
+    Start the stand-in on a background thread.
+
+    Returns:
+        tuple: (server, state, url)
+    """
+    state = StubState()
+    server = _Server(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"redis://127.0.0.1:{server.server_address[1]}/0"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local Redis-compatible stand-in')
+    parser.add_argument('--port', type=int, default=6379)
+    args = parser.parse_args()
+
+    server, state, url = start_stub(args.port)
+    print(f"Redis stand-in listening at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -27,6 +27,7 @@ if ($Help) {
     Write-Host "  api-health                   API Gateway event for /health endpoint"
     Write-Host "  event-daily-processing       CloudWatch event for DailyProcessing"
     Write-Host "  event-data-sync              CloudWatch event for DataSync"
+    Write-Host "  event-warmup                 Keep-warm ping, answered without running a job"
     Write-Host ""
     exit 0
 }
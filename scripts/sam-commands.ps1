@@ -78,7 +78,7 @@ function Deploy-SAM {
         --no-confirm-changeset `
         --no-fail-on-empty-changeset `
         --capabilities CAPABILITY_IAM `
-        --parameter-overrides "ProjectPrefix=$ProjectPrefixCamel" `
+        --parameter-overrides "ProjectPrefix=$ProjectPrefixCamel" "ProjectPrefixLower=$ProjectPrefix" `
         --image-repository "${ecrUri}/$ProjectPrefix"
     Pop-Location
 }
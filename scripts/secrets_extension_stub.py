@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in for the AWS Parameters and Secrets Lambda extension.
+Serves secrets from a JSON file (same shape as local_secrets.json) the way the
+extension serves them from its cache, so the config resolver's extension tier
+can be exercised without AWS.
+
+Supported:
+    GET /secretsmanager/get?secretId=<name>
+        Requires the X-Aws-Parameters-Secrets-Token header (any value unless
+        --token is given). Answers with a GetSecretValue-shaped JSON body.
+
+Usage:
+    python scripts/secrets_extension_stub.py --port 2773 --secrets-file local_secrets.json
+    # then run with CONFIG_EXTENSION_URL=http://localhost:2773. Locally the
+    # local_secrets.json tier answers first, so point LOCAL_SECRETS_PATH at a
+    # missing file to have the extension tier serve the secrets
+"""
+import argparse
+import datetime
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+TOKEN_HEADER = "X-Aws-Parameters-Secrets-Token"
+
+
+class StubState:
+    """Secrets being served and a count of requests per secret"""
+
+    def __init__(self, secrets, token=None):
+        self.secrets = secrets
+        self.token = token
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/secretsmanager/get":
+                return self._send_json(404, {"message": "not found"})
+            token = self.headers.get(TOKEN_HEADER)
+            if token is None or (state.token is not None and token != state.token):
+                return self._send_json(401, {"message": "missing or invalid token"})
+            name = (parse_qs(url.query).get("secretId") or [""])[0]
+            state.count(name)
+            if name not in state.secrets:
+                return self._send_json(400, {"message": f"Secrets Manager can't find the specified secret: {name}"})
+            value = state.secrets[name]
+            self._send_json(200, {
+                "ARN": f"arn:aws:secretsmanager:local:000000000000:secret:{name}",
+                "Name": name,
+                "VersionId": "local",
+                "SecretString": value if isinstance(value, str) else json.dumps(value),
+                "VersionStages": ["AWSCURRENT"],
+                "CreatedDate": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            })
+
+    return Handler
+
+
+def start_stub(port=0, secrets=None, token=None):
+    """
+    Start the stand-in on a background thread.
+
+    Returns:
+        tuple: (server, state, base_url)
+    """
+    state = StubState(secrets or {}, token)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local Parameters and Secrets extension stand-in')
+    parser.add_argument('--port', type=int, default=2773)
+    parser.add_argument('--secrets-file', default=os.path.join(PROJECT_ROOT, 'local_secrets.json'),
+                        help='JSON file of {secret name: value}')
+    parser.add_argument('--token', help='Only accept this token (default: any)')
+    args = parser.parse_args()
+
+    with open(args.secrets_file, 'r') as f:
+        secrets = json.load(f)
+
+    server, state, base_url = start_stub(args.port, secrets, args.token)
+    print(f"Secrets extension stand-in serving {', '.join(secrets) or 'no secrets'} at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
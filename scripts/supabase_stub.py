@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in for the Supabase REST (PostgREST) endpoints used by the
+sync engine. Serves a generated source table without holding it in memory and
+accepts bulk upserts into in-memory target tables. Rows of the source table
+can be "touched" (new amount and updated_at) to simulate changes for
+incremental syncs.
+
+Supported:
+    GET  /rest/v1/<table>?select=*&order=<key>.asc&limit=N&<key>=gt.<value>
+         (JSON, or CSV with Accept: text/csv)
+    GET  /rest/v1/source_rows?order=updated_at.asc,id.asc&limit=N
+             &or=(updated_at.gt."<ts>",and(updated_at.eq."<ts>",id.gt."<id>"))
+         (watermark reads of the source table)
+    POST /rest/v1/<table>   (JSON array body, upsert on ?on_conflict=<key>)
+
+Usage:
+    python scripts/supabase_stub.py --port 54321 --rows 1000000
+    # then point SUPABASE_URL / SYNC_SOURCE_URL at http://localhost:54321
+"""
+import argparse
+import csv
+import datetime
+import heapq
+import io
+import itertools
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SOURCE_TABLE = "source_rows"
+BASE_TIME = datetime.datetime(2024, 1, 1)
+
+# (updated_at.gt."v",and(updated_at.eq."v",id.gt."k"))
+WATERMARK_FILTER = re.compile(
+    r'^\((?P<col>\w+)\.gt\."(?P<value>[^"]*)",and\((?P=col)\.eq\."(?P=value)",(?P<key>\w+)\.gt\."(?P<after>[^"]*)"\)\)$'
+)
+
+
+class StubState:
+    """Generated source table plus the upserted target tables"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.touched = {}
+        self.tables = {}
+        self.requests = {"GET": 0, "POST": 0}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def generate_row(row_id):
+        """Row `row_id` of the generated source table (ids start at 1)"""
+        return {
+            "id": row_id,
+            "client": f"client-{row_id % 97}",
+            "amount": round(row_id * 1.25, 2),
+            "active": row_id % 3 != 0,
+            "updated_at": (BASE_TIME + datetime.timedelta(seconds=row_id)).isoformat(),
+        }
+
+    def source_row(self, row_id):
+        return self.touched.get(row_id) or self.generate_row(row_id)
+
+    def touch(self, row_ids, updated_at=None):
+        """Change rows of the source table, moving their updated_at forward"""
+        updated_at = updated_at or datetime.datetime.now().replace(microsecond=0).isoformat()
+        with self.lock:
+            for row_id in row_ids:
+                row = self.source_row(row_id)
+                self.touched[row_id] = {**row, "amount": round(row["amount"] + 1, 2), "updated_at": updated_at}
+
+    def select_changed(self, after, limit):
+        """Source rows after (updated_at, id) in (updated_at, id) order"""
+        # Untouched rows are generated in (updated_at, id) order, starting at the
+        # first id past the position; touched rows are merged in
+        start = 1
+        if after is not None:
+            seconds = (datetime.datetime.fromisoformat(after[0]) - BASE_TIME).total_seconds()
+            start = max(1, int(seconds))
+        with self.lock:
+            touched = sorted(self.touched.values(), key=lambda row: (row["updated_at"], row["id"]))
+        generated = (
+            row for row in map(self.generate_row, range(start, self.rows + 1))
+            if row["id"] not in self.touched
+        )
+        rows = heapq.merge(generated, touched, key=lambda row: (row["updated_at"], row["id"]))
+        if after is not None:
+            rows = (row for row in rows if (row["updated_at"], row["id"]) > after)
+        return list(itertools.islice(rows, limit))
+
+    def select(self, table, after, limit):
+        if table == SOURCE_TABLE:
+            start = int(after) + 1 if after is not None else 1
+            end = min(start + limit, self.rows + 1)
+            return [self.source_row(row_id) for row_id in range(start, end)]
+
+        with self.lock:
+            rows = self.tables.get(table, {})
+            keys = sorted(k for k in rows if after is None or k > type(k)(after))
+            return [rows[k] for k in keys[:limit]]
+
+    def upsert(self, table, rows, key):
+        with self.lock:
+            target = self.tables.setdefault(table, {})
+            for row in rows:
+                target[row[key]] = row
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _table(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if len(parts) != 3 or parts[:2] != ["rest", "v1"]:
+                return None
+            return parts[2]
+
+        def _send_json(self, status, payload=None):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_csv(self, rows):
+            # PostgREST's CSV: header row, booleans as true/false, NULL as an empty field
+            buffer = io.StringIO()
+            if rows:
+                writer = csv.DictWriter(buffer, fieldnames=list(rows[0]), lineterminator="\n")
+                writer.writeheader()
+                writer.writerows(
+                    {k: str(v).lower() if isinstance(v, bool) else v for k, v in row.items()}
+                    for row in rows
+                )
+            body = buffer.getvalue().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            table = self._table()
+            if table is None:
+                return self._send_json(404, {"message": "not found"})
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            order = query.get("order", "id.asc")
+            if table == SOURCE_TABLE and order == "updated_at.asc,id.asc":
+                after = None
+                if "or" in query:
+                    match = WATERMARK_FILTER.match(query["or"])
+                    if match is None:
+                        return self._send_json(400, {"message": f"unsupported filter: {query['or']}"})
+                    after = (match["value"], int(match["after"]))
+                state.requests["GET"] += 1
+                rows = state.select_changed(after, int(query.get("limit", "1000")))
+                if "text/csv" in self.headers.get("Accept", ""):
+                    return self._send_csv(rows)
+                return self._send_json(200, rows)
+
+            key = order.split(".")[0]
+            after = query.get(key, "")
+            after = after[3:] if after.startswith("gt.") else None
+            limit = int(query.get("limit", "1000"))
+            state.requests["GET"] += 1
+            rows = state.select(table, after, limit)
+            if "text/csv" in self.headers.get("Accept", ""):
+                return self._send_csv(rows)
+            self._send_json(200, rows)
+
+        def do_POST(self):
+            table = self._table()
+            if table is None:
+                return self._send_json(404, {"message": "not found"})
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            length = int(self.headers.get("Content-Length", "0"))
+            rows = json.loads(self.rfile.read(length) or b"[]")
+            state.upsert(table, rows, query.get("on_conflict", "id"))
+            state.requests["POST"] += 1
+            self._send_json(201)
+
+    return Handler
+
+
+def start_stub(port=0, rows=10000):
+    """
+    Start the stand-in on a background thread.
+
+    Returns:
+        tuple: (server, state, base_url)
+    """
+    state = StubState(rows)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local Supabase REST stand-in')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--rows', type=int, default=10000, help='Rows in the generated source table')
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub(args.port, args.rows)
+    print(f"Supabase stand-in serving {args.rows} rows of '{SOURCE_TABLE}' at {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
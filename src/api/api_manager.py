@@ -1,18 +1,58 @@
-import json
+import time
+_init_started_at = time.perf_counter()
+
 import traceback
 from src.utils.logger import update_master_logger, init_master_logger
-import src.utils.secrets_manager as SM
+from src.utils.payload_logger import log_payload
+import src.utils.config as CFG
+import src.utils.reference_cache as RC
+import src.utils.serializer as serializer
+import src.utils.warmup as WU
+from src.utils.compression import compress_response
+from src.utils.metrics import start_invocation_metrics
+from src.utils.http_client import prime_session
+from src.utils.rate_limiter import RateLimitExceeded, prime_rate_limiter
+from src.utils.async_runtime import is_coroutine_function, run_coroutine
+from src.utils.deadline import (
+    Deadline, DeadlineExceeded, HandlerBusy,
+    run_with_deadline, set_current_deadline, reset_current_deadline
+)
+from src.utils.response_cache import (
+    CACHEABLE_METHODS, RESPONSE_CACHE_ENABLED, build_cache_key, compute_etag, encoded_etag,
+    get_route_cache, matching_etag
+)
 
 import src.api.controllers.api_controller as CONTRL
+from src.api.request import ApiRequest, MethodNotAllowed, RequestError
 
 # Configure logging
 logger = init_master_logger()
-log_level = SM.get_secret_value('LOG_LEVEL', 'DEBUG')
-logger.setLevel(log_level)
 
-# Load secrets at initialization time
-app_secrets = SM.init_secrets()
-logger.info("Secrets loaded successfully")
+# Resolve configuration at initialization time: env vars, the local secrets
+# file, the secrets extension, then Secrets Manager in one batch call
+app_config = CFG.init_config()
+logger.info("Configuration loaded successfully")
+
+logger.setLevel(app_config.LOG_LEVEL)
+
+def __prime_http_pools():
+    """Open the Supabase connection pool before a request needs it"""
+    supabase_url = CFG.get_config().get("SUPABASE_URL")
+    if supabase_url:
+        prime_session("supabase", supabase_url)
+
+# Priming hooks: the reference datasets marked for preloading are materialized
+# into /tmp during init; warm-up pings also refresh the config, re-import the
+# route handlers and open the downstream connections
+WU.register_priming_hook("referenceData", RC.prime_reference_data)
+WU.register_priming_hook("config", CFG.get_config, phases=(WU.PHASE_WARMUP,))
+WU.register_priming_hook("routeHandlers", CONTRL.REGISTRY.prime, phases=(WU.PHASE_WARMUP,))
+WU.register_priming_hook("rateLimiter", prime_rate_limiter, phases=(WU.PHASE_WARMUP,))
+WU.register_priming_hook("httpPools", __prime_http_pools, phases=(WU.PHASE_WARMUP,))
+WU.run_priming_hooks(WU.PHASE_INIT)
+
+INIT_DURATION_MS = round((time.perf_counter() - _init_started_at) * 1000, 2)
+logger.info(f"InitDuration: {INIT_DURATION_MS} ms")
 
 def __get_api_name(event):
     """Extract API name from the resource path"""
@@ -21,22 +61,45 @@ def __get_api_name(event):
         return resource[1:]
     return resource
 
-def __get_ip_address(event):
-    """Extract IP address from headers"""
-    return event.get("headers", {}).get("X-Forwarded-For", "unknown")
-
-def __get_origin(event):
-    """Extract origin from headers"""
-    return event.get("headers", {}).get("Origin", "unknown")
+def __error_response(default_response, status_code, message, retry_after_secs=None):
+    """Build a small JSON error response without running any handler work"""
+    headers = {**default_response["headers"]}
+    if retry_after_secs is not None:
+        headers["Retry-After"] = str(retry_after_secs)
+    elif status_code == 503:
+        headers["Retry-After"] = "1"
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": serializer.dumps({"message": message})
+    }
 
-def __safe_parse_json(text):
-    """Safely parse JSON or return empty dict"""
-    if not text:
-        return {}
-    try:
-        return json.loads(text)
-    except Exception:
-        return {}
+def __finalize_response(request, api_response, compress):
+    """
+    Turn a (possibly cached) response into the one sent for this request:
+    304 when the client already has it, otherwise a copy that is compressed
+    for the request's Accept-Encoding. The input response is never mutated.
+    A compressed copy gets its own ETag ('"<hash>-gzip"'), as its bytes differ.
+    """
+    headers = dict(api_response["headers"])
+    etag = headers.get("ETag")
+    client_etag = matching_etag(request.get_header("If-None-Match"), etag)
+    if client_etag:
+        if client_etag != "*":
+            # The tag of the variant the client holds
+            headers["ETag"] = client_etag.replace("W/", "", 1)
+        return {
+            "statusCode": 304,
+            "headers": headers,
+            "body": ""
+        }
+    
+    final_response = {**api_response, "headers": headers}
+    if compress:
+        compress_response(final_response, request.get_header("Accept-Encoding"))
+        if etag and "Content-Encoding" in headers:
+            headers["ETag"] = encoded_etag(etag, headers["Content-Encoding"])
+    return final_response
 
 def lambda_handler(event, context, input_logger=None):
     """
@@ -72,17 +135,24 @@ def lambda_handler(event, context, input_logger=None):
     
     start_time = __get_current_time_ms()
     
-    ip_address = __get_ip_address(event)
-    origin = __get_origin(event)
+    # Body, query and headers are parsed on first use only
+    request = ApiRequest(event)
     
     execute_function_name = "UNKNOWN_FUNC"
     
-    body = None
-    query_params = None
     timeout_in_secs = None
     
+    # Lambda remaining time for now, narrowed to the route timeout once known
+    deadline = Deadline.from_context(context)
+    deadline_token = set_current_deadline(deadline)
+    
+    metrics = start_invocation_metrics("API", {"Route": api_name})
+    metrics.set_property("RequestId", request_id)
+    if metrics.cold_start:
+        metrics.put("InitDuration", INIT_DURATION_MS)
+    
     try:
-        method = event.get("httpMethod", "GET")
+        method = request.method
         default_response = {
             "statusCode": 200,
             'headers': {
@@ -97,13 +167,27 @@ def lambda_handler(event, context, input_logger=None):
             logger.info(f"OPTIONS:{api_name} | SKIPPING")
             return default_response
         
-        query_params = event.get("queryStringParameters") or {}
-        body = __safe_parse_json(event.get("body") or "{}")
-        logger.info(f"Request body: {body}")
-        
-        controller_details = CONTRL.get_controller_details(
-            api_name, body, query_params, method, ip_address, origin
-        )
+        with metrics.phase("ControllerResolution"):
+            try:
+                controller_details = CONTRL.get_controller_details(api_name, request, deadline=deadline)
+            except RateLimitExceeded as ex:
+                # Over the caller's quota, answered before any handler work
+                logger.warning(f"Rate limited: {ex}")
+                metrics.increment("RateLimited")
+                return __error_response(default_response, ex.status_code, str(ex), ex.retry_after_secs)
+            except MethodNotAllowed as ex:
+                logger.warning(f"Rejected request ({ex.status_code}): {ex}")
+                metrics.increment("InvalidRequest")
+                response = __error_response(default_response, ex.status_code, str(ex))
+                response["headers"]["Allow"] = ", ".join(ex.allowed_methods)
+                return response
+            except RequestError as ex:
+                # Reject bad input before any handler work
+                logger.warning(f"Rejected request ({ex.status_code}): {ex}")
+                metrics.increment("InvalidRequest")
+                return __error_response(default_response, ex.status_code, str(ex))
+        if request.body_loaded:
+            log_payload(logger, "Request body", request.body, name=api_name, sample_key=request_id)
         
         execute_function = controller_details["execute"]
         execute_function_name = execute_function.__name__
@@ -111,10 +195,50 @@ def lambda_handler(event, context, input_logger=None):
         dont_nest_response = controller_details["dontNestResponse"]
         timeout_in_secs = controller_details["timeoutInSecs"]
         custom_headers = controller_details["customHeaders"]
+        compress = controller_details.get("compress", True)
+        
+        # Handlers and their downstream calls share the route's deadline
+        deadline.limit(timeout_in_secs)
         
-        response = execute_function(*execute_params)
+        # Serve idempotent routes from the in-container cache when possible
+        cache = None
+        cache_policy = controller_details.get("cache")
+        if cache_policy and RESPONSE_CACHE_ENABLED and method in CACHEABLE_METHODS:
+            cache = get_route_cache(controller_details["route"], cache_policy)
+            cache_key = build_cache_key(
+                method, request.query_params, event.get("headers"), cache_policy.get("varyHeaders"),
+                path_params=request.path_params
+            )
+            cached_response = cache.get(cache_key)
+            if cached_response is not None:
+                logger.info(f"Cache hit: {execute_function_name}()")
+                metrics.increment("CacheHit")
+                return __finalize_response(request, cached_response, compress)
+            metrics.increment("CacheMiss")
+        
+        try:
+            with metrics.phase("Handler"):
+                if is_coroutine_function(execute_function):
+                    # Coroutines run on the container's event loop and are
+                    # cancelled outright at the deadline
+                    response = run_coroutine(execute_function(*execute_params), deadline)
+                else:
+                    response = run_with_deadline(execute_function, execute_params, deadline)
+        except DeadlineExceeded as ex:
+            logger.warning(f"Deadline exceeded: {ex}")
+            metrics.increment("DeadlineExceeded")
+            return __error_response(default_response, 504, f"API:{api_name} timed out")
+        except HandlerBusy as ex:
+            logger.warning(f"Load shed: {ex}")
+            metrics.increment("LoadShed")
+            return __error_response(default_response, 503, f"API:{api_name} is busy, retry later")
+        except RequestError as ex:
+            # Raised when a handler reads a field of the request object lazily
+            logger.warning(f"Rejected request ({ex.status_code}): {ex}")
+            metrics.increment("InvalidRequest")
+            return __error_response(default_response, ex.status_code, str(ex))
         logger.info(f"Execution Successful: {execute_function_name}()")
-        logger.info(f"apiResponse: {response}")
+        log_payload(logger, "apiResponse", response, name=api_name, sample_key=request_id)
         
         response_body = response if dont_nest_response else {
             "message": f"API:{api_name} successfully processed",
@@ -126,12 +250,20 @@ def lambda_handler(event, context, input_logger=None):
             **custom_headers
         }
         
-        skip_json_dump = isinstance(response_body, str)
-        return {
-            "body": response_body if skip_json_dump else json.dumps(response_body),
-            **default_response
-        }
+        with metrics.phase("Serialization"):
+            skip_json_dump = isinstance(response_body, str)
+            api_response = {
+                "body": response_body if skip_json_dump else serializer.dumps(response_body),
+                **default_response
+            }
+            
+            if cache is not None:
+                api_response["headers"]["ETag"] = compute_etag(api_response["body"])
+                cache.set(cache_key, api_response)
+            
+            return __finalize_response(request, api_response, compress)
     except Exception as ex:
+        metrics.increment("Error")
         error_msg = f"API:{api_name}:{execute_function_name}()\n::{ex}"
         logger.error(error_msg)
         stacktrace = traceback.format_exc()
@@ -139,8 +271,12 @@ def lambda_handler(event, context, input_logger=None):
         
         raise RuntimeError(error_msg) from ex
     finally:
+        reset_current_deadline(deadline_token)
+        
         total_exec_duration = __get_current_time_ms() - start_time
         logger.info(f"TotalExecDuration: {total_exec_duration} ms")
+        metrics.put("TotalExecDuration", total_exec_duration)
+        metrics.flush()
         
         if timeout_in_secs and (total_exec_duration > (timeout_in_secs * 1000)):
             total_exec_duration_secs = round(total_exec_duration / 1000)
@@ -148,5 +284,4 @@ def lambda_handler(event, context, input_logger=None):
 
 def __get_current_time_ms():
     """Get current time in milliseconds"""
-    import time
     return int(time.time() * 1000)
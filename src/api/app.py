@@ -1,4 +1,5 @@
 import src.api.api_manager as api_manager
+import src.utils.warmup as WU
 from src.utils.logger import get_lambda_logger
 
 def lambda_handler(event, context):
@@ -17,6 +18,10 @@ def lambda_handler(event, context):
     dict
         API Gateway Lambda Proxy Output Format
     """
+    # Keep-warm pings never reach the router
+    if WU.is_warmup_event(event):
+        return WU.handle_warmup(event, context, "API", api_manager.INIT_DURATION_MS)
+    
     # Initialize a basic logger with Lambda context
     logger = get_lambda_logger(context)
     
@@ -1,41 +1,85 @@
+from src.api.controllers.route_registry import RouteRegistry, resolve_handler
+from src.api.request import MethodNotAllowed
+from src.utils.rate_limiter import get_rate_limiter
+
+# Import every route handler during init instead of on the first request.
+# Keeps the first hit on each route cheap under provisioned concurrency.
+EAGER_IMPORT_HANDLERS = True
+
+
 def error_function():
     raise RuntimeError("Unrecognized controller invoked")
 
 
-def get_controller_details(
-    api_name: str,
-    body: dict,
-    query_params: dict,
-    method: str,
-    ip_address: str,
-    origin: str
-):
-    execute = error_function
-    params = []
-    dont_nest_response = False
-    timeout_in_secs = None
-    custom_headers = {}
-
-    # Update details of your new API here
-
-    if api_name == "hello":
-        from src.functions.health.hello import say_hello
-        execute = say_hello
-        params = []
-        timeout_in_secs = 10  # 10 seconds timeout
-
-    elif api_name == "health":
-        from src.functions.health.check import check_health
-        execute = check_health
-        params = []
-        timeout_in_secs = 5  # 5 seconds timeout
-
+# Update details of your new API here. Routes without a "method" answer every
+# method; give one (e.g. "method": "POST") to answer others on the path with a 405
+ROUTES = [
+    {
+        "name": "hello",
+        "handler": "src.functions.health.hello.say_hello",
+        "timeoutInSecs": 10,  # 10 seconds timeout
+        "cache": {"ttlInSecs": 60, "maxEntries": 32},
+    },
+    {
+        "name": "health",
+        "handler": "src.functions.health.check.check_health",
+        "timeoutInSecs": 5,  # 5 seconds timeout
+        "cache": {"ttlInSecs": 5, "maxEntries": 8},
+    },
     # Add more API routes here
-    
+]
+
+# Compiled once per container at import time
+REGISTRY = RouteRegistry(ROUTES, eager=EAGER_IMPORT_HANDLERS)
+
+
+def get_controller_details(api_name: str, request, deadline=None):
+    """
+    Resolve the route for a request and build the handler's positional params.
+
+    Only the request fields the route lists in "params" are computed, and the
+    route's schemas are checked first, so invalid input raises
+    src.api.request.RequestError before the handler runs. Callers over the
+    route's "rateLimit" are rejected before anything else with
+    src.utils.rate_limiter.RateLimitExceeded. A path whose routes are all for
+    other methods raises src.api.request.MethodNotAllowed.
+    """
+    route, matched_params = REGISTRY.resolve(api_name, request.method, request.path)
+
+    if route is None:
+        allowed_methods = REGISTRY.allowed_methods(api_name, request.path)
+        if allowed_methods:
+            raise MethodNotAllowed(
+                f"Method {request.method} not allowed for {api_name}", allowed_methods
+            )
+        return {
+            "execute": error_function,
+            "params": [],
+            "dontNestResponse": False,
+            "timeoutInSecs": None,
+            "customHeaders": {},
+            "route": None
+        }
+
+    rate_limiter = get_rate_limiter()
+    if route.get("rateLimit") and rate_limiter is not None:
+        rate_limiter.check(f"{route['method']} {route['name']}", route["rateLimit"], request)
+
+    execute = route["handler"]
+    if not callable(execute):
+        # Lazy mode: resolve on first use and keep it on the compiled route
+        execute = route["handler"] = resolve_handler(execute)
+
+    if matched_params:
+        request.path_params = {**request.path_params, **matched_params}
+    if route.get("maxBodyBytes") is not None:
+        request.max_body_bytes = route["maxBodyBytes"]
+    request.deadline = deadline
+    request.validate(route["validators"])
+
     return {
+        **route,
         "execute": execute,
-        "params": params,
-        "dontNestResponse": dont_nest_response,
-        "timeoutInSecs": timeout_in_secs,
-        "customHeaders": custom_headers
+        "params": [request.field(field) for field in route["params"]],
+        "route": route["name"]
     }
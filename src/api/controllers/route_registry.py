@@ -0,0 +1,266 @@
+"""
+Declarative route registry for the API controller.
+
+Routes are declared as plain dicts and compiled once, at module import, into:
+  - a flat ``{name: {method: route}}`` dict, which is what API Gateway resources hit
+  - a segment trie for templated routes such as ``items/{item_id}``, used to match
+    concrete request paths
+
+Handlers are referenced by dotted path (``package.module.function``) so the
+registry can either import them lazily on first use or eagerly during init.
+"""
+import importlib
+import logging
+from src.utils.schema import compile_schema
+
+logger = logging.getLogger('WFGClients')
+
+ANY_METHOD = "ANY"
+
+# Request fields a route may ask for through its "params" declaration
+REQUEST_FIELDS = (
+    "body",
+    "query_params",
+    "path_params",
+    "method",
+    "ip_address",
+    "origin",
+    "deadline",
+    "request",
+)
+
+# Parts of a request a route "schema" can validate, and the request field each
+# one applies to. Query and path values arrive as strings, so they are coerced
+# to the scalar types their schema declares.
+SCHEMA_TARGETS = {
+    "body": ("body", False),
+    "query": ("query_params", True),
+    "path": ("path_params", True),
+}
+
+
+def _split_path(path: str):
+    """Split a route name / request path into non-empty segments"""
+    return [segment for segment in (path or "").strip("/").split("/") if segment]
+
+
+def _is_param_segment(segment: str):
+    return segment.startswith("{") and segment.endswith("}")
+
+
+def _param_name(segment: str):
+    """'{item_id}' -> 'item_id', '{proxy+}' -> 'proxy'"""
+    return segment[1:-1].rstrip("+")
+
+
+def resolve_handler(handler):
+    """
+    Resolve a handler reference into a callable.
+
+    Args:
+        handler: A callable, or a dotted path like 'src.functions.health.hello.say_hello'
+
+    Returns:
+        callable: The handler function
+    """
+    if callable(handler):
+        return handler
+    module_path, _, attr_name = handler.rpartition(".")
+    if not module_path:
+        raise ValueError(f"Invalid handler reference: {handler}")
+    module = importlib.import_module(module_path)
+    return getattr(module, attr_name)
+
+
+class _TrieNode:
+    __slots__ = ("static", "param_name", "param_child", "greedy", "routes")
+
+    def __init__(self):
+        self.static = {}
+        self.param_name = None
+        self.param_child = None
+        self.greedy = False
+        self.routes = {}
+
+
+class RouteRegistry:
+    """
+    Compiled lookup table for API routes.
+
+    Lookup by route name is a single dict hit; concrete paths that only match
+    a templated route walk the trie, which is O(path depth) not O(route count).
+
+    Each route declaration is a dict with the keys:
+        name            (str)   Route name / path template, e.g. 'hello' or 'items/{item_id}'
+        handler         (str|callable) Dotted path to, or the handler function itself
+        method          (str)   HTTP method, optional. Routes without one (or 'ANY') match
+                                every method; other methods on a path that only has
+                                routes for specific methods get a 405
+        params          (list)  Request fields passed positionally to the handler,
+                                any of REQUEST_FIELDS. Defaults to no params.
+                                Fields are only computed (e.g. the body parsed) when listed
+        schema          (dict)  JSON Schemas for the 'body', 'query' and/or 'path' parts,
+                                checked before the handler runs. See src.utils.schema
+        maxBodyBytes    (int)   Largest accepted request body, optional.
+                                Defaults to API_MAX_BODY_BYTES
+        timeoutInSecs   (int)   Route timeout, optional
+        customHeaders   (dict)  Extra response headers, optional
+        dontNestResponse (bool) Return the handler response as the body as-is, optional
+        compress        (bool)  Allow Accept-Encoding response compression, defaults to True
+        cache           (dict)  Response cache policy for GET routes, optional.
+                                See src.utils.response_cache
+        rateLimit       (dict)  Per-client token bucket quota, optional.
+                                See src.utils.rate_limiter
+
+    Any additional keys are carried through untouched so route level policies can
+    be declared next to the ones above.
+    """
+
+    def __init__(self, routes=None, eager=False):
+        self._by_name = {}
+        self._trie = _TrieNode()
+        self._routes = []
+        for route in routes or []:
+            self.register(route)
+        if eager:
+            self.prime()
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __iter__(self):
+        return iter(self._routes)
+
+    def register(self, route: dict):
+        """Compile a single route declaration into the lookup structures"""
+        if "name" not in route or "handler" not in route:
+            raise ValueError(f"Route declaration requires 'name' and 'handler': {route}")
+
+        compiled = {
+            "params": [],
+            "timeoutInSecs": None,
+            "customHeaders": {},
+            "dontNestResponse": False,
+            "compress": True,
+            **route,
+        }
+        compiled["method"] = (route.get("method") or ANY_METHOD).upper()
+        compiled["name"] = route["name"].strip("/")
+
+        unknown_fields = [p for p in compiled["params"] if p not in REQUEST_FIELDS]
+        if unknown_fields:
+            raise ValueError(f"Route {compiled['name']} requests unknown params: {unknown_fields}")
+
+        # Schemas are compiled once here, so requests only run the validators
+        schema = compiled.get("schema") or {}
+        unknown_targets = [part for part in schema if part not in SCHEMA_TARGETS]
+        if unknown_targets:
+            raise ValueError(f"Route {compiled['name']} has schemas for unknown parts: {unknown_targets}")
+        compiled["validators"] = {
+            SCHEMA_TARGETS[part][0]: compile_schema(part_schema, coerce=SCHEMA_TARGETS[part][1])
+            for part, part_schema in schema.items()
+        }
+
+        segments = _split_path(compiled["name"])
+        by_method = self._by_name.setdefault(compiled["name"], {})
+        if compiled["method"] in by_method:
+            raise ValueError(f"Duplicate route: {compiled['method']} {compiled['name']}")
+
+        # Every route is addressable by its declared name, which is what API Gateway
+        # sends as the resource. Templated routes are also added to the trie so that
+        # concrete paths (proxy resources, local emulation) resolve too.
+        by_method[compiled["method"]] = compiled
+        if any(_is_param_segment(segment) for segment in segments):
+            node = self._trie
+            for segment in segments:
+                if not _is_param_segment(segment):
+                    node = node.static.setdefault(segment, _TrieNode())
+                    continue
+                name = _param_name(segment)
+                if node.param_child is None:
+                    node.param_child = _TrieNode()
+                    node.param_name = name
+                    node.greedy = segment.endswith("+}")
+                elif node.param_name != name:
+                    raise ValueError(
+                        f"Conflicting path parameter '{name}' for route {compiled['name']}"
+                    )
+                node = node.param_child
+                if segment.endswith("+}"):
+                    # A greedy '{proxy+}' segment swallows the rest of the path
+                    break
+            node.routes[compiled["method"]] = compiled
+
+        self._routes.append(compiled)
+        return compiled
+
+    def prime(self):
+        """
+        Import every handler up front so the first request on each route
+        doesn't pay the import cost. Meant to run during the Lambda INIT phase.
+        """
+        for route in self._routes:
+            route["handler"] = resolve_handler(route["handler"])
+        logger.info(f"Primed {len(self._routes)} route handlers")
+
+    def resolve(self, name: str, method: str = "GET", path: str = None):
+        """
+        Find the route for a request.
+
+        Args:
+            name (str): Route name (API Gateway resource without the leading slash)
+            method (str): HTTP method
+            path (str, optional): Concrete request path, used when the name itself
+                                  isn't a declared route (e.g. '{proxy+}' resources)
+
+        Returns:
+            tuple: (route dict, path params dict), or (None, {}) if nothing matched
+        """
+        name = (name or "").strip("/")
+        method = (method or "GET").upper()
+
+        route = _for_method(self._by_name.get(name), method)
+        if route is not None:
+            return route, {}
+
+        routes, path_params = self._match_path(path.strip("/") if path is not None else name)
+        route = _for_method(routes, method)
+        if route is None:
+            return None, {}
+        return route, path_params
+
+    def allowed_methods(self, name: str, path: str = None):
+        """
+        Methods declared for a route name / request path, for the Allow header
+        of a 405. Empty when no route matches the path with any method.
+        """
+        name = (name or "").strip("/")
+        routes, _ = self._match_path(path.strip("/") if path is not None else name)
+        return sorted({*self._by_name.get(name, {}), *routes})
+
+    def _match_path(self, path: str):
+        """Walk the trie. Returns ({method: route}, path params), empty when nothing matched"""
+        node = self._trie
+        path_params = {}
+        segments = _split_path(path)
+        for index, segment in enumerate(segments):
+            child = node.static.get(segment)
+            if child is not None:
+                node = child
+                continue
+            if node.param_child is None:
+                return {}, {}
+            if node.greedy:
+                path_params[node.param_name] = "/".join(segments[index:])
+                node = node.param_child
+                break
+            path_params[node.param_name] = segment
+            node = node.param_child
+        return node.routes, path_params
+
+
+def _for_method(routes, method: str):
+    """The route of a {method: route} dict serving a method, if any"""
+    if not routes:
+        return None
+    return routes.get(method) or routes.get(ANY_METHOD)
@@ -0,0 +1,242 @@
+"""
+Lazily parsed view of an API Gateway proxy request.
+
+Nothing is decoded up front: the body is base64-decoded, size checked and
+parsed the first time something reads ``request.body``, headers are folded to
+lower case on first use, and so on. Routes only pay for the fields their
+handler asks for (or their schema validates). That first body parse, wherever
+it happens, is timed into the invocation's BodyParseDuration metric.
+
+Malformed input raises a RequestError carrying the HTTP status to answer
+with (400, 413 for oversized bodies, 405 for a method the path has no route for), which the API manager turns into a
+small error response instead of a 500 from deep inside a handler.
+
+Configuration (environment variables):
+    API_MAX_BODY_BYTES   Largest accepted (decoded) request body, default 1 MiB.
+                         Routes can override it with "maxBodyBytes"
+"""
+import base64
+import binascii
+import json
+import os
+from urllib.parse import parse_qsl
+from src.utils.metrics import timed
+from src.utils.schema import SchemaError
+
+MAX_BODY_BYTES = int(os.environ.get('API_MAX_BODY_BYTES', str(1024 * 1024)))
+
+_UNSET = object()
+
+
+class RequestError(ValueError):
+    """
+    Invalid client input. ``status_code`` is the HTTP status to respond with.
+    """
+    status_code = 400
+
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        if status_code is not None:
+            self.status_code = status_code
+
+
+class PayloadTooLarge(RequestError):
+    status_code = 413
+
+
+class MethodNotAllowed(RequestError):
+    """
+    The path has routes, but none for the request's method. ``allowed_methods``
+    goes into the response's Allow header.
+    """
+    status_code = 405
+
+    def __init__(self, message: str, allowed_methods):
+        super().__init__(message)
+        self.allowed_methods = list(allowed_methods)
+
+
+def _is_json_type(content_type: str):
+    return content_type == "application/json" or content_type.endswith("+json")
+
+
+class ApiRequest:
+    """
+    Request fields for a handler, computed on first access and cached.
+
+    Attributes named in route_registry.REQUEST_FIELDS can be requested through
+    a route's "params"; the "request" field passes this object itself so a
+    handler can decide what to read.
+    """
+
+    def __init__(self, event: dict, path_params: dict = None, max_body_bytes: int = None):
+        self.event = event
+        self.method = (event.get("httpMethod") or "GET").upper()
+        self.path = event.get("path")
+        self.max_body_bytes = MAX_BODY_BYTES if max_body_bytes is None else max_body_bytes
+        self.deadline = None
+        self._path_params = path_params
+        self._headers = None
+        self._query_params = None
+        self._raw_body = None
+        self._body = _UNSET
+
+    # Headers ---------------------------------------------------------------
+
+    @property
+    def headers(self) -> dict:
+        """Headers keyed by lower-cased name"""
+        if self._headers is None:
+            self._headers = {
+                key.lower(): value for key, value in (self.event.get("headers") or {}).items()
+            }
+        return self._headers
+
+    def get_header(self, name: str, default=None):
+        """Header value, matching the name case-insensitively"""
+        return self.headers.get(name.lower(), default)
+
+    @property
+    def ip_address(self) -> str:
+        return self.get_header("X-Forwarded-For", "unknown")
+
+    @property
+    def client_ip(self) -> str:
+        """
+        Caller IP as seen by API Gateway. Prefers the gateway's sourceIp over
+        X-Forwarded-For, whose leading entries the client can forge
+        """
+        identity = (self.event.get("requestContext") or {}).get("identity") or {}
+        if identity.get("sourceIp"):
+            return identity["sourceIp"]
+        forwarded = self.get_header("X-Forwarded-For")
+        return forwarded.split(",")[-1].strip() if forwarded else "unknown"
+
+    @property
+    def origin(self) -> str:
+        return self.get_header("Origin", "unknown")
+
+    @property
+    def content_type(self) -> str:
+        """Media type without parameters, e.g. 'application/json'"""
+        value = self.get_header("Content-Type") or ""
+        return value.split(";", 1)[0].strip().lower()
+
+    # Query and path --------------------------------------------------------
+
+    @property
+    def query_params(self) -> dict:
+        if self._query_params is None:
+            self._query_params = self.event.get("queryStringParameters") or {}
+        return self._query_params
+
+    @property
+    def path_params(self) -> dict:
+        if self._path_params is None:
+            self._path_params = self.event.get("pathParameters") or {}
+        return self._path_params
+
+    @path_params.setter
+    def path_params(self, value: dict):
+        self._path_params = value
+
+    # Body ------------------------------------------------------------------
+
+    @property
+    def raw_body(self) -> bytes:
+        """
+        Request body as bytes, base64-decoded when API Gateway flagged it.
+
+        Raises:
+            PayloadTooLarge: The decoded body exceeds max_body_bytes
+            RequestError: The body isn't valid base64
+        """
+        if self._raw_body is None:
+            body = self.event.get("body") or ""
+            limit = self.max_body_bytes
+            if self.event.get("isBase64Encoded"):
+                # Reject on the encoded length before spending time decoding
+                if limit is not None and len(body) * 3 // 4 > limit + 2:
+                    raise PayloadTooLarge(f"Request body exceeds {limit} bytes")
+                try:
+                    data = base64.b64decode(body, validate=True)
+                except (binascii.Error, ValueError):
+                    raise RequestError("Request body is not valid base64")
+            else:
+                data = body.encode("utf-8") if isinstance(body, str) else bytes(body)
+            if limit is not None and len(data) > limit:
+                raise PayloadTooLarge(f"Request body exceeds {limit} bytes")
+            self._raw_body = data
+        return self._raw_body
+
+    @property
+    def body(self):
+        """
+        Parsed request body: a dict/list for JSON (and for requests without a
+        Content-Type, as before), a dict for form posts, text otherwise.
+        An empty body is {}.
+
+        Raises:
+            RequestError: Malformed JSON or form data, or an undecodable body
+        """
+        if self._body is _UNSET:
+            with timed("BodyParse"):
+                self._body = self._parse_body()
+        return self._body
+
+    @property
+    def body_loaded(self) -> bool:
+        """Whether the body has been parsed already"""
+        return self._body is not _UNSET
+
+    def _parse_body(self):
+        data = self.raw_body
+        if not data:
+            return {}
+
+        content_type = self.content_type
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            if not content_type or _is_json_type(content_type) or content_type.startswith("text/"):
+                raise RequestError("Request body is not valid UTF-8")
+            # Binary payloads are handed over as bytes
+            return data
+
+        if not content_type or _is_json_type(content_type):
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError as ex:
+                raise RequestError(f"Malformed JSON body: {ex.msg} at line {ex.lineno} column {ex.colno}")
+        if content_type == "application/x-www-form-urlencoded":
+            try:
+                return dict(parse_qsl(text, keep_blank_values=True, strict_parsing=True))
+            except ValueError:
+                raise RequestError("Malformed form body")
+        return text
+
+    # Validation ------------------------------------------------------------
+
+    def validate(self, validators: dict):
+        """
+        Run a route's compiled validators and keep the validated (coerced) values.
+
+        Args:
+            validators (dict): {field: validator} as compiled by RouteRegistry.register,
+                               for the fields 'body', 'query_params' and 'path_params'
+
+        Raises:
+            RequestError: The first schema violation found
+        """
+        for field, validator in validators.items():
+            try:
+                value = validator(getattr(self, field), field)
+            except SchemaError as ex:
+                raise RequestError(f"Invalid request: {ex}")
+            setattr(self, f"_{field}", value)
+
+    def field(self, name: str):
+        """Value of a request field, as declared in a route's "params" """
+        if name == "request":
+            return self
+        return getattr(self, name)
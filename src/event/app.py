@@ -1,6 +1,7 @@
-import json
 import src.event.event_manager as event_manager
+import src.utils.warmup as WU
 from src.utils.logger import get_lambda_logger
+from src.utils.payload_logger import log_payload
 
 def lambda_handler(event, context):
     """
@@ -18,11 +19,18 @@ def lambda_handler(event, context):
     dict
         Response containing execution status
     """
+    # Keep-warm pings never reach an event handler
+    if WU.is_warmup_event(event):
+        return WU.handle_warmup(event, context, "EVENT", event_manager.INIT_DURATION_MS)
+    
     # Initialize a basic logger with Lambda context
     logger = get_lambda_logger(context)
     
     logger.info('Event triggered')
-    logger.info(f'Event data: {json.dumps(event)}')
+    log_payload(
+        logger, 'Event data', event,
+        name=event.get('name'), sample_key=context.aws_request_id
+    )
     
     # Delegate all routing to the Event manager
     return event_manager.lambda_handler(event, context, logger)
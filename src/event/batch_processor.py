@@ -0,0 +1,173 @@
+"""
+Batch (SQS / Kinesis / DynamoDB stream) event processing with partial-failure
+reporting.
+
+Each record in a ``Records[]`` batch is decoded, routed to the controller for
+its event name and run independently. Failed records are returned as
+``batchItemFailures`` so only they are retried; this requires
+``FunctionResponseTypes: [ReportBatchItemFailures]`` on the event source mapping.
+
+Ordered sources (SQS FIFO queues, Kinesis and DynamoDB streams) always run
+sequentially and stop at the first failure, whatever BATCH_MAX_WORKERS says:
+their order must hold, and stream retries checkpoint on the failed sequence
+number.
+
+Configuration (environment variables):
+    BATCH_MAX_WORKERS      Records processed concurrently (default 1, sequential)
+    BATCH_DEFAULT_EVENT    Event name for records whose payload has no "name"
+"""
+import base64
+import contextvars
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.async_runtime import call_handler
+from src.utils.deadline import get_current_deadline
+
+logger = logging.getLogger('WFGClients')
+
+MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '1'))
+DEFAULT_EVENT_NAME = os.environ.get('BATCH_DEFAULT_EVENT')
+
+SOURCE_SQS = "aws:sqs"
+SOURCE_KINESIS = "aws:kinesis"
+SOURCE_DYNAMODB = "aws:dynamodb"
+BATCH_SOURCES = (SOURCE_SQS, SOURCE_KINESIS, SOURCE_DYNAMODB)
+
+# Sources whose records are ordered per shard
+STREAM_SOURCES = (SOURCE_KINESIS, SOURCE_DYNAMODB)
+
+# Created on first concurrent batch and reused across warm invocations
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS, thread_name_prefix="batch"
+                )
+    return _executor
+
+
+def _record_source(record: dict):
+    return record.get("eventSource") or record.get("EventSource")
+
+
+def is_batch_event(event) -> bool:
+    """Check whether an event is an SQS / Kinesis / DynamoDB stream Records[] batch"""
+    if not isinstance(event, dict):
+        return False
+    records = event.get("Records")
+    return bool(records) and isinstance(records, list) and _record_source(records[0]) in BATCH_SOURCES
+
+
+def get_batch_source(event: dict) -> str:
+    return _record_source(event["Records"][0])
+
+
+def _is_fifo(event: dict) -> bool:
+    return get_batch_source(event) == SOURCE_SQS and \
+        event["Records"][0].get("eventSourceARN", "").endswith(".fifo")
+
+
+def _is_ordered(event: dict) -> bool:
+    return _is_fifo(event) or get_batch_source(event) in STREAM_SOURCES
+
+
+def get_item_identifier(record: dict) -> str:
+    """Identifier Lambda expects in batchItemFailures for a record"""
+    source = _record_source(record)
+    if source == SOURCE_KINESIS:
+        return record["kinesis"]["sequenceNumber"]
+    if source == SOURCE_DYNAMODB:
+        return record["dynamodb"]["SequenceNumber"]
+    return record["messageId"]
+
+
+def decode_record(record: dict):
+    """
+    Decode a record's payload into the event passed to the controller.
+    Non-JSON payloads are wrapped as {"data": <text>}, DynamoDB stream
+    records as {"eventName": "INSERT" | "MODIFY" | "REMOVE", "data": <change>}.
+    """
+    source = _record_source(record)
+    if source == SOURCE_DYNAMODB:
+        return {"eventName": record.get("eventName"), "data": record["dynamodb"]}
+    if source == SOURCE_KINESIS:
+        raw = base64.b64decode(record["kinesis"]["data"]).decode("utf-8")
+    else:
+        raw = record.get("body") or ""
+
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError:
+        payload = {"data": raw}
+    return payload if isinstance(payload, dict) else {"data": payload}
+
+
+def _process_record(record, context, get_controller_function):
+    """Run a single record through its controller. Raises on failure."""
+    payload = decode_record(record)
+    event_name = payload.get("name") or DEFAULT_EVENT_NAME
+    if not event_name:
+        raise ValueError("Record payload has no event name")
+    controller = get_controller_function(event_name)
+    return call_handler(controller, payload, context)
+
+
+def process_batch(event: dict, context, get_controller_function):
+    """
+    Process every record of a batch and collect the failures.
+
+    Args:
+        event (dict): SQS / Kinesis / DynamoDB stream batch event
+        context: Lambda context object
+        get_controller_function (callable): Maps an event name to its controller
+
+    Returns:
+        dict: {'batchItemFailures': [{'itemIdentifier': ...}, ...]}
+    """
+    records = event["Records"]
+    failures = []
+    deadline = get_current_deadline()
+
+    def run(record):
+        try:
+            # Records not started before the deadline are left for the retry
+            deadline.check()
+            _process_record(record, context, get_controller_function)
+            return None
+        except Exception as ex:
+            logger.error(f"Record {get_item_identifier(record)} failed: {ex}")
+            return get_item_identifier(record)
+
+    if _is_ordered(event):
+        # FIFO / shard order must hold: stop at the first failure and hand
+        # back that record and everything after it
+        for index, record in enumerate(records):
+            if run(record) is not None:
+                failures = [get_item_identifier(r) for r in records[index:]]
+                break
+    elif MAX_WORKERS > 1 and len(records) > 1:
+        executor = _get_executor()
+        # Each task runs in a copy of the caller's context so log lines keep
+        # the invocation's classifier and request id
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, record)
+            for record in records
+        ]
+        failures = [f.result() for f in futures if f.result() is not None]
+    else:
+        failures = [item for item in map(run, records) if item is not None]
+
+    logger.info(f"Batch processed: {len(records) - len(failures)} succeeded, {len(failures)} failed")
+    return {
+        "batchItemFailures": [{"itemIdentifier": item} for item in failures]
+    }
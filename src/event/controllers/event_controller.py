@@ -1,9 +1,34 @@
 # from functools import partial
 
-def error_function():
+# Events that must not run twice for one delivery. EventBridge and Lambda's
+# async retries can redeliver a scheduled event; duplicates within windowSecs
+# (the schedule period, counted from the event's scheduled "time") replay the
+# stored result. ttlInSecs is how long that result is kept.
+IDEMPOTENT_EVENTS = {
+    "DailyProcessing": {"windowSecs": 3600, "ttlInSecs": 86400},
+    "DataSync": {"windowSecs": 6 * 3600, "ttlInSecs": 86400},
+}
+
+
+def get_idempotency_policy(event_name: str):
+    """Idempotency policy for an event, or None when it may simply re-run"""
+    return IDEMPOTENT_EVENTS.get(event_name)
+
+
+def error_function(*args, **kwargs):
     raise RuntimeError("Unrecognized controller invoked")
 
 
+# Event names handled below, imported ahead of time by prime_controllers()
+EVENT_NAMES = ("DailyProcessing", "DataSync")
+
+
+def prime_controllers():
+    """Import every event handler, so the first event doesn't pay for it"""
+    for event_name in EVENT_NAMES:
+        get_controller_function(event_name)
+
+
 def get_controller_function(event_name: str):
     controller = error_function
 
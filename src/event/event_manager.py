@@ -1,27 +1,68 @@
-import json
+import time
+_init_started_at = time.perf_counter()
+
 import traceback
 from src.utils.logger import update_master_logger, init_master_logger
-import src.utils.secrets_manager as SM
+import src.utils.config as CFG
+import src.utils.reference_cache as RC
+import src.utils.serializer as serializer
+import src.utils.warmup as WU
 
 import src.event.controllers.event_controller as CONTRL
+from src.event.batch_processor import is_batch_event, get_batch_source, process_batch
+from src.utils.metrics import start_invocation_metrics
+from src.utils.async_runtime import call_handler
+from src.utils.http_client import prime_session
+from src.utils.idempotency import (
+    IDEMPOTENCY_ENABLED, IdempotencyInProgress, get_idempotency_store, make_idempotency_key
+)
+from src.utils.deadline import (
+    Deadline, DeadlineExceeded, set_current_deadline, reset_current_deadline
+)
 
 # Configure logging
 logger = init_master_logger()
-log_level = SM.get_secret_value('LOG_LEVEL', 'DEBUG')
-logger.setLevel(log_level)
 
-# Load secrets at initialization time
-app_secrets = SM.init_secrets()
-logger.info("Secrets loaded successfully")
+# Resolve configuration at initialization time: env vars, the local secrets
+# file, the secrets extension, then Secrets Manager in one batch call
+app_config = CFG.init_config()
+logger.info("Configuration loaded successfully")
+
+logger.setLevel(app_config.LOG_LEVEL)
+
+def __prime_http_pools():
+    """Open the Supabase connection pool before a job needs it"""
+    supabase_url = CFG.get_config().get("SUPABASE_URL")
+    if supabase_url:
+        prime_session("supabase", supabase_url)
+
+def __prime_idempotency_store():
+    """Create the idempotency store, importing boto3 for the DynamoDB backend"""
+    if IDEMPOTENCY_ENABLED:
+        get_idempotency_store()
+
+# Priming hooks: the reference datasets marked for preloading are materialized
+# into /tmp and the event handlers imported during init; warm-up pings also
+# refresh the config and open the downstream clients
+WU.register_priming_hook("referenceData", RC.prime_reference_data)
+WU.register_priming_hook("eventHandlers", CONTRL.prime_controllers)
+WU.register_priming_hook("config", CFG.get_config, phases=(WU.PHASE_WARMUP,))
+WU.register_priming_hook("idempotencyStore", __prime_idempotency_store, phases=(WU.PHASE_WARMUP,))
+WU.register_priming_hook("httpPools", __prime_http_pools, phases=(WU.PHASE_WARMUP,))
+WU.run_priming_hooks(WU.PHASE_INIT)
+
+INIT_DURATION_MS = round((time.perf_counter() - _init_started_at) * 1000, 2)
+logger.info(f"InitDuration: {INIT_DURATION_MS} ms")
 
 def __get_event_name(event):
     """Extract event name from the event object"""
-    # Default to DailyProcessing if no name is provided
-    return event.get("name", "DailyProcessing")
+    if is_batch_event(event):
+        return f"BATCH:{get_batch_source(event)}"
+    # No default: an unnamed payload must not run a job, it fails as unrecognized
+    return event.get("name", "UNKNOWN")
 
 def __get_current_time_ms():
     """Get current time in milliseconds"""
-    import time
     return int(time.time() * 1000)
 
 def lambda_handler(event, context, input_logger=None):
@@ -60,9 +101,31 @@ def lambda_handler(event, context, input_logger=None):
     
     execute_function_name = "UNKNOWN_FUNC"
     
+    # Jobs check this between units of work (get_current_deadline().check())
+    # so they stop cleanly before Lambda kills the invocation
+    deadline = Deadline.from_context(context)
+    deadline_token = set_current_deadline(deadline)
+    
+    metrics = start_invocation_metrics("EVENT", {"EventName": event_name})
+    metrics.set_property("RequestId", request_id)
+    if metrics.cold_start:
+        metrics.put("InitDuration", INIT_DURATION_MS)
+    
     try:
+        if is_batch_event(event):
+            # SQS / Kinesis batches: each record is routed on its own and the
+            # failures go back to Lambda at the top level of the response
+            execute_function_name = "process_batch"
+            logger.info(f"Batch size: {len(event['Records'])}")
+            metrics.put("BatchSize", len(event["Records"]), "Count")
+            with metrics.phase("Handler"):
+                batch_response = process_batch(event, context, CONTRL.get_controller_function)
+            metrics.put("BatchItemFailures", len(batch_response["batchItemFailures"]), "Count")
+            return batch_response
+        
         # Get the controller function for this event
-        execute_function = CONTRL.get_controller_function(event_name)
+        with metrics.phase("ControllerResolution"):
+            execute_function = CONTRL.get_controller_function(event_name)
         
         # Get the function name for logging
         from functools import partial
@@ -71,18 +134,56 @@ def lambda_handler(event, context, input_logger=None):
         else:
             execute_function_name = execute_function.__name__
         
-        # Execute the controller function
-        response = execute_function()
+        # Execute the controller function, once per delivery for idempotent events
+        idempotency_policy = CONTRL.get_idempotency_policy(event_name) if IDEMPOTENCY_ENABLED else None
+        try:
+            with metrics.phase("Handler"):
+                if idempotency_policy:
+                    outcome = get_idempotency_store().run(
+                        make_idempotency_key(event_name, event, idempotency_policy.get("windowSecs")),
+                        partial(call_handler, execute_function, deadline=deadline), event, context,
+                        lease_secs=deadline.remaining(),
+                        ttl_secs=idempotency_policy.get("ttlInSecs")
+                    )
+                    response = outcome.result
+                    if outcome.replayed:
+                        metrics.increment("IdempotentReplay")
+                else:
+                    response = call_handler(execute_function, event, context, deadline=deadline)
+        except IdempotencyInProgress as ex:
+            metrics.increment("IdempotentInProgress")
+            # The other delivery is doing the work, so don't make Lambda retry this one
+            logger.info(f"Skipping duplicate delivery: {ex}")
+            return {
+                "statusCode": 409,
+                "body": serializer.dumps({
+                    "message": f"EVENT:{event_name} is already being processed",
+                    "inProgress": True
+                })
+            }
+        except DeadlineExceeded as ex:
+            metrics.increment("DeadlineExceeded")
+            # Retrying a job that ran out of time wouldn't finish either
+            logger.warning(f"Deadline exceeded: {execute_function_name}(): {ex}")
+            return {
+                "statusCode": 504,
+                "body": serializer.dumps({
+                    "message": f"EVENT:{event_name} stopped at its deadline",
+                    "timedOut": True
+                })
+            }
         logger.info(f"Execution Successful: {execute_function_name}()")
         
-        return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": f"EVENT:{event_name} successfully processed",
-                "response": response
-            })
-        }
+        with metrics.phase("Serialization"):
+            return {
+                "statusCode": 200,
+                "body": serializer.dumps({
+                    "message": f"EVENT:{event_name} successfully processed",
+                    "response": response
+                })
+            }
     except Exception as ex:
+        metrics.increment("Error")
         error_msg = f"EVENT:{event_name}:{execute_function_name}()\n::{ex}"
         logger.error(error_msg)
         stacktrace = traceback.format_exc()
@@ -90,5 +191,9 @@ def lambda_handler(event, context, input_logger=None):
         
         raise RuntimeError(error_msg) from ex
     finally:
+        reset_current_deadline(deadline_token)
+        
         total_exec_duration = __get_current_time_ms() - start_time
         logger.info(f"TotalExecDuration: {total_exec_duration} ms")
+        metrics.put("TotalExecDuration", total_exec_duration)
+        metrics.flush()
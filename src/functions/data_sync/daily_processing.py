@@ -3,40 +3,87 @@ Daily processing functionality for the WFG Client project.
 """
 import datetime
 import logging
-import src.utils.secrets_manager as SM
+from src.utils.config import get_config
+from src.utils.task_scheduler import ScheduleFailed, TaskScheduler
 
 # Get logger instance
 logger = logging.getLogger('WFGClients')
 
+
+def load_settings(inputs):
+    """Settings shared by the processing tasks"""
+    supabase_url = get_config().SUPABASE_URL
+    logger.info(f"Using Supabase URL: {supabase_url}")
+    return {"supabase_url": supabase_url}
+
+
+def refresh_aggregates(inputs):
+    """Refresh the aggregate tables"""
+    settings = inputs["load_settings"]
+    logger.info(f"Refreshing aggregates in {settings['supabase_url']}")
+    # Here you would implement the aggregate refresh
+    return {"refreshed": 0}
+
+
+def expire_records(inputs):
+    """Expire records past their retention"""
+    settings = inputs["load_settings"]
+    logger.info(f"Expiring records in {settings['supabase_url']}")
+    # Here you would implement the record expiry
+    return {"expired": 0}
+
+
+def recompute_reports(inputs):
+    """Recompute the reports built on the refreshed aggregates"""
+    aggregates = inputs["refresh_aggregates"]
+    logger.info(f"Recomputing reports from {aggregates['refreshed']} refreshed aggregates")
+    # Here you would implement the report computation
+    return {"reports": 0}
+
+
+def build_daily_schedule():
+    """
+    Daily task graph. Independent tasks run in parallel; when a task fails,
+    only the tasks depending on it are skipped.
+    """
+    scheduler = TaskScheduler()
+    scheduler.add("load_settings", load_settings)
+    scheduler.add("refresh_aggregates", refresh_aggregates, depends_on=["load_settings"])
+    scheduler.add("expire_records", expire_records, depends_on=["load_settings"])
+    scheduler.add("recompute_reports", recompute_reports, depends_on=["refresh_aggregates"])
+    return scheduler
+
+
 def process_daily_tasks(event=None, context=None):
     """
     Processes daily tasks for the WFG Client
-    
+
     Args:
         event: AWS Lambda event object
         context: AWS Lambda context object
-        
+
     Returns:
         dict: Result of the daily processing operation
+
+    Raises:
+        ScheduleFailed: A task failed or timed out. The invocation fails, so
+            its idempotency key is released and the run is retried
     """
     # Get current timestamp
     timestamp = datetime.datetime.now().isoformat()
     logger.info(f"Processing daily tasks at: {timestamp}")
-    
-    # Get Supabase URL from Secrets Manager
-    supabase_url = SM.get_secret_value('SUPABASE_URL')
-    logger.info(f"Using Supabase URL: {supabase_url}")
-    
-    # Here you would implement the actual daily processing logic
-    
+
+    report = build_daily_schedule().run()
+
+    if not report.ok:
+        logger.error(f"Daily processing failed: {report.to_dict()}")
+        raise ScheduleFailed(report)
+
     logger.info("Daily processing completed")
-    
-    # Log execution success
-    logger.info("Execution Successful: process_daily_tasks()")
-    logger.info(f"TotalExecDuration: {2} ms")
-    
+
     return {
         "message": "Daily processing completed",
         "timestamp": timestamp,
-        "supabase_url": supabase_url
+        "supabase_url": (report.output("load_settings") or {}).get("supabase_url"),
+        "tasks": report.to_dict()
     }
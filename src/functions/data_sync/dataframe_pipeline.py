@@ -0,0 +1,414 @@
+"""
+Vectorized pandas / NumPy processing for source tables.
+
+Source tables are read into typed DataFrames one chunk at a time, and grouped
+aggregations run per chunk as vectorized groupby operations. Only the
+per-chunk partial aggregates (one row per group) are kept, then combined at
+the end:
+
+    result = aggregate_frames(
+        fetch_frames(table, "id", dtypes={"client": "category", "amount": "float64"}),
+        by=["client"],
+        metrics={"amount": ["sum", "mean", "max"], "id": ["count"]},
+    )
+
+fetch_frames() asks PostgREST for CSV and parses it with pandas' C reader, so
+rows never exist as Python dicts. Pages of row dicts (e.g. from
+SupabaseTable.fetch_pages) work too through aggregate_pages(), but building
+the frames from dicts then costs more than the aggregation itself.
+
+When the buffered frames outgrow the memory budget they are spilled to
+Feather / Parquet files under /tmp and read back one file at a time, so the
+working set stays bounded however many groups or rows there are.
+
+Configuration (environment variables):
+    DATAFRAME_MEMORY_BUDGET_MB   In-memory budget before spilling (default 256)
+    DATAFRAME_CHUNK_ROWS         Rows per DataFrame built from row-dict pages (default 50000)
+    DATAFRAME_SPILL_DIR          Spill directory (default /tmp/dataframe-spill)
+    DATAFRAME_SPILL_FORMAT       'feather' or 'parquet' (default feather)
+"""
+import io
+import logging
+import os
+import shutil
+import tempfile
+
+from src.functions.data_sync.sync_engine import SyncStats
+from src.utils.deadline import get_current_deadline
+from src.utils.lazy_import import is_available, lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger('WFGClients')
+
+MEMORY_BUDGET_MB = int(os.environ.get('DATAFRAME_MEMORY_BUDGET_MB', '256'))
+CHUNK_ROWS = int(os.environ.get('DATAFRAME_CHUNK_ROWS', '50000'))
+# Rows per CSV request; must not exceed the API's max-rows setting
+DEFAULT_FRAME_PAGE_SIZE = 10000
+SPILL_DIR = os.environ.get('DATAFRAME_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'dataframe-spill'))
+SPILL_FORMAT = os.environ.get('DATAFRAME_SPILL_FORMAT', 'feather').lower()
+
+# Aggregations that can be computed per chunk and combined afterwards.
+# mean is derived from the combined sum and count.
+PARTIAL_AGGREGATIONS = {
+    "sum": "sum",
+    "count": "sum",
+    "min": "min",
+    "max": "max",
+}
+SUPPORTED_AGGREGATIONS = tuple(PARTIAL_AGGREGATIONS) + ("mean",)
+
+
+def _spill_format():
+    # Feather and Parquet both need pyarrow; pickle always works
+    return SPILL_FORMAT if is_available("pyarrow") else "pickle"
+
+
+def _apply_types(frame, dtypes: dict = None, datetime_columns=()):
+    if frame.empty:
+        return frame
+    if dtypes:
+        frame = frame.astype({col: dtype for col, dtype in dtypes.items() if col in frame.columns})
+    for col in datetime_columns:
+        if col in frame.columns:
+            frame[col] = pd.to_datetime(frame[col], utc=True, format="ISO8601")
+    return frame
+
+
+def to_frame(rows, dtypes: dict = None, datetime_columns=()):
+    """
+    Build a typed DataFrame from a list of row dicts.
+
+    Args:
+        rows (list): Row dicts
+        dtypes (dict, optional): Column dtypes, e.g. {'client': 'category', 'amount': 'float64'}
+        datetime_columns (iterable, optional): Columns parsed as datetimes (ISO-8601 strings)
+
+    Returns:
+        pandas.DataFrame
+    """
+    return _apply_types(pd.DataFrame.from_records(rows), dtypes, datetime_columns)
+
+
+def read_csv_frame(content: bytes, dtypes: dict = None, datetime_columns=()):
+    """
+    Parse a PostgREST CSV response into a typed DataFrame.
+    Empty fields are NULLs; booleans may be true/false or t/f.
+    """
+    if not content.strip():
+        return pd.DataFrame()
+    frame = pd.read_csv(
+        io.BytesIO(content),
+        # pyarrow's multi-threaded reader is several times faster than the C one
+        engine="pyarrow" if is_available("pyarrow") else "c",
+        dtype=dtypes,
+        true_values=["t", "true"],
+        false_values=["f", "false"],
+    )
+    return _apply_types(frame, None, datetime_columns)
+
+
+def iter_frames(pages, dtypes: dict = None, datetime_columns=(), chunk_rows: int = None):
+    """
+    Turn an iterator of row-dict pages into typed DataFrames of about
+    `chunk_rows` rows each. Small pages are coalesced, so the per-frame
+    overhead of pandas is paid once per chunk rather than once per page.
+    """
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    rows = []
+    for page in pages:
+        rows.extend(page)
+        if len(rows) >= chunk_rows:
+            yield to_frame(rows, dtypes, datetime_columns)
+            rows = []
+    if rows:
+        yield to_frame(rows, dtypes, datetime_columns)
+
+
+def fetch_frames(table, key="id", page_size=DEFAULT_FRAME_PAGE_SIZE, select="*", filters=None,
+                 after=None, dtypes: dict = None, datetime_columns=(), stats: SyncStats = None):
+    """
+    Yield a Supabase table as typed DataFrames, one CSV page at a time, ordered by key.
+
+    Args:
+        table (SupabaseTable): Table to read
+        key (str): Unique, sortable column used for keyset pagination
+        page_size (int): Rows per request
+        select (str): PostgREST select expression
+        filters (dict, optional): Extra PostgREST filters, e.g. {'status': 'eq.active'}
+        after (optional): Only rows with key > after
+        dtypes (dict, optional): Column dtypes for the CSV reader
+        datetime_columns (iterable, optional): Columns parsed as datetimes
+        stats (SyncStats, optional): Counters to update
+
+    Raises:
+        DeadlineExceeded: The invocation's deadline passed between pages
+    """
+    deadline = get_current_deadline()
+    headers = {**table.headers, "Accept": "text/csv"}
+    last_key = after
+    while True:
+        deadline.check()
+        params = {
+            "select": select,
+            "order": f"{key}.asc",
+            "limit": str(page_size),
+            **(filters or {}),
+        }
+        if last_key is not None:
+            params[key] = f"gt.{last_key}"
+
+        response = table.session.get(table.url, params=params, headers=headers, timeout=table.timeout)
+        response.raise_for_status()
+        frame = read_csv_frame(response.content, dtypes, datetime_columns)
+
+        if stats is not None:
+            stats.pages += 1
+            stats.bytes_read += len(response.content)
+            stats.rows_read += len(frame)
+
+        if frame.empty:
+            return
+        yield frame
+        if len(frame) < page_size:
+            return
+        last_key = frame[key].iloc[-1]
+
+
+def frame_nbytes(frame) -> int:
+    """Memory held by a frame, including the string payload of object columns"""
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+class SpillBuffer:
+    """
+    Collects DataFrames within a memory budget, spilling them to /tmp beyond it.
+
+    Args:
+        memory_budget_mb (float, optional): Defaults to DATAFRAME_MEMORY_BUDGET_MB
+        spill_dir (str, optional): Parent directory for the spill files
+        spill_format (str, optional): 'feather', 'parquet' or 'pickle'
+    """
+
+    def __init__(self, memory_budget_mb: float = None, spill_dir: str = None, spill_format: str = None):
+        self.budget_bytes = int((memory_budget_mb or MEMORY_BUDGET_MB) * 1024 * 1024)
+        self.spill_format = spill_format or _spill_format()
+        self._spill_root = spill_dir or SPILL_DIR
+        self._spill_dir = None
+        self._frames = []
+        self._nbytes = 0
+        self.spilled_files = []
+        self.spilled_bytes = 0
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    @property
+    def in_memory_bytes(self) -> int:
+        return self._nbytes
+
+    def add(self, frame):
+        """Buffer a frame, spilling the buffer when it goes over budget"""
+        if frame.empty:
+            return
+        self._frames.append(frame)
+        self._nbytes += frame_nbytes(frame)
+        self.rows += len(frame)
+        if self._nbytes > self.budget_bytes:
+            self.spill()
+
+    def spill(self):
+        """Write the buffered frames to one spill file and release them"""
+        if not self._frames:
+            return
+        if self._spill_dir is None:
+            os.makedirs(self._spill_root, exist_ok=True)
+            self._spill_dir = tempfile.mkdtemp(prefix="spill-", dir=self._spill_root)
+
+        frame = pd.concat(self._frames, ignore_index=True)
+        path = os.path.join(self._spill_dir, f"{len(self.spilled_files):05d}.{self.spill_format}")
+        if self.spill_format == "parquet":
+            frame.to_parquet(path, index=False)
+        elif self.spill_format == "feather":
+            frame.to_feather(path)
+        else:
+            frame.to_pickle(path)
+
+        self.spilled_files.append(path)
+        self.spilled_bytes += os.path.getsize(path)
+        logger.debug(f"Spilled {len(frame)} rows ({self._nbytes} bytes in memory) to {path}")
+        self._frames = []
+        self._nbytes = 0
+
+    def _read(self, path):
+        if self.spill_format == "parquet":
+            return pd.read_parquet(path)
+        if self.spill_format == "feather":
+            return pd.read_feather(path)
+        return pd.read_pickle(path)
+
+    def iter_frames(self):
+        """Yield each spilled file, then the in-memory frames as one frame"""
+        for path in self.spilled_files:
+            yield self._read(path)
+        if self._frames:
+            yield pd.concat(self._frames, ignore_index=True)
+
+    def cleanup(self):
+        """Delete the spill files"""
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        self.spilled_files = []
+        self._frames = []
+        self._nbytes = 0
+
+
+class GroupedAggregation:
+    """
+    Incremental, vectorized group-by aggregation over DataFrame chunks.
+
+    Incoming frames are coalesced into chunks of about `chunk_rows` rows
+    before being grouped: one groupby over 50,000 rows costs about the same
+    as one over 1,000.
+
+    Args:
+        by (list): Group-by columns
+        metrics (dict): {column: [aggregation, ...]}, aggregations being
+                        'sum', 'count', 'min', 'max' or 'mean'
+        memory_budget_mb (float, optional): Budget for the buffered partial aggregates
+        chunk_rows (int, optional): Rows aggregated per groupby, defaults to DATAFRAME_CHUNK_ROWS
+    """
+
+    def __init__(self, by, metrics: dict, memory_budget_mb: float = None, chunk_rows: int = None):
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.metrics = {col: list(aggs) for col, aggs in metrics.items()}
+        for col, aggs in self.metrics.items():
+            unsupported = [agg for agg in aggs if agg not in SUPPORTED_AGGREGATIONS]
+            if unsupported:
+                raise ValueError(f"Unsupported aggregation(s) for {col}: {', '.join(unsupported)}")
+
+        # Partial columns needed to produce the requested aggregations
+        self._partials = {}
+        for col, aggs in self.metrics.items():
+            needed = set(aggs) - {"mean"}
+            if "mean" in aggs:
+                needed |= {"sum", "count"}
+            for agg in sorted(needed):
+                self._partials[f"{col}__{agg}"] = (col, agg)
+
+        self._buffer = SpillBuffer(memory_budget_mb)
+        self.chunk_rows = chunk_rows or CHUNK_ROWS
+        self._pending = []
+        self._pending_rows = 0
+        self.chunks = 0
+
+    def update(self, frame):
+        """Add a frame; aggregates once enough rows are pending"""
+        if frame.empty:
+            return
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+        if self._pending_rows >= self.chunk_rows:
+            self._aggregate_pending()
+
+    def _aggregate_pending(self):
+        """Aggregate the pending frames and buffer their per-group partials"""
+        if not self._pending:
+            return
+        frame = self._pending[0] if len(self._pending) == 1 else pd.concat(self._pending, ignore_index=True)
+        self._pending = []
+        self._pending_rows = 0
+        partial = frame.groupby(self.by, observed=True, sort=False, dropna=False).agg(
+            **{name: pd.NamedAgg(column=col, aggfunc=agg) for name, (col, agg) in self._partials.items()}
+        ).reset_index()
+        self.chunks += 1
+        self._buffer.add(partial)
+
+    def _combine(self, frame):
+        """Merge partial aggregates that share a group"""
+        return frame.groupby(self.by, observed=True, sort=False, dropna=False).agg(
+            **{name: pd.NamedAgg(column=name, aggfunc=PARTIAL_AGGREGATIONS[agg])
+               for name, (_, agg) in self._partials.items()}
+        ).reset_index()
+
+    def result(self):
+        """
+        Returns:
+            pandas.DataFrame: One row per group, columns '<column>_<aggregation>'
+        """
+        self._aggregate_pending()
+        try:
+            combined = None
+            # One partial frame at a time, folded into the running per-group totals
+            for frame in self._buffer.iter_frames():
+                if combined is not None:
+                    frame = pd.concat([combined, frame], ignore_index=True)
+                combined = self._combine(frame)
+        finally:
+            self._buffer.cleanup()
+
+        output_columns = [f"{col}_{agg}" for col, aggs in self.metrics.items() for agg in aggs]
+        if combined is None:
+            return pd.DataFrame(columns=self.by + output_columns)
+
+        output = combined[self.by].copy()
+        for col, aggs in self.metrics.items():
+            for agg in aggs:
+                if agg == "mean":
+                    output[f"{col}_mean"] = combined[f"{col}__sum"] / combined[f"{col}__count"]
+                else:
+                    output[f"{col}_{agg}"] = combined[f"{col}__{agg}"]
+        return output.sort_values(self.by, ignore_index=True)
+
+    @property
+    def spilled_files(self) -> int:
+        return len(self._buffer.spilled_files)
+
+
+def aggregate_frames(frames, by, metrics: dict, memory_budget_mb: float = None):
+    """
+    Grouped aggregation over a stream of DataFrames.
+
+    Args:
+        frames (iterable): DataFrame chunks, e.g. from fetch_frames()
+        by (list): Group-by columns
+        metrics (dict): {column: [aggregation, ...]}
+        memory_budget_mb (float, optional): Budget before partials spill to /tmp
+
+    Returns:
+        pandas.DataFrame: One row per group
+    """
+    aggregation = GroupedAggregation(by, metrics, memory_budget_mb)
+    for frame in frames:
+        aggregation.update(frame)
+    spilled = aggregation.spilled_files
+    result = aggregation.result()
+    logger.info(
+        f"Aggregated {aggregation.chunks} chunks into {len(result)} groups"
+        + (f" ({spilled} spill files)" if spilled else "")
+    )
+    return result
+
+
+def aggregate_pages(pages, by, metrics: dict, dtypes: dict = None, datetime_columns=(),
+                    memory_budget_mb: float = None):
+    """
+    Grouped aggregation over a stream of row-dict pages.
+
+    Args:
+        pages (iterable): Pages of row dicts
+        by (list): Group-by columns
+        metrics (dict): {column: [aggregation, ...]}
+        dtypes (dict, optional): Column dtypes applied to each chunk
+        datetime_columns (iterable, optional): Columns parsed as datetimes
+        memory_budget_mb (float, optional): Budget before partials spill to /tmp
+
+    Returns:
+        pandas.DataFrame: One row per group
+    """
+    return aggregate_frames(iter_frames(pages, dtypes, datetime_columns), by, metrics, memory_budget_mb)
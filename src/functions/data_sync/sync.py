@@ -1,38 +1,129 @@
 """
 Data synchronization functionality for the WFG Client project.
 """
+import asyncio
 import logging
-import src.utils.secrets_manager as SM
+import os
+from src.utils.config import get_config
+from src.utils.async_runtime import gather_bounded
+from src.functions.data_sync.sync_engine import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE, SYNC_MODE_FULL, SYNC_MODE_HASH, SYNC_MODE_WATERMARK,
+    SupabaseTable, run_incremental_sync
+)
+from src.functions.data_sync.sync_state import get_row_hash_index, get_state_store
 
 # Get logger instance
 logger = logging.getLogger('WFGClients')
 
-def sync_data(event=None, context=None):
+# Tables synced at the same time
+TABLE_CONCURRENCY = int(os.environ.get('SYNC_TABLE_CONCURRENCY', '4'))
+
+
+def __get_sync_tables(event):
+    """
+    Tables to sync, from the event's "tables" or the SYNC_TABLES config key.
+    Each entry: {"source": "...", "target": "...", "key": "id",
+                 "pageSize": 1000, "chunkSize": 500, "filters": {...},
+                 "mode": "watermark" | "hash" | "full", "watermarkColumn": "updated_at"}
+    "mode" defaults to "watermark" when a watermarkColumn is given, "full" otherwise.
+    """
+    return (event or {}).get("tables") or get_config().SYNC_TABLES
+
+
+def __get_sync_name(table):
+    """Name of a source -> target sync, shared by its sync state and its result"""
+    return f"{table['source']}->{table.get('target', table['source'])}"
+
+
+def __sync_table(table, source_url, source_key, target_url, target_key, full_resync=False):
+    """
+    Sync what changed in one configured table since its last run, resuming
+    an unfinished run from its cursor
     """
-    Synchronizes data between systems
-    
+    target_table = table.get("target", table["source"])
+    source = SupabaseTable(source_url, table["source"], source_key)
+    target = SupabaseTable(target_url, target_table, target_key)
+    mode = table.get("mode") or (SYNC_MODE_WATERMARK if table.get("watermarkColumn") else SYNC_MODE_FULL)
+
+    state_name = __get_sync_name(table)
+    state_store = get_state_store()
+    hash_index = get_row_hash_index(state_name) if mode == SYNC_MODE_HASH else None
+    if full_resync:
+        logger.info(f"Full resync of {state_name} requested, dropping its sync state")
+        state_store.delete(state_name)
+        if hash_index is not None:
+            hash_index.clear()
+
+    try:
+        stats, state = run_incremental_sync(
+            source,
+            target,
+            state_store,
+            state_name,
+            mode=mode,
+            key=table.get("key", "id"),
+            watermark_column=table.get("watermarkColumn"),
+            hash_index=hash_index,
+            page_size=table.get("pageSize", DEFAULT_PAGE_SIZE),
+            chunk_size=table.get("chunkSize", DEFAULT_CHUNK_SIZE),
+            filters=table.get("filters"),
+        )
+    finally:
+        if hash_index is not None:
+            hash_index.close()
+    return {
+        **stats.to_dict(),
+        "mode": mode,
+        "watermark": state.get("watermark"),
+        "resumed": state["lastRun"]["resumed"],
+    }
+
+
+async def sync_data(event=None, context=None):
+    """
+    Synchronizes data between systems. Tables are synced concurrently,
+    at most SYNC_TABLE_CONCURRENCY at a time, and only their changes since the
+    last run are written. An event with "fullResync": true starts over.
+
     Args:
         event: AWS Lambda event object
         context: AWS Lambda context object
-        
+
     Returns:
         dict: Result of the data sync operation
     """
-    # Get Supabase URL from Secrets Manager
-    supabase_url = SM.get_secret_value('SUPABASE_URL', 'Not configured')
+    config = get_config()
+    supabase_url = config.get('SUPABASE_URL', 'Not configured')
+    supabase_key = config.SUPABASE_KEY
     logger.info(f"Starting data sync with Supabase: {supabase_url}")
-    
-    # Here you would implement the actual data sync logic
-    # For example, connecting to Supabase and syncing data
-    
+
+    # Source defaults to the same Supabase project
+    source_url = config.get('SYNC_SOURCE_URL', supabase_url)
+    source_key = config.get('SYNC_SOURCE_KEY', supabase_key)
+
+    tables = __get_sync_tables(event)
+    if not tables:
+        logger.info("No sync tables configured, nothing to do")
+
+    # Each table's sync is blocking HTTP, so it runs on a worker thread
+    full_resync = bool((event or {}).get("fullResync"))
+    all_results = await gather_bounded(
+        [
+            asyncio.to_thread(
+                __sync_table, table, source_url, source_key, supabase_url, supabase_key, full_resync
+            )
+            for table in tables
+        ],
+        limit=TABLE_CONCURRENCY,
+    )
+    # Keyed like the sync state, so one source synced to two targets keeps both results
+    results = {__get_sync_name(table): result for table, result in zip(tables, all_results)}
+
     logger.info("Data sync completed")
-    
-    # Log execution success
-    logger.info("Execution Successful: sync_data()")
-    logger.info(f"TotalExecDuration: {1} ms")
-    
+
     return {
         "status": "success",
         "message": "Data sync completed successfully",
-        "records_processed": 0  # Replace with actual count
+        "records_processed": sum(r["rows_written"] for r in results.values()),
+        "tables": results
     }
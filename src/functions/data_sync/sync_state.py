@@ -0,0 +1,343 @@
+"""
+Persisted state for incremental syncs.
+
+Two kinds of state are kept:
+
+  - Per table sync state (a small JSON document): the high-water mark of the
+    last completed run and the resume cursor of an unfinished one. Stored in a
+    SyncStateStore backend:
+
+        memory     Per container, for tests
+        sqlite     A SQLite file under SYNC_STATE_DIR
+        dynamodb   A DynamoDB table (SYNC_STATE_TABLE), shared by every container.
+                   SYNC_STATE_DYNAMODB_ENDPOINT points it at DynamoDB Local
+
+  - Per row content hashes for sources without a timestamp/sequence column,
+    see get_row_hash_index(). With the dynamodb backend they are kept in a
+    DynamoDB table (SYNC_ROW_HASH_TABLE) next to the sync state, so a run in
+    a fresh container only writes the rows that changed. Otherwise they are a
+    SQLite file per table under SYNC_STATE_DIR. Every row counts as changed
+    only on a table's first run, or after a full resync clears its hashes.
+
+Configuration (environment variables):
+    SYNC_STATE_BACKEND            memory | sqlite | dynamodb (default: dynamodb when
+                                  SYNC_STATE_TABLE is set, otherwise sqlite)
+    SYNC_STATE_TABLE              DynamoDB table name
+    SYNC_ROW_HASH_TABLE           DynamoDB table of row hashes, partition key "sync" and
+                                  sort key "key", required for hash mode with dynamodb
+    SYNC_STATE_DYNAMODB_ENDPOINT  DynamoDB endpoint override, e.g. http://localhost:8000
+    SYNC_STATE_DIR                Directory for the SQLite files (default /tmp/sync-state)
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from src.utils.lazy_import import lazy_import
+from src.utils.secrets_manager import DEFAULT_REGION
+
+# Only imported when the DynamoDB backend is used
+boto3 = lazy_import("boto3")
+
+logger = logging.getLogger('WFGClients')
+
+BACKEND = os.environ.get('SYNC_STATE_BACKEND', '').lower()
+TABLE_NAME = os.environ.get('SYNC_STATE_TABLE')
+ROW_HASH_TABLE_NAME = os.environ.get('SYNC_ROW_HASH_TABLE')
+DYNAMODB_ENDPOINT = os.environ.get('SYNC_STATE_DYNAMODB_ENDPOINT')
+STATE_DIR = os.environ.get('SYNC_STATE_DIR', '/tmp/sync-state')
+
+# Bytes of the sha256 digest kept per row
+DIGEST_BYTES = 16
+
+# DynamoDB batch limits
+BATCH_GET_SIZE = 100
+BATCH_WRITE_SIZE = 25
+# Passes over a batch's unprocessed items before giving up
+MAX_BATCH_ATTEMPTS = 8
+
+
+def row_digest(row: dict) -> bytes:
+    """Order independent content hash of a row"""
+    canonical = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).digest()[:DIGEST_BYTES]
+
+
+def _dynamodb_client(endpoint_url=None, region_name=None):
+    return boto3.session.Session().client(
+        "dynamodb",
+        endpoint_url=endpoint_url,
+        region_name=region_name or os.environ.get("AWS_REGION") or DEFAULT_REGION,
+    )
+
+
+class MemoryStateStore:
+    """Dict backed state, local to the container"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            state = self._states.get(name)
+            return dict(state) if state is not None else None
+
+    def put(self, name, state):
+        with self._lock:
+            self._states[name] = dict(state)
+
+    def delete(self, name):
+        with self._lock:
+            self._states.pop(name, None)
+
+
+class SQLiteStateStore:
+    """State documents in a SQLite file"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(STATE_DIR, "state.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute("CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return conn
+
+    def get(self, name):
+        row = self._connect().execute("SELECT state FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, name, state):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO sync_state (name, state) VALUES (?, ?)", (name, json.dumps(state, default=str))
+        )
+
+    def delete(self, name):
+        self._connect().execute("DELETE FROM sync_state WHERE name = ?", (name,))
+
+
+class DynamoDBStateStore:
+    """State documents in a DynamoDB table with a string partition key "id" """
+
+    def __init__(self, table_name=TABLE_NAME, endpoint_url=DYNAMODB_ENDPOINT, region_name=None):
+        if not table_name:
+            raise ValueError("DynamoDB sync state backend requires SYNC_STATE_TABLE")
+        self.table_name = table_name
+        self.client = _dynamodb_client(endpoint_url, region_name)
+
+    def get(self, name):
+        item = self.client.get_item(
+            TableName=self.table_name, Key={"id": {"S": name}}, ConsistentRead=True
+        ).get("Item")
+        return json.loads(item["state"]["S"]) if item else None
+
+    def put(self, name, state):
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={"id": {"S": name}, "state": {"S": json.dumps(state, default=str)}},
+        )
+
+    def delete(self, name):
+        self.client.delete_item(TableName=self.table_name, Key={"id": {"S": name}})
+
+
+class RowHashIndex:
+    """
+    Content hash of every synced row of one table, keyed by the row key, in a
+    SQLite file local to the container.
+
+    Args:
+        name (str): Sync name, used for the file name
+        directory (str, optional): Defaults to SYNC_STATE_DIR
+    """
+
+    def __init__(self, name, directory=None):
+        directory = directory or STATE_DIR
+        os.makedirs(directory, exist_ok=True)
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        self.path = os.path.join(directory, f"hashes-{safe_name}.sqlite3")
+        self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS row_hashes (key TEXT PRIMARY KEY, digest BLOB NOT NULL)")
+        self._lock = threading.Lock()
+
+    digest = staticmethod(row_digest)
+
+    def get_many(self, keys):
+        """{str(key): digest} for the keys present in the index"""
+        keys = [str(key) for key in keys]
+        found = {}
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in slices
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self._conn.execute(
+                    f"SELECT key, digest FROM row_hashes WHERE key IN ({placeholders})", batch
+                ).fetchall())
+        return found
+
+    def put_many(self, digests: dict):
+        """Store {key: digest} pairs"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO row_hashes (key, digest) VALUES (?, ?)",
+                ((str(key), digest) for key, digest in digests.items()),
+            )
+            self._conn.execute("COMMIT")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM row_hashes").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM row_hashes")
+
+    def close(self):
+        self._conn.close()
+
+
+class DynamoDBRowHashIndex:
+    """
+    Content hash of every synced row of one table in a DynamoDB table shared
+    by every container, one item per row: partition key "sync" (the sync
+    name), sort key "key" (the row key) and the binary "digest".
+
+    Args:
+        name (str): Sync name
+        table_name (str, optional): Defaults to SYNC_ROW_HASH_TABLE
+        endpoint_url (str, optional): Defaults to SYNC_STATE_DYNAMODB_ENDPOINT
+    """
+
+    def __init__(self, name, table_name=ROW_HASH_TABLE_NAME, endpoint_url=DYNAMODB_ENDPOINT, region_name=None):
+        if not table_name:
+            raise ValueError("Hash sync with the dynamodb backend requires SYNC_ROW_HASH_TABLE")
+        self.name = name
+        self.table_name = table_name
+        self.client = _dynamodb_client(endpoint_url, region_name)
+
+    digest = staticmethod(row_digest)
+
+    def _item_key(self, key):
+        return {"sync": {"S": self.name}, "key": {"S": str(key)}}
+
+    def get_many(self, keys):
+        """{str(key): digest} for the keys present in the index"""
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        found = {}
+        for start in range(0, len(keys), BATCH_GET_SIZE):
+            request = {
+                self.table_name: {
+                    "Keys": [self._item_key(key) for key in keys[start:start + BATCH_GET_SIZE]],
+                    "ProjectionExpression": "#key, digest",
+                    "ExpressionAttributeNames": {"#key": "key"},
+                    "ConsistentRead": True,
+                }
+            }
+            for attempt in range(MAX_BATCH_ATTEMPTS):
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    found[item["key"]["S"]] = bytes(item["digest"]["B"])
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+            else:
+                raise RuntimeError(f"Row hash lookup for {self.name} throttled, retry the sync")
+        return found
+
+    def put_many(self, digests: dict):
+        """Store {key: digest} pairs"""
+        self._write_batches([
+            {"PutRequest": {"Item": {**self._item_key(key), "digest": {"B": digest}}}}
+            for key, digest in digests.items()
+        ])
+
+    def _write_batches(self, requests):
+        for start in range(0, len(requests), BATCH_WRITE_SIZE):
+            pending = {self.table_name: requests[start:start + BATCH_WRITE_SIZE]}
+            for attempt in range(MAX_BATCH_ATTEMPTS):
+                pending = self.client.batch_write_item(RequestItems=pending).get("UnprocessedItems")
+                if not pending:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+            else:
+                raise RuntimeError(f"Row hash write for {self.name} throttled, retry the sync")
+
+    def _query_keys(self, select_count=False):
+        paginator = self.client.get_paginator("query")
+        params = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "#sync = :sync",
+            "ExpressionAttributeNames": {"#sync": "sync"},
+            "ExpressionAttributeValues": {":sync": {"S": self.name}},
+        }
+        if select_count:
+            params["Select"] = "COUNT"
+        else:
+            params["ProjectionExpression"] = "#sync, #key"
+            params["ExpressionAttributeNames"]["#key"] = "key"
+        return paginator.paginate(**params)
+
+    def __len__(self):
+        return sum(page["Count"] for page in self._query_keys(select_count=True))
+
+    def clear(self):
+        for page in self._query_keys():
+            self._write_batches([{"DeleteRequest": {"Key": item}} for item in page["Items"]])
+
+    def close(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_store():
+    backend = BACKEND or ("dynamodb" if TABLE_NAME else "sqlite")
+    if backend == "memory":
+        return MemoryStateStore()
+    if backend == "sqlite":
+        return SQLiteStateStore()
+    if backend == "dynamodb":
+        return DynamoDBStateStore(TABLE_NAME, DYNAMODB_ENDPOINT)
+    raise ValueError(f"Unknown SYNC_STATE_BACKEND: {backend}")
+
+
+def get_row_hash_index(name):
+    """
+    Row hash index of a sync, kept where its sync state is: in DynamoDB with
+    the dynamodb backend, otherwise in a SQLite file
+
+    Args:
+        name (str): Sync name
+
+    Returns:
+        RowHashIndex or DynamoDBRowHashIndex
+    """
+    backend = BACKEND or ("dynamodb" if TABLE_NAME else "sqlite")
+    if backend == "dynamodb":
+        return DynamoDBRowHashIndex(name)
+    return RowHashIndex(name)
+
+
+def get_state_store():
+    """The container-wide sync state store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+                logger.info(f"Sync state stored in {type(_store).__name__}")
+    return _store
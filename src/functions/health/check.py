@@ -2,7 +2,7 @@
 Health check functionality for the WFG Client project.
 """
 import logging
-import src.utils.secrets_manager as SM
+from src.utils.config import get_config
 
 # Get logger instance
 logger = logging.getLogger('WFGClients')
@@ -19,13 +19,9 @@ def check_health(event=None, context=None):
     Returns:
         dict: Health status information
     """
-    supabase_url = SM.get_secret_value('SUPABASE_URL', 'Not configured')
+    supabase_url = get_config().get('SUPABASE_URL', 'Not configured')
     logger.info(f"Health check requested, Supabase URL: {supabase_url}")
     
-    # Log execution success
-    logger.info("Execution Successful: check_health()")
-    logger.info(f"TotalExecDuration: {0} ms")
-    
     return {
         "status": "healthy",
         "supabase_connection": supabase_url,
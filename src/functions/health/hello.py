@@ -3,7 +3,7 @@ Hello world functionality for the WFG Client project.
 """
 
 import logging
-import src.utils.secrets_manager as SM
+from src.utils.config import get_config
 
 # Get logger instance
 logger = logging.getLogger('WFGClients')
@@ -20,13 +20,9 @@ def say_hello(event=None, context=None):
     Returns:
         dict: Greeting message and connection information
     """
-    supabase_url = SM.get_secret_value('SUPABASE_URL', 'Not configured')
+    supabase_url = get_config().get('SUPABASE_URL', 'Not configured')
     logger.info(f"Hello request received, Supabase URL: {supabase_url}")
     
-    # Log execution success
-    logger.info("Execution Successful: say_hello()")
-    logger.info(f"TotalExecDuration: {0} ms")
-    
     return {
         "message": "Hello from Lambda!",
         "supabase_url": supabase_url
@@ -0,0 +1,195 @@
+"""
+Persistent asyncio event loop for coroutine controllers.
+
+The loop runs on a daemon thread, is created on first use and is reused by
+every later invocation of the container, so async handlers don't pay for
+asyncio.run()'s loop set-up and tear-down on each call. Coroutines are started
+in a copy of the caller's context, so the log context, invocation deadline and
+metrics buffer are visible inside them (and inside asyncio.to_thread calls):
+
+    async def get_dashboard(event=None, context=None):
+        users, orders = await gather_bounded(
+            [asyncio.to_thread(users_table.fetch), asyncio.to_thread(orders_table.fetch)],
+            limit=4,
+        )
+        ...
+
+    response = run_coroutine(get_dashboard(event, context))
+
+Blocking calls (requests sessions, boto3) are run with asyncio.to_thread, on
+the loop's default executor.
+
+Configuration (environment variables):
+    ASYNC_CONCURRENCY       Default fan-out limit of gather_bounded() (default 8)
+    ASYNC_BLOCKING_WORKERS  Threads for asyncio.to_thread / run_in_executor (default 8)
+"""
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from src.utils.deadline import Deadline, DeadlineExceeded, get_current_deadline
+
+DEFAULT_CONCURRENCY = int(os.environ.get('ASYNC_CONCURRENCY', '8'))
+BLOCKING_WORKERS = int(os.environ.get('ASYNC_BLOCKING_WORKERS', '8'))
+
+# Created on first use and reused across warm invocations
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """The container's event loop, started on first use"""
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(
+                    ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="async-io")
+                )
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                _loop_thread = threading.Thread(target=run, name="async-runtime", daemon=True)
+                _loop_thread.start()
+                ready.wait()
+                _loop = loop
+    return _loop
+
+
+def is_coroutine_function(func) -> bool:
+    """True for `async def` functions, including functools.partial wrappers of them"""
+    return inspect.iscoroutinefunction(func) or \
+        inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+def _submit(coro, context: contextvars.Context) -> Future:
+    """Start `coro` as a task on the loop, in `context`, and mirror it into a concurrent Future"""
+    loop = get_event_loop()
+    future = Future()
+
+    def start():
+        if not future.set_running_or_notify_cancel():
+            coro.close()
+            return
+        # Tasks copy the context that's current when they're created
+        task = context.run(loop.create_task, coro)
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        task.add_done_callback(done)
+        future.add_done_callback(
+            lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel)
+        )
+
+    loop.call_soon_threadsafe(start)
+    return future
+
+
+def run_coroutine(coro, deadline: Deadline = None):
+    """
+    Run a coroutine on the container's loop and wait for its result.
+
+    Unlike a worker thread, the coroutine really is cancelled when the
+    deadline passes: CancelledError is raised at its current await.
+
+    Args:
+        coro: Coroutine object
+        deadline (Deadline, optional): Defaults to the invocation's deadline
+
+    Returns:
+        The coroutine's result
+
+    Raises:
+        DeadlineExceeded: The deadline passed before the coroutine finished
+    """
+    if _loop_thread is not None and threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_coroutine() called from the event loop; await the coroutine instead")
+
+    deadline = deadline or get_current_deadline()
+    try:
+        deadline.check()
+    except DeadlineExceeded:
+        coro.close()
+        raise
+
+    future = _submit(coro, contextvars.copy_context())
+    try:
+        return future.result(timeout=deadline.remaining())
+    except DeadlineExceeded:
+        # Raised by the coroutine itself (it's also a TimeoutError)
+        raise
+    except FutureTimeoutError:
+        future.cancel()
+        deadline.cancel()
+        raise DeadlineExceeded(f"Coroutine exceeded its {deadline.timeout_secs}s deadline")
+
+
+def call_handler(func, *args, deadline: Deadline = None):
+    """
+    Call a controller that may be synchronous or a coroutine function.
+
+    Returns:
+        The controller's result
+    """
+    if is_coroutine_function(func):
+        return run_coroutine(func(*args), deadline)
+    return func(*args)
+
+
+async def gather_bounded(aws, limit: int = None, deadline: Deadline = None, return_exceptions=False):
+    """
+    Await awaitables concurrently, at most `limit` at a time, within the deadline.
+
+    Args:
+        aws (iterable): Coroutines / awaitables, e.g. asyncio.to_thread(...) calls
+        limit (int, optional): Maximum in flight, defaults to ASYNC_CONCURRENCY
+        deadline (Deadline, optional): Defaults to the invocation's deadline
+        return_exceptions (bool): As for asyncio.gather
+
+    Returns:
+        list: Results in the order of `aws`
+
+    Raises:
+        DeadlineExceeded: The deadline passed first; unfinished awaitables are cancelled
+    """
+    aws = list(aws)
+    deadline = deadline or get_current_deadline()
+    semaphore = asyncio.Semaphore(limit or DEFAULT_CONCURRENCY)
+
+    async def bounded(aw):
+        started = False
+        try:
+            async with semaphore:
+                deadline.check()
+                started = True
+                return await aw
+        finally:
+            # Coroutines cancelled while queued were never awaited; close them quietly
+            if not started and inspect.iscoroutine(aw):
+                aw.close()
+
+    gathered = asyncio.gather(*(bounded(aw) for aw in aws), return_exceptions=return_exceptions)
+    try:
+        return await asyncio.wait_for(gathered, timeout=deadline.remaining())
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        deadline.cancel()
+        raise DeadlineExceeded(f"Fan-out of {len(aws)} calls exceeded its deadline")
@@ -0,0 +1,135 @@
+"""
+HTTP response compression for API Gateway proxy responses.
+
+The encoding is negotiated from the request's Accept-Encoding header. Bodies
+below the size threshold are left alone since compressing them costs more
+CPU than it saves on the wire. Compressed bodies are base64 encoded and flagged
+with isBase64Encoded, which API Gateway decodes back to binary as long as the
+API has binary media types enabled (see BinaryMediaTypes in template.yaml).
+
+Configuration (environment variables):
+    COMPRESSION_MIN_BYTES   Minimum body size to compress (default 1024)
+    COMPRESSION_LEVEL       zlib level for gzip/deflate, 1-9 (default 6)
+    COMPRESSION_BR_QUALITY  Brotli quality, 0-11 (default 4)
+"""
+import base64
+import os
+import zlib
+
+from src.utils.lazy_import import is_available, lazy_import
+
+MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+BR_QUALITY = int(os.environ.get('COMPRESSION_BR_QUALITY', '4'))
+
+brotli = lazy_import("brotli")
+
+
+def _gzip(data: bytes) -> bytes:
+    # wbits 31 = gzip container
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _deflate(data: bytes) -> bytes:
+    # HTTP 'deflate' is the zlib container
+    return zlib.compress(data, LEVEL)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=BR_QUALITY)
+
+
+# Server preference order, best ratio first
+ENCODERS = {}
+if is_available("brotli"):
+    ENCODERS["br"] = _brotli
+ENCODERS["gzip"] = _gzip
+ENCODERS["deflate"] = _deflate
+
+
+def negotiate_encoding(accept_encoding: str):
+    """
+    Pick the content encoding to use for an Accept-Encoding header value.
+
+    Args:
+        accept_encoding (str): e.g. 'gzip, deflate;q=0.5, br;q=0'
+
+    Returns:
+        str | None: 'br', 'gzip', 'deflate' or None when nothing acceptable
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, wildcard)
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _get_header(headers: dict, name: str):
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return key, value
+    return None, None
+
+
+def compress_response(response: dict, accept_encoding: str, min_bytes: int = None):
+    """
+    Compress an API Gateway proxy response body in place, if worthwhile.
+
+    Args:
+        response (dict): Proxy response with a str/bytes 'body' and 'headers'
+        accept_encoding (str): The request's Accept-Encoding header value
+        min_bytes (int, optional): Size threshold, defaults to COMPRESSION_MIN_BYTES
+
+    Returns:
+        dict: The same response dict
+    """
+    headers = response.setdefault("headers", {})
+
+    # Responses vary by Accept-Encoding whether or not this one gets compressed
+    vary_key, vary = _get_header(headers, "Vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers[vary_key] = f"{vary}, Accept-Encoding"
+
+    body = response.get("body")
+    if not body or response.get("isBase64Encoded") or _get_header(headers, "Content-Encoding")[1]:
+        return response
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if len(data) < (MIN_BYTES if min_bytes is None else min_bytes):
+        return response
+
+    compressed = ENCODERS[encoding](data)
+    if len(compressed) >= len(data):
+        return response
+
+    response["body"] = base64.b64encode(compressed).decode("ascii")
+    response["isBase64Encoded"] = True
+    headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,385 @@
+"""
+Tiered configuration with an immutable, typed snapshot.
+
+Configuration keys are resolved once (at init, and again when the snapshot is
+refreshed) through ordered providers, first match wins:
+
+    1. env               Environment variables, key by key
+    2. local_file        local_secrets.json (LOCAL_SECRETS_PATH), local runs only
+    3. extension         The AWS Parameters and Secrets Lambda extension's
+                         localhost cache (or a local stand-in, see
+                         scripts/secrets_extension_stub.py)
+    4. secrets_manager   AWS Secrets Manager, every remaining secret in one
+                         BatchGetSecretValue call
+
+Secret backed providers work per secret name: once a tier has returned a
+secret, lower tiers are never asked for it, so a warm extension cache means
+Secrets Manager is not called at all.
+
+The result is a ConfigSnapshot, read with attribute access:
+
+    config = get_config()
+    config.SUPABASE_URL
+    config.SYNC_TABLES          # typed per CONFIG_KEYS, e.g. a list
+
+Reads are a plain attribute lookup on an immutable object; nothing is logged
+or fetched per call. A snapshot older than CONFIG_TTL_SECS is still served
+while a background thread builds its replacement.
+
+Configuration (environment variables):
+    CONFIG_SECRET_NAMES   Comma separated secret names to merge, first wins
+                          (default: the secrets_manager SECRETS_NAME)
+    CONFIG_TTL_SECS       Snapshot age before a background refresh (default SECRETS_TTL_SECS)
+    CONFIG_EXTENSION_URL  Base URL of the secrets extension / its local stand-in.
+                          Defaults to http://localhost:$PARAMETERS_SECRETS_EXTENSION_HTTP_PORT
+                          (2773) when running in Lambda
+    CONFIG_EXTENSION_TOKEN  Token sent to the extension (default AWS_SESSION_TOKEN)
+"""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from types import MappingProxyType
+import src.utils.secrets_manager as SM
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger('WFGClients')
+
+SECRET_NAMES = [
+    name.strip() for name in os.environ.get('CONFIG_SECRET_NAMES', SM.SECRETS_NAME).split(",") if name.strip()
+]
+CONFIG_TTL_SECS = int(os.environ.get('CONFIG_TTL_SECS', str(SM.SECRETS_TTL_SECS)))
+
+EXTENSION_PORT = os.environ.get('PARAMETERS_SECRETS_EXTENSION_HTTP_PORT', '2773')
+EXTENSION_TIMEOUT_SECS = 1.0
+
+# BatchGetSecretValue accepts at most 20 secret ids per call
+BATCH_MAX_SECRETS = 20
+
+# Known keys: (type, default). Values are coerced to the declared type, so an
+# env var SYNC_TABLES='[...]' and a secret holding a JSON list read the same.
+# Keys that aren't declared are still available, untyped.
+CONFIG_KEYS = {
+    "LOG_LEVEL": (str, "DEBUG"),
+    "SUPABASE_URL": (str, None),
+    "SUPABASE_KEY": (str, None),
+    "SYNC_SOURCE_URL": (str, None),
+    "SYNC_SOURCE_KEY": (str, None),
+    "SYNC_TABLES": (list, []),
+    "REFERENCE_DATASETS": (list, []),
+}
+
+_BOOLEAN_STRINGS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+
+def _coerce(key, value, value_type):
+    """Convert a raw (often string) value into the declared type"""
+    if value is None or isinstance(value, value_type):
+        return value
+    if value_type is bool:
+        if isinstance(value, str) and value.strip().lower() in _BOOLEAN_STRINGS:
+            return _BOOLEAN_STRINGS[value.strip().lower()]
+    elif value_type in (list, dict):
+        if isinstance(value, str):
+            text = value.strip()
+            if text.startswith(("[", "{")):
+                parsed = json.loads(text)
+                if isinstance(parsed, value_type):
+                    return parsed
+            elif value_type is list:
+                return [item.strip() for item in text.split(",") if item.strip()]
+    else:
+        try:
+            return value_type(value)
+        except (TypeError, ValueError):
+            pass
+    raise ValueError(f"Config {key}: cannot convert {type(value).__name__} to {value_type.__name__}")
+
+
+class ConfigSnapshot:
+    """
+    Immutable view of the resolved configuration.
+
+    Attributes:
+        loaded_at (float): time.monotonic() when the snapshot was built
+        sources (Mapping): Key -> name of the provider that supplied it
+    """
+    __slots__ = ("_values", "sources", "loaded_at")
+
+    def __init__(self, values: dict, sources: dict):
+        object.__setattr__(self, "_values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "sources", MappingProxyType(dict(sources)))
+        object.__setattr__(self, "loaded_at", time.monotonic())
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"Unknown config key: {name}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def as_dict(self):
+        return dict(self._values)
+
+    def age(self):
+        return time.monotonic() - self.loaded_at
+
+    def __repr__(self):
+        # Values may be credentials, so only the keys and where they came from
+        return f"ConfigSnapshot({dict(self.sources)})"
+
+
+class EnvProvider:
+    """Environment variables, looked up key by key"""
+    name = "env"
+
+    def get_keys(self, keys):
+        return {key: os.environ[key] for key in keys if key in os.environ}
+
+
+class LocalFileProvider:
+    """Secrets from local_secrets.json, only outside Lambda"""
+    name = "local_file"
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def enabled(self):
+        return SM.is_local_environment()
+
+    def get_secrets(self, secret_names):
+        path = self.path or SM.get_local_secrets_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            local_secrets = json.load(f)
+        return {name: local_secrets[name] for name in secret_names if name in local_secrets}
+
+
+class ExtensionProvider:
+    """
+    The Parameters and Secrets Lambda extension, which serves secrets from a
+    cache on localhost. It has no batch API, so it's one local call per secret.
+    """
+    name = "extension"
+
+    def __init__(self, url=None, token=None):
+        self.url = url or os.environ.get('CONFIG_EXTENSION_URL')
+        self.token = token or os.environ.get('CONFIG_EXTENSION_TOKEN') or os.environ.get('AWS_SESSION_TOKEN')
+
+    def enabled(self):
+        # In Lambda the extension listens on its default port when the layer is attached
+        if not self.url and not SM.is_local_environment():
+            self.url = f"http://localhost:{EXTENSION_PORT}"
+        return bool(self.url)
+
+    def get_secrets(self, secret_names):
+        secrets = {}
+        for name in secret_names:
+            request = urllib.request.Request(
+                f"{self.url.rstrip('/')}/secretsmanager/get?secretId={urllib.parse.quote(name)}",
+                headers={"X-Aws-Parameters-Secrets-Token": self.token or ""},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=EXTENSION_TIMEOUT_SECS) as response:
+                    payload = json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                logger.warning(f"Secrets extension returned {e.code} for {name}")
+                continue
+            except (urllib.error.URLError, OSError) as e:
+                # Layer not attached / stand-in not running: fall through to the next tier
+                logger.info(f"Secrets extension unavailable at {self.url}: {e}")
+                return secrets
+            secrets[name] = _parse_secret_string(name, payload)
+        return secrets
+
+
+class SecretsManagerProvider:
+    """AWS Secrets Manager, every requested secret in a single batch call"""
+    name = "secrets_manager"
+
+    def __init__(self, region_name=SM.DEFAULT_REGION):
+        self.region_name = region_name
+
+    def enabled(self):
+        return True
+
+    def get_secrets(self, secret_names):
+        client = SM._get_client(self.region_name)
+        logger.info(f"Fetching secrets {', '.join(secret_names)} from AWS Secrets Manager")
+        secrets = {}
+        for start in range(0, len(secret_names), BATCH_MAX_SECRETS):
+            with get_metrics().phase("SecretsFetch"):
+                response = client.batch_get_secret_value(
+                    SecretIdList=list(secret_names[start:start + BATCH_MAX_SECRETS])
+                )
+            for payload in response.get("SecretValues", []):
+                secrets[payload["Name"]] = _parse_secret_string(payload["Name"], payload)
+            for error in response.get("Errors", []):
+                logger.error(f"Error retrieving secret {error.get('SecretId')}: {error.get('Message')}")
+        return secrets
+
+
+def _parse_secret_string(name, payload):
+    """SecretString of a GetSecretValue-shaped response, as a dict"""
+    if "SecretString" not in payload:
+        raise Exception(f"Binary secrets are not supported for {name}")
+    try:
+        secret = json.loads(payload["SecretString"])
+    except json.JSONDecodeError:
+        return {"value": payload["SecretString"]}
+    return secret if isinstance(secret, dict) else {"value": secret}
+
+
+def default_providers():
+    return [EnvProvider(), LocalFileProvider(), ExtensionProvider(), SecretsManagerProvider()]
+
+
+def load_config(secret_names=None, providers=None) -> ConfigSnapshot:
+    """
+    Resolve the configuration through the providers and build a snapshot.
+
+    Args:
+        secret_names (list, optional): Secrets to merge, first wins. Defaults to SECRET_NAMES
+        providers (list, optional): Ordered providers. Defaults to default_providers()
+
+    Returns:
+        ConfigSnapshot: The resolved configuration
+
+    Raises:
+        Exception: When a secret can't be fetched from any tier
+    """
+    secret_names = list(secret_names or SECRET_NAMES)
+    providers = providers or default_providers()
+    started_at = time.perf_counter()
+
+    # Secrets first: each name is taken from the highest tier that has it
+    secrets = {}
+    secret_sources = {}
+    for provider in providers:
+        missing = [name for name in secret_names if name not in secrets]
+        if not missing:
+            break
+        if not hasattr(provider, "get_secrets") or not provider.enabled():
+            continue
+        for name, secret in provider.get_secrets(missing).items():
+            secrets[name] = secret
+            secret_sources[name] = provider.name
+
+    missing = [name for name in secret_names if name not in secrets]
+    if missing:
+        raise Exception(f"Secrets not found in any config provider: {', '.join(missing)}")
+
+    values = {}
+    sources = {}
+    for name in secret_names:
+        for key, value in secrets[name].items():
+            if key not in values:
+                values[key] = value
+                sources[key] = secret_sources[name]
+
+    # Key level providers (env) override the secrets they sit above
+    keys = set(CONFIG_KEYS) | set(values)
+    for index, provider in enumerate(providers):
+        if not hasattr(provider, "get_keys"):
+            continue
+        overridden_tiers = {p.name for p in providers[index + 1:]}
+        for key, value in provider.get_keys(keys).items():
+            if key not in sources or sources[key] in overridden_tiers:
+                values[key] = value
+                sources[key] = provider.name
+
+    for key, (value_type, default) in CONFIG_KEYS.items():
+        if values.get(key) is None:
+            values[key] = default
+            sources.setdefault(key, "default")
+        else:
+            values[key] = _coerce(key, values[key], value_type)
+
+    snapshot = ConfigSnapshot(values, sources)
+    elapsed_ms = round((time.perf_counter() - started_at) * 1000, 2)
+    logger.info(f"Config loaded in {elapsed_ms} ms from {', '.join(sorted(set(sources.values())))}")
+    return snapshot
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_refreshing = False
+
+
+def init_config(force_refresh=False) -> ConfigSnapshot:
+    """
+    Build the container's snapshot. Meant to run during the Lambda INIT phase.
+
+    Args:
+        force_refresh (bool): Rebuild even if a snapshot already exists
+
+    Returns:
+        ConfigSnapshot: The current snapshot
+    """
+    global _snapshot
+    if _snapshot is None or force_refresh:
+        with _snapshot_lock:
+            if _snapshot is None or force_refresh:
+                _snapshot = load_config()
+    return _snapshot
+
+
+def _refresh_in_background():
+    global _snapshot, _refreshing
+    try:
+        snapshot = load_config()
+        with _snapshot_lock:
+            _snapshot = snapshot
+    except Exception as e:
+        # Keep serving the previous snapshot
+        logger.warning(f"Config refresh failed, serving previous snapshot: {e}")
+    finally:
+        _refreshing = False
+
+
+def get_config() -> ConfigSnapshot:
+    """
+    The current snapshot. Past CONFIG_TTL_SECS it is still returned while a
+    background thread replaces it, so secret rotations are picked up without
+    a request ever waiting on the fetch.
+
+    Returns:
+        ConfigSnapshot: The current snapshot
+    """
+    global _refreshing
+    snapshot = _snapshot
+    if snapshot is None:
+        return init_config()
+    if CONFIG_TTL_SECS and snapshot.age() > CONFIG_TTL_SECS and not _refreshing:
+        with _snapshot_lock:
+            if _refreshing:
+                return snapshot
+            _refreshing = True
+        threading.Thread(target=_refresh_in_background, name="config-refresh", daemon=True).start()
+    return snapshot
@@ -0,0 +1,197 @@
+"""
+Invocation deadlines.
+
+A Deadline is the earlier of the route/job timeout and the Lambda's remaining
+execution time (minus a safety margin to build the response). The current
+invocation's deadline is kept in a ContextVar, so handlers and downstream
+clients can read it without it being threaded through every call:
+
+    deadline = get_current_deadline()
+    for chunk in chunks:
+        deadline.check()        # raises DeadlineExceeded once time is up
+        process(chunk)
+
+API handlers are additionally run through run_with_deadline(), which stops
+waiting for them once the deadline passes so a fast 504 can be returned instead
+of the Lambda being killed mid-flight.
+
+Configuration (environment variables):
+    DEADLINE_MARGIN_MS   Time kept back from the Lambda's remaining time (default 500)
+    ENFORCE_DEADLINES    Run handlers under run_with_deadline() (default true)
+    HANDLER_WORKERS      Worker threads for enforced handlers (default 4)
+"""
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+MARGIN_MS = int(os.environ.get('DEADLINE_MARGIN_MS', '500'))
+ENFORCE_DEADLINES = os.environ.get('ENFORCE_DEADLINES', 'true').lower() == 'true'
+HANDLER_WORKERS = int(os.environ.get('HANDLER_WORKERS', '4'))
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is attempted after the invocation's deadline"""
+
+
+class HandlerBusy(RuntimeError):
+    """Raised when every handler worker is still busy with an earlier, abandoned call"""
+
+
+class Deadline:
+    """
+    Point in (monotonic) time by which the current work has to finish,
+    plus a cooperative cancellation flag.
+
+    Args:
+        timeout_secs (float, optional): Seconds from now. None means no deadline
+    """
+    __slots__ = ("expires_at", "timeout_secs", "_cancelled")
+
+    def __init__(self, timeout_secs: float = None):
+        self.timeout_secs = timeout_secs
+        self.expires_at = time.monotonic() + timeout_secs if timeout_secs is not None else None
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def from_context(cls, context=None, timeout_in_secs: float = None, margin_ms: int = MARGIN_MS):
+        """
+        Build the deadline for an invocation.
+
+        Args:
+            context: Lambda context, for get_remaining_time_in_millis()
+            timeout_in_secs (float, optional): Route / job timeout
+            margin_ms (int, optional): Time kept back from the Lambda's remaining time
+
+        Returns:
+            Deadline: Deadline at the earlier of the two limits
+        """
+        limits = []
+        if timeout_in_secs:
+            limits.append(float(timeout_in_secs))
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining is not None:
+            limits.append(max(get_remaining() - margin_ms, 0) / 1000)
+        return cls(min(limits) if limits else None)
+
+    def limit(self, timeout_secs: float = None):
+        """Bring the deadline forward to at most `timeout_secs` from now"""
+        if timeout_secs:
+            expires_at = time.monotonic() + float(timeout_secs)
+            if self.expires_at is None or expires_at < self.expires_at:
+                self.expires_at = expires_at
+                self.timeout_secs = float(timeout_secs)
+        return self
+
+    def remaining(self):
+        """Seconds left, or None when there's no deadline. Never negative."""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cancel(self):
+        """Signal cooperative cancellation, e.g. after the caller gave up waiting"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the deadline passed or cancel() was called"""
+        return self._cancelled.is_set() or self.expired()
+
+    def check(self):
+        """Raise DeadlineExceeded if the work should stop"""
+        if self.cancelled:
+            raise DeadlineExceeded("Invocation deadline exceeded")
+
+    def cap(self, timeout: float = None):
+        """Cap a timeout (seconds) to the time remaining"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+_current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+
+def get_current_deadline() -> Deadline:
+    """Deadline of the current invocation, or one that never expires outside of one"""
+    return _current_deadline.get() or Deadline()
+
+
+def set_current_deadline(deadline: Deadline):
+    """
+    Returns:
+        contextvars.Token: Token for reset_current_deadline()
+    """
+    return _current_deadline.set(deadline)
+
+
+def reset_current_deadline(token):
+    _current_deadline.reset(token)
+
+
+# Created on first use and reused across warm invocations
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=HANDLER_WORKERS, thread_name_prefix="handler"
+                )
+    return _executor
+
+
+def run_with_deadline(func, args=(), deadline: Deadline = None):
+    """
+    Run `func(*args)` and give up waiting for it when the deadline passes.
+
+    The call runs on a worker thread in a copy of the caller's context (logging
+    context, current deadline). Python threads can't be killed, so an abandoned
+    call keeps running until it next checks its deadline; its deadline is
+    cancelled so cooperative checks and downstream calls stop promptly.
+
+    Raises:
+        DeadlineExceeded: The deadline passed before func returned
+        HandlerBusy: Every worker is still occupied by abandoned calls
+    """
+    global _in_flight
+    deadline = deadline or get_current_deadline()
+
+    if not ENFORCE_DEADLINES or deadline.expires_at is None:
+        return func(*args)
+    deadline.check()
+
+    with _in_flight_lock:
+        if _in_flight >= HANDLER_WORKERS:
+            raise HandlerBusy("No handler worker available")
+        _in_flight += 1
+
+    def run():
+        global _in_flight
+        try:
+            return func(*args)
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    future = _get_executor().submit(contextvars.copy_context().run, run)
+    try:
+        return future.result(timeout=deadline.remaining())
+    except FutureTimeoutError:
+        deadline.cancel()
+        raise DeadlineExceeded(
+            f"{getattr(func, '__name__', 'handler')}() exceeded its {deadline.timeout_secs}s deadline"
+        )
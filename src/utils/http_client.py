@@ -0,0 +1,201 @@
+"""
+Container-scoped pooled HTTP client for downstream calls.
+
+Sessions are created once per container (per name) and reused across warm
+invocations, so TCP connections and TLS sessions to Supabase and other
+downstreams are kept alive instead of being re-established on every call.
+
+Request timeouts are capped by the current invocation's deadline
+(see src.utils.deadline), so a downstream call can't outlive its route.
+
+Configuration (environment variables):
+    HTTP_POOL_CONNECTIONS   Hosts kept in the pool (default 10)
+    HTTP_POOL_MAXSIZE       Connections kept per host (default 10)
+    HTTP_MAX_RETRIES        Retries on connection errors / 502-504 for idempotent methods (default 2)
+    HTTP_TIMEOUT_SECS       Default request timeout (default 10)
+"""
+import os
+import threading
+
+from src.utils.deadline import DeadlineExceeded, get_current_deadline
+from src.utils.lazy_import import lazy_import
+from src.utils.metrics import get_metrics
+
+requests = lazy_import("requests")
+
+POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '2'))
+DEFAULT_TIMEOUT_SECS = float(os.environ.get('HTTP_TIMEOUT_SECS', '10'))
+
+# Minimum timeout handed to a request even when the deadline is nearly up
+MIN_TIMEOUT_SECS = 0.05
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class ConnectionStats:
+    """
+    Connection reuse counters for a session. A request that didn't open a
+    new connection was served from a kept-alive one.
+    """
+    __slots__ = ("requests", "new_connections", "_lock")
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def to_dict(self):
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+def get_request_timeout(timeout=None):
+    """
+    Effective timeout for a request: the explicit/default timeout, capped by
+    what's left of the invocation's deadline.
+    """
+    timeout = DEFAULT_TIMEOUT_SECS if timeout is None else timeout
+    deadline = get_current_deadline()
+    if deadline.cancelled:
+        raise DeadlineExceeded("Invocation deadline exceeded before downstream call")
+    remaining = deadline.remaining()
+    if remaining is None:
+        return timeout
+    remaining = max(remaining, MIN_TIMEOUT_SECS)
+    if isinstance(timeout, tuple):
+        # (connect, read) timeouts
+        return tuple(min(part, remaining) if part is not None else remaining for part in timeout)
+    return min(timeout, remaining)
+
+
+def _build_session(stats: ConnectionStats):
+    """Create a requests Session whose adapter pools and counts connections"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.util.retry import Retry
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        def _new_conn(self):
+            stats.count_connection()
+            return super()._new_conn()
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        def _new_conn(self):
+            stats.count_connection()
+            return super()._new_conn()
+
+    class PooledAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": CountingHTTPConnectionPool,
+                "https": CountingHTTPSConnectionPool,
+            }
+
+        def send(self, request, timeout=None, **kwargs):
+            stats.count_request()
+            metrics = get_metrics()
+            metrics.increment("DownstreamCalls")
+            with metrics.phase("Downstream"):
+                return super().send(request, timeout=get_request_timeout(timeout), **kwargs)
+
+    adapter = PooledAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=Retry(
+            total=MAX_RETRIES,
+            backoff_factor=0.1,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]),
+            raise_on_status=False,
+        ),
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.stats = stats
+    return session
+
+
+def get_session(name: str = "default"):
+    """
+    Get the container-wide session for a downstream, creating it on first use.
+
+    Args:
+        name (str): Pool name, e.g. 'supabase'. Each name gets its own pool and counters
+
+    Returns:
+        requests.Session: Pooled session with a `stats` ConnectionStats attribute
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _build_session(ConnectionStats())
+                _sessions[name] = session
+    return session
+
+
+def prime_session(name: str, url: str, timeout: float = 0.5):
+    """
+    Open a pooled connection (DNS, TCP and TLS) to a downstream ahead of its
+    first real request. Any HTTP status counts; only connection errors raise.
+
+    The HEAD goes straight to the session's connection pool, so the kept-alive
+    connection is the one later requests reuse, but without the adapter's
+    retries and backoff: an unreachable downstream fails the hook within
+    `timeout` instead of holding up the warm-up.
+
+    Args:
+        name (str): Pool name, as passed to get_session()
+        url (str): Any URL on the downstream host
+        timeout (float): Connect / read timeout in seconds
+    """
+    session = get_session(name)
+    adapter = session.get_adapter(url)
+    # Resolve proxies and CA bundle as session requests do, so this lands in their pool
+    settings = session.merge_environment_settings(url, {}, None, None, None)
+    if hasattr(adapter, "get_connection_with_tls_context"):
+        # requests >= 2.32
+        request = requests.Request("HEAD", url).prepare()
+        pool = adapter.get_connection_with_tls_context(request, settings["verify"], settings["proxies"])
+    else:
+        pool = adapter.get_connection(url, settings["proxies"])
+        adapter.cert_verify(pool, url, settings["verify"], None)
+    session.stats.count_request()
+    response = pool.urlopen("HEAD", url, retries=False, timeout=timeout, redirect=False)
+    response.drain_conn()
+    response.release_conn()
+
+
+def get_connection_stats():
+    """
+    Returns:
+        dict: Connection reuse counters per session name
+    """
+    return {name: session.stats.to_dict() for name, session in _sessions.items()}
+
+
+def close_sessions():
+    """Close every pooled session, e.g. before the container is frozen for a long time"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,429 @@
+"""
+Idempotency store for events that may be delivered more than once.
+
+EventBridge and Lambda's async retries can hand the same scheduled event to the
+function twice. Wrapping the job in IdempotencyStore.run() makes the second
+delivery return the first run's stored result instead of re-running the job:
+
+    store = get_idempotency_store()
+    outcome = store.run(key, job, event, context, lease_secs=deadline.remaining())
+    outcome.result, outcome.replayed
+
+Each key moves through a small state machine:
+
+    (absent) --claim--> IN_PROGRESS --success--> COMPLETED --ttl--> (absent)
+                             |
+                             +--failure / lease expiry--> (absent)
+
+The claim is a conditional write, so of two concurrent deliveries exactly one
+runs the job; the other gets IdempotencyInProgress. The in-progress lease
+covers the invocation's remaining time, so a crashed run doesn't block the key
+past its own timeout. Failed runs release the key, so a retry re-executes.
+
+Backends (IDEMPOTENCY_BACKEND):
+    memory     Per container. Catches retries that land on the same warm container
+    sqlite     A SQLite file (IDEMPOTENCY_SQLITE_PATH), shared by local processes
+    dynamodb   A DynamoDB table (IDEMPOTENCY_TABLE), shared by every container.
+               IDEMPOTENCY_DYNAMODB_ENDPOINT points it at DynamoDB Local for testing
+
+Configuration (environment variables):
+    IDEMPOTENCY_ENABLED            Set to false to always run jobs (default true)
+    IDEMPOTENCY_BACKEND            memory | sqlite | dynamodb (default: dynamodb when
+                                   IDEMPOTENCY_TABLE is set, otherwise memory)
+    IDEMPOTENCY_TTL_SECS           How long completed results are kept (default 86400)
+    IDEMPOTENCY_TABLE              DynamoDB table name
+    IDEMPOTENCY_DYNAMODB_ENDPOINT  DynamoDB endpoint override, e.g. http://localhost:8000
+    IDEMPOTENCY_SQLITE_PATH        SQLite file (default /tmp/idempotency.sqlite3)
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from src.utils.lazy_import import lazy_import
+from src.utils.secrets_manager import DEFAULT_REGION
+import src.utils.serializer as serializer
+
+# Only imported when the DynamoDB backend is used
+boto3 = lazy_import("boto3")
+botocore_exceptions = lazy_import("botocore.exceptions")
+
+logger = logging.getLogger('WFGClients')
+
+IDEMPOTENCY_ENABLED = os.environ.get('IDEMPOTENCY_ENABLED', 'true').lower() == 'true'
+BACKEND = os.environ.get('IDEMPOTENCY_BACKEND', '').lower()
+TTL_SECS = int(os.environ.get('IDEMPOTENCY_TTL_SECS', '86400'))
+TABLE_NAME = os.environ.get('IDEMPOTENCY_TABLE')
+DYNAMODB_ENDPOINT = os.environ.get('IDEMPOTENCY_DYNAMODB_ENDPOINT')
+SQLITE_PATH = os.environ.get('IDEMPOTENCY_SQLITE_PATH', '/tmp/idempotency.sqlite3')
+
+# Lease used when the caller doesn't know its remaining time
+DEFAULT_LEASE_SECS = 900
+
+STATUS_IN_PROGRESS = "IN_PROGRESS"
+STATUS_COMPLETED = "COMPLETED"
+
+
+class IdempotencyInProgress(Exception):
+    """Another invocation holds the key and hasn't finished yet"""
+
+    def __init__(self, key: str, lease_expires_at: float = None):
+        self.key = key
+        self.lease_expires_at = lease_expires_at
+        super().__init__(f"Idempotency key {key} is already being processed")
+
+
+class IdempotencyRecord:
+    """
+    Stored state of a key. Times are epoch seconds.
+    """
+    __slots__ = ("key", "status", "result", "expires_at", "lease_expires_at")
+
+    def __init__(self, key, status, result=None, expires_at=None, lease_expires_at=None):
+        self.key = key
+        self.status = status
+        self.result = result
+        self.expires_at = expires_at
+        self.lease_expires_at = lease_expires_at
+
+    def is_live(self, now: float) -> bool:
+        """Whether the record still blocks a new claim of its key"""
+        if self.status == STATUS_COMPLETED:
+            return self.expires_at is None or self.expires_at > now
+        return self.lease_expires_at is not None and self.lease_expires_at > now
+
+
+class Outcome:
+    """
+    Result of IdempotencyStore.run().
+
+    Attributes:
+        result: The job's result, or the stored result for a replay
+        replayed (bool): True when the job was not run because the key had completed
+    """
+    __slots__ = ("key", "result", "replayed")
+
+    def __init__(self, key, result, replayed):
+        self.key = key
+        self.result = result
+        self.replayed = replayed
+
+
+class MemoryBackend:
+    """Dict backed store, local to the container"""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key, lease_expires_at, now):
+        with self._lock:
+            existing = self._records.get(key)
+            if existing is not None and existing.is_live(now):
+                return existing
+            self._records[key] = IdempotencyRecord(key, STATUS_IN_PROGRESS, lease_expires_at=lease_expires_at)
+            # Expired entries are dropped as new keys are claimed
+            for stale_key in [k for k, r in self._records.items() if not r.is_live(now)]:
+                del self._records[stale_key]
+            return None
+
+    def complete(self, key, result, expires_at):
+        with self._lock:
+            self._records[key] = IdempotencyRecord(key, STATUS_COMPLETED, result, expires_at)
+
+    def release(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    Store in a SQLite file. The claim runs in an IMMEDIATE transaction, so it
+    is atomic across processes sharing the file.
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency ("
+                " key TEXT PRIMARY KEY, status TEXT NOT NULL, result TEXT,"
+                " expires_at REAL, lease_expires_at REAL)"
+            )
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        return conn
+
+    def claim(self, key, lease_expires_at, now):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT status, result, expires_at, lease_expires_at FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                existing = IdempotencyRecord(key, row[0], row[1], row[2], row[3])
+                if existing.is_live(now):
+                    conn.execute("COMMIT")
+                    if existing.result is not None:
+                        existing.result = serializer.loads(existing.result)
+                    return existing
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency (key, status, result, expires_at, lease_expires_at)"
+                " VALUES (?, ?, NULL, NULL, ?)",
+                (key, STATUS_IN_PROGRESS, lease_expires_at),
+            )
+            conn.execute("DELETE FROM idempotency WHERE status = ? AND expires_at <= ?", (STATUS_COMPLETED, now))
+            conn.execute("COMMIT")
+            return None
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def complete(self, key, result, expires_at):
+        self._connect().execute(
+            "UPDATE idempotency SET status = ?, result = ?, expires_at = ?, lease_expires_at = NULL WHERE key = ?",
+            (STATUS_COMPLETED, serializer.dumps(result), expires_at, key),
+        )
+
+    def release(self, key):
+        self._connect().execute("DELETE FROM idempotency WHERE key = ?", (key,))
+
+
+class DynamoDBBackend:
+    """
+    Store in a DynamoDB table with a string partition key "id". Enable DynamoDB
+    TTL on "expiresAt" so completed records are removed by the table itself.
+    """
+
+    def __init__(self, table_name=TABLE_NAME, endpoint_url=DYNAMODB_ENDPOINT, region_name=None):
+        if not table_name:
+            raise ValueError("DynamoDB idempotency backend requires IDEMPOTENCY_TABLE")
+        self.table_name = table_name
+        self.client = boto3.session.Session().client(
+            "dynamodb",
+            endpoint_url=endpoint_url,
+            region_name=region_name or os.environ.get("AWS_REGION") or DEFAULT_REGION,
+        )
+
+    def create_table(self):
+        """Create the table, for local stand-ins such as DynamoDB Local"""
+        try:
+            self.client.create_table(
+                TableName=self.table_name,
+                AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+                KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+        except botocore_exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceInUseException":
+                raise
+
+    def claim(self, key, lease_expires_at, now):
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={
+                    "id": {"S": key},
+                    "status": {"S": STATUS_IN_PROGRESS},
+                    "leaseExpiresAt": {"N": str(lease_expires_at)},
+                    "expiresAt": {"N": str(int(lease_expires_at) + 1)},
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(id)"
+                    " OR (#status = :completed AND expiresAt <= :now)"
+                    " OR (#status = :in_progress AND leaseExpiresAt <= :now)"
+                ),
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={
+                    ":completed": {"S": STATUS_COMPLETED},
+                    ":in_progress": {"S": STATUS_IN_PROGRESS},
+                    ":now": {"N": str(now)},
+                },
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            return None
+        except botocore_exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            item = e.response.get("Item")
+            if item is None:
+                item = self.client.get_item(
+                    TableName=self.table_name, Key={"id": {"S": key}}, ConsistentRead=True
+                ).get("Item") or {}
+            return IdempotencyRecord(
+                key,
+                item.get("status", {}).get("S", STATUS_IN_PROGRESS),
+                serializer.loads(item["result"]["S"]) if "result" in item else None,
+                float(item["expiresAt"]["N"]) if "expiresAt" in item else None,
+                float(item["leaseExpiresAt"]["N"]) if "leaseExpiresAt" in item else None,
+            )
+
+    def complete(self, key, result, expires_at):
+        self.client.put_item(
+            TableName=self.table_name,
+            Item={
+                "id": {"S": key},
+                "status": {"S": STATUS_COMPLETED},
+                "result": {"S": serializer.dumps(result)},
+                "expiresAt": {"N": str(int(expires_at))},
+            },
+        )
+
+    def release(self, key):
+        self.client.delete_item(TableName=self.table_name, Key={"id": {"S": key}})
+
+
+class IdempotencyStore:
+    """
+    Runs jobs at most once per key within the TTL.
+
+    Parameters:
+    -----------
+    backend : MemoryBackend | SQLiteBackend | DynamoDBBackend
+        Where records are kept
+    ttl_secs : int, optional
+        How long a completed result is replayed, defaults to IDEMPOTENCY_TTL_SECS
+    """
+
+    def __init__(self, backend, ttl_secs: int = TTL_SECS):
+        self.backend = backend
+        self.ttl_secs = ttl_secs
+
+    def run(self, key: str, func, *args, lease_secs: float = None, ttl_secs: int = None) -> Outcome:
+        """
+        Run func(*args) unless the key already completed.
+
+        Parameters:
+        -----------
+        key : str
+            Idempotency key, see make_idempotency_key()
+        func : callable
+            The job
+        lease_secs : float, optional
+            How long the in-progress claim holds, normally the invocation's
+            remaining time. Defaults to DEFAULT_LEASE_SECS
+        ttl_secs : int, optional
+            Override the store's TTL for this key
+
+        Returns:
+        --------
+        Outcome
+            The job's result, or the stored one with replayed=True
+
+        Raises:
+        -------
+        IdempotencyInProgress
+            Another invocation is running the job for this key
+        """
+        now = time.time()
+        existing = self.backend.claim(key, now + (lease_secs or DEFAULT_LEASE_SECS), now)
+        if existing is not None:
+            if existing.status == STATUS_COMPLETED:
+                logger.info(f"Idempotency key {key} already completed, replaying stored result")
+                return Outcome(key, existing.result, replayed=True)
+            raise IdempotencyInProgress(key, existing.lease_expires_at)
+
+        try:
+            result = func(*args)
+        except BaseException:
+            # Let the retry run the job again
+            self._release(key)
+            raise
+
+        try:
+            self.backend.complete(key, result, time.time() + (ttl_secs or self.ttl_secs))
+        except Exception as e:
+            # The job itself succeeded; a failed write only loses deduplication
+            logger.warning(f"Failed to store idempotent result for {key}: {e}")
+        return Outcome(key, result, replayed=False)
+
+    def _release(self, key):
+        try:
+            self.backend.release(key)
+        except Exception as e:
+            logger.warning(f"Failed to release idempotency key {key}: {e}")
+
+
+def make_idempotency_key(name: str, event: dict, window_secs: int = None, now: float = None) -> str:
+    """
+    Idempotency key for an event.
+
+    Uses the event's own id when it has one (EventBridge events, an explicit
+    "idempotencyKey"). Otherwise the key is a hash of the payload; for scheduled
+    events whose payload is the same on every run (a constant Input), pass the
+    schedule period as window_secs so each run gets its own key while retries
+    of that run share it. The window is taken from the event's "time" (the
+    scheduled time), so a retry processed after the window has rolled over
+    still gets its run's key; events without one use the processing time.
+
+    Args:
+        name (str): Event name, keeps keys of different jobs apart
+        event (dict): The event payload
+        window_secs (int, optional): Time bucket folded into hash based keys
+        now (float, optional): Epoch seconds used when the event has no "time", defaults to now
+
+    Returns:
+        str: The key
+    """
+    explicit = event.get("idempotencyKey") or event.get("id")
+    if explicit:
+        return f"{name}:{explicit}"
+    canonical = json.dumps(event, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+    if window_secs:
+        scheduled_at = _event_time(event)
+        if scheduled_at is None:
+            scheduled_at = now if now is not None else time.time()
+        window_start = int(scheduled_at // window_secs * window_secs)
+        return f"{name}:{digest}:{window_start}"
+    return f"{name}:{digest}"
+
+
+def _event_time(event: dict):
+    """Epoch seconds of the event's ISO 8601 "time", or None when it has none"""
+    value = event.get("time")
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"Ignoring unparseable event time: {value}")
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_backend():
+    backend = BACKEND or ("dynamodb" if TABLE_NAME else "memory")
+    if backend == "memory":
+        return MemoryBackend()
+    if backend == "sqlite":
+        return SQLiteBackend(SQLITE_PATH)
+    if backend == "dynamodb":
+        return DynamoDBBackend(TABLE_NAME, DYNAMODB_ENDPOINT)
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {backend}")
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """The container-wide store, created on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore(_create_backend())
+                logger.info(f"Idempotency store using {type(_store.backend).__name__}")
+    return _store
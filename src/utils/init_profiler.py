@@ -0,0 +1,149 @@
+"""
+Cold-start (INIT phase) profiler for the Lambda entry points.
+
+Imports a handler module in a fresh interpreter with ``-X importtime`` so every
+run measures a real cold start, then reports the per-module import cost and
+the total INIT duration. A budget can be enforced from a test or CI step:
+
+    from src.utils.init_profiler import check_init_budget
+    check_init_budget("src.api.app", budget_ms=400)
+
+or from the command line:
+
+    python -m src.utils.init_profiler src.api.app src.event.app --budget-ms 400
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+ENTRY_POINTS = ("src.api.app", "src.event.app")
+
+# Child program: import the module and print the wall-clock INIT duration
+_CHILD_CODE = (
+    "import time, sys;"
+    "t = time.perf_counter();"
+    "import {module};"
+    "sys.stdout.write('INIT_MS=%f' % ((time.perf_counter() - t) * 1000))"
+)
+
+
+class InitBudgetExceeded(AssertionError):
+    """Raised when an entry point's INIT duration exceeds its budget"""
+
+
+def _parse_importtime(stderr: str):
+    """
+    Parse ``-X importtime`` output lines of the form:
+        import time:   self [us] | cumulative | imported package
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules[name.strip()] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        except ValueError:
+            continue
+    return modules
+
+
+def profile_init(module: str, env: dict = None, python: str = sys.executable):
+    """
+    Import a module in a fresh interpreter and measure its INIT cost.
+
+    Args:
+        module (str): Module to import, e.g. 'src.api.app'
+        env (dict, optional): Extra environment variables for the child process
+        python (str, optional): Interpreter to use, defaults to the current one
+
+    Returns:
+        dict: {'module', 'init_ms', 'modules': {name: {'self_ms', 'cumulative_ms'}}}
+    """
+    child_env = {**os.environ, **(env or {})}
+    child_env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (PROJECT_ROOT, child_env.get("PYTHONPATH")) if path
+    )
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", _CHILD_CODE.format(module=module)],
+        cwd=PROJECT_ROOT,
+        env=child_env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    init_ms = float(result.stdout.rsplit("INIT_MS=", 1)[-1])
+    return {
+        "module": module,
+        "init_ms": round(init_ms, 2),
+        "modules": _parse_importtime(result.stderr),
+    }
+
+
+def top_imports(report: dict, limit: int = 15):
+    """Return the most expensive top-level imports by cumulative time"""
+    return sorted(
+        report["modules"].items(),
+        key=lambda item: item[1]["cumulative_ms"],
+        reverse=True
+    )[:limit]
+
+
+def check_init_budget(module: str, budget_ms: float, env: dict = None):
+    """
+    Profile a module's INIT and raise InitBudgetExceeded if it's over budget.
+
+    Returns:
+        dict: The profile report, when within budget
+    """
+    report = profile_init(module, env)
+    if report["init_ms"] > budget_ms:
+        offenders = ", ".join(
+            f"{name} ({stats['cumulative_ms']:.1f} ms)" for name, stats in top_imports(report, 5)
+        )
+        raise InitBudgetExceeded(
+            f"INIT of {module} took {report['init_ms']:.1f} ms > {budget_ms} ms budget. "
+            f"Top imports: {offenders}"
+        )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile Lambda cold-start imports')
+    parser.add_argument('modules', nargs='*', default=list(ENTRY_POINTS),
+                        help='Modules to profile (defaults to the Lambda entry points)')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Fail when any module INIT takes longer than this')
+    parser.add_argument('--top', type=int, default=15,
+                        help='Number of most expensive imports to show')
+    parser.add_argument('--json', action='store_true',
+                        help='Print the full reports as JSON')
+    args = parser.parse_args(argv)
+
+    reports = [profile_init(module) for module in args.modules]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print(f"{report['module']}: INIT {report['init_ms']:.1f} ms")
+            for name, stats in top_imports(report, args.top):
+                print(f"  {stats['cumulative_ms']:9.1f} ms  {stats['self_ms']:9.1f} ms self  {name}")
+
+    over_budget = [r for r in reports if args.budget_ms and r["init_ms"] > args.budget_ms]
+    for report in over_budget:
+        print(f"Budget exceeded: {report['module']} {report['init_ms']:.1f} ms > {args.budget_ms} ms")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Deferred imports for heavy dependencies.
+
+boto3, pandas and numpy each add tens to hundreds of milliseconds to the Lambda
+INIT phase. Modules that only need them on some code paths bind a lazy proxy
+at import time instead, and the real import happens on first attribute access:
+
+    boto3 = lazy_import("boto3")
+    pd = lazy_import("pandas")
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+
+
+class LazyModule:
+    """
+    Module proxy that imports the target module on first attribute access.
+    """
+    __slots__ = ("_lazy_name", "_lazy_module", "_lazy_lock")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self._lazy_name)
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self._lazy_name}' ({state})>"
+
+
+def lazy_import(name: str):
+    """
+    Return the module if it's already imported, otherwise a proxy that
+    imports it on first use.
+
+    Args:
+        name (str): Fully qualified module name, e.g. 'botocore.exceptions'
+
+    Returns:
+        module | LazyModule: The module or a lazy proxy for it
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """Check whether a module (or lazy proxy) has actually been imported"""
+    if isinstance(module, LazyModule):
+        return object.__getattribute__(module, "_lazy_module") is not None
+    return True
+
+
+def is_available(name: str) -> bool:
+    """Check whether an optional dependency is installed, without importing it"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -1,11 +1,28 @@
+import contextvars
+import json
 import logging
+import os
+import time
 import uuid
 
+MASTER_LOGGER_NAME = 'WFGClients'
+DEFAULT_CLASSIFIER = 'UNKNOWN_SERVICE'
+
+# 'text' keeps the classic "<<CLASSIFIER>> (request-id) [LEVEL] message" lines,
+# 'json' emits one JSON object per record for CloudWatch Logs Insights
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+
+# Per-invocation logging context. Being a ContextVar, concurrent invocations
+# (threads or asyncio tasks) each see their own classifier and request id.
+_log_context = contextvars.ContextVar(
+    'log_context', default=(DEFAULT_CLASSIFIER, None)
+)
+
 
 def init_logger():
     """
     Initialize a basic logger with a unique request ID.
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
@@ -20,20 +37,92 @@ def init_logger():
     return logger
 
 
+def set_log_context(classifier: str = None, request_id: str = None):
+    """
+    Set the classifier and request ID attached to every record logged
+    from the current context.
+
+    Args:
+        classifier (str, optional): Service classifier (e.g., 'API:hello')
+        request_id (str, optional): Unique request ID
+
+    Returns:
+        contextvars.Token: Token that can be passed to reset_log_context()
+    """
+    return _log_context.set((classifier or DEFAULT_CLASSIFIER, request_id))
+
+
+def reset_log_context(token):
+    """Restore the logging context that was active before set_log_context()"""
+    _log_context.reset(token)
+
+
+def get_log_context():
+    """
+    Returns:
+        tuple: (classifier, request_id) of the current context
+    """
+    return _log_context.get()
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats records as "<<CLASSIFIER>> (request-id) [LEVEL] message".
+    Multi-line messages get the prefix on every line so each line stays
+    attributable in CloudWatch, but the record is written in a single call.
+    """
+    def format(self, record):
+        classifier, request_id = _log_context.get()
+        prefix = f"<<{classifier}>> ({request_id}) [{record.levelname}] "
+        message = super().format(record)
+        if '\n' not in message:
+            return prefix + message
+        return '\n'.join(prefix + line for line in message.split('\n'))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as a single JSON object. Multi-line messages and
+    tracebacks are kept whole in their fields.
+    """
+    def format(self, record):
+        classifier, request_id = _log_context.get()
+        entry = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "classifier": classifier,
+            "requestId": request_id,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
 class LogHandler(logging.StreamHandler):
     """
-    Custom log handler that splits multi-line messages into separate log entries.
+    Long-lived stream handler for the master logger. The classifier and request
+    ID come from the logging context, so the handler is created once per
+    container and never rebuilt per invocation.
     """
-    def __init__(self):
-        super(LogHandler, self).__init__()
+    def __init__(self, stream=None, log_format: str = None):
+        super(LogHandler, self).__init__(stream)
+        log_format = (log_format or LOG_FORMAT).lower()
+        if log_format == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = TextFormatter("%(message)s")
+        formatter.converter = time.gmtime
+        self.setFormatter(formatter)
 
-    def emit(self, record):
-        if not isinstance(record.msg, str):
-            record.msg = str(record.msg)
-        messages = record.msg.split('\n')
-        for message in messages:
-            record.msg = message
-            super(LogHandler, self).emit(record)
+
+def _ensure_master_handler(logger):
+    """Attach the master LogHandler exactly once"""
+    if not any(isinstance(handler, LogHandler) for handler in logger.handlers):
+        logger.handlers.clear()
+        logger.addHandler(LogHandler())
+        logger.propagate = False
 
 
 def __update_or_init_master_logger(
@@ -42,26 +131,19 @@ def __update_or_init_master_logger(
 ):
     """
     Internal function to update or initialize the master logger.
-    
+
     Args:
         classifier (str, optional): Service classifier. Defaults to None.
         request_id (str, optional): Unique request ID. Defaults to None.
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    logger = logging.getLogger('WFGClients')
-    logger.setLevel(logging.DEBUG)
+    logger = logging.getLogger(MASTER_LOGGER_NAME)
+    _ensure_master_handler(logger)
 
     if request_id:
-        handler = LogHandler()
-        logger.handlers.clear()
-        formatter = logging.Formatter(
-            f"<<{classifier or 'UNKNOWN_SERVICE'}>> ({request_id}) [%(levelname)s] %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.propagate = False
+        set_log_context(classifier, request_id)
 
     return logger
 
@@ -69,18 +151,14 @@ def __update_or_init_master_logger(
 def init_master_logger():
     """
     Initialize the master logger with default configuration.
-    
+
     Returns:
         logging.Logger: Configured logger instance
     """
-    logger = logging.getLogger('WFGClients')
+    logger = logging.getLogger(MASTER_LOGGER_NAME)
     logger.setLevel(logging.DEBUG)
-    
-    # Add a default handler if none exists
-    if not logger.handlers:
-        handler = LogHandler()
-        logger.addHandler(handler)
-    
+    _ensure_master_handler(logger)
+
     return logger
 
 
@@ -90,11 +168,11 @@ def update_master_logger(
 ):
     """
     Update the master logger with a specific classifier and request ID.
-    
+
     Args:
         classifier (str): Service classifier (e.g., 'API', 'EVENT')
         request_id (str): Unique request ID
-        
+
     Returns:
         logging.Logger: Updated logger instance
     """
@@ -104,11 +182,11 @@ def update_master_logger(
 def get_lambda_logger(context=None, classifier: str = None):
     """
     Get a logger configured for AWS Lambda functions.
-    
+
     Args:
         context: AWS Lambda context object
         classifier (str, optional): Service classifier. Defaults to None.
-        
+
     Returns:
         logging.Logger: Configured logger instance for Lambda
     """
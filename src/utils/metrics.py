@@ -0,0 +1,168 @@
+"""
+Per-invocation latency metrics in CloudWatch Embedded Metric Format (EMF).
+
+Each invocation buffers its phase timings and counters and flushes them as a
+single EMF JSON line, which CloudWatch turns into metrics with the configured
+dimensions (no agent or sidecar needed):
+
+    metrics = start_invocation_metrics("API", {"Route": "hello"})
+    with metrics.phase("Handler"):
+        ...
+    metrics.flush()
+
+Phase timings are recorded as "<Phase>Duration" in milliseconds.
+
+Configuration (environment variables):
+    METRICS_NAMESPACE   CloudWatch namespace (default 'WFGClients')
+    METRICS_ENABLED     Emit EMF lines (default true)
+"""
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'WFGClients')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+UNIT_MILLISECONDS = "Milliseconds"
+UNIT_COUNT = "Count"
+UNIT_BYTES = "Bytes"
+
+# True until the first invocation of this container has been recorded
+_cold_start = True
+_cold_start_lock = threading.Lock()
+
+_current_metrics = contextvars.ContextVar('current_metrics', default=None)
+
+
+def _take_cold_start() -> bool:
+    global _cold_start
+    with _cold_start_lock:
+        cold_start, _cold_start = _cold_start, False
+    return cold_start
+
+
+class InvocationMetrics:
+    """
+    Metric buffer for one invocation.
+
+    Args:
+        service (str): 'API' or 'EVENT', added as the Service dimension
+        dimensions (dict, optional): Extra dimensions, e.g. {'Route': 'hello'}
+    """
+
+    def __init__(self, service: str, dimensions: dict = None):
+        self.dimensions = {"Service": service, **(dimensions or {})}
+        self.values = {}
+        self.units = {}
+        self.properties = {}
+        self.cold_start = _take_cold_start()
+        self._lock = threading.Lock()
+        self._flushed = False
+
+    def add_dimension(self, name: str, value):
+        self.dimensions[name] = str(value)
+
+    def put(self, name: str, value, unit: str = UNIT_MILLISECONDS):
+        """Record a value. Repeated names accumulate into a list of values."""
+        with self._lock:
+            self.units[name] = unit
+            existing = self.values.get(name)
+            if existing is None:
+                self.values[name] = value
+            elif isinstance(existing, list):
+                existing.append(value)
+            else:
+                self.values[name] = [existing, value]
+
+    def increment(self, name: str, value=1):
+        """Add to a counter"""
+        with self._lock:
+            self.units[name] = UNIT_COUNT
+            self.values[name] = self.values.get(name, 0) + value
+
+    def set_property(self, name: str, value):
+        """Attach a non-metric, searchable property (e.g. the request id)"""
+        self.properties[name] = value
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block as the '<name>Duration' metric"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(f"{name}Duration", round((time.perf_counter() - started_at) * 1000, 3))
+
+    def to_emf(self) -> dict:
+        """Build the EMF document for the buffered metrics"""
+        metric_values = {
+            name: value for name, value in self.values.items()
+            if not isinstance(value, list) or value
+        }
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": NAMESPACE,
+                    "Dimensions": [list(self.dimensions.keys())],
+                    "Metrics": [
+                        {"Name": name, "Unit": self.units[name]} for name in metric_values
+                    ],
+                }],
+            },
+            **self.dimensions,
+            **self.properties,
+            "ColdStart": self.cold_start,
+            **metric_values,
+        }
+
+    def flush(self, stream=None):
+        """Write the EMF line once; later calls are no-ops"""
+        if self._flushed:
+            return
+        self._flushed = True
+        if not METRICS_ENABLED or not self.values:
+            return
+        (stream or sys.stdout).write(json.dumps(self.to_emf(), default=str) + "\n")
+
+
+class _NullMetrics(InvocationMetrics):
+    """Sink used outside an invocation so helpers never have to check for None"""
+
+    def __init__(self):
+        self.dimensions = {}
+        self.values = {}
+        self.units = {}
+        self.properties = {}
+        self.cold_start = False
+        self._lock = threading.Lock()
+        self._flushed = True
+
+    def put(self, name, value, unit=UNIT_MILLISECONDS):
+        pass
+
+    def increment(self, name, value=1):
+        pass
+
+
+def start_invocation_metrics(service: str, dimensions: dict = None) -> InvocationMetrics:
+    """Create the metric buffer for an invocation and make it current"""
+    metrics = InvocationMetrics(service, dimensions)
+    _current_metrics.set(metrics)
+    return metrics
+
+
+def get_metrics() -> InvocationMetrics:
+    """Metric buffer of the current invocation"""
+    return _current_metrics.get() or _NullMetrics()
+
+
+@contextmanager
+def timed(name: str):
+    """Time a block into the current invocation's '<name>Duration' metric"""
+    with get_metrics().phase(name):
+        yield
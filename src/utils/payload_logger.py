@@ -0,0 +1,154 @@
+"""
+Deferred, size-capped logging of request bodies, responses and events.
+
+Payloads are only rendered when the record is actually going to be emitted
+(level enabled and the invocation sampled in), and rendering redacts sensitive
+keys and truncates large fields before serializing.
+
+Configuration (environment variables):
+    PAYLOAD_LOG_MAX_FIELD_CHARS   Max characters kept per string field (default 1024)
+    PAYLOAD_LOG_MAX_ITEMS         Max items kept per list/dict (default 50)
+    PAYLOAD_LOG_MAX_CHARS         Max characters of the rendered payload (default 8192)
+    PAYLOAD_LOG_SAMPLE_RATE       Default sampling rate 0..1 (default 1)
+    PAYLOAD_LOG_SAMPLE_RATES      Per route/event rates, e.g. "hello=0.1,DataSync=1"
+    PAYLOAD_LOG_REDACT_KEYS       Extra comma separated keys to redact
+"""
+import json
+import logging
+import os
+import zlib
+
+MAX_FIELD_CHARS = int(os.environ.get('PAYLOAD_LOG_MAX_FIELD_CHARS', '1024'))
+MAX_ITEMS = int(os.environ.get('PAYLOAD_LOG_MAX_ITEMS', '50'))
+MAX_CHARS = int(os.environ.get('PAYLOAD_LOG_MAX_CHARS', '8192'))
+MAX_DEPTH = 8
+
+REDACTED = "***REDACTED***"
+
+
+def _parse_csv(value: str):
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def _parse_sample_rates(value: str):
+    rates = {}
+    for item in _parse_csv(value):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+# Keys are matched case-insensitively
+REDACT_KEYS = {
+    key.lower() for key in [
+        "password", "passwd", "secret", "token", "access_token", "refresh_token",
+        "authorization", "apikey", "api_key", "x-api-key", "cookie", "set-cookie",
+        *_parse_csv(os.environ.get('PAYLOAD_LOG_REDACT_KEYS')),
+    ]
+}
+
+DEFAULT_SAMPLE_RATE = float(os.environ.get('PAYLOAD_LOG_SAMPLE_RATE', '1'))
+SAMPLE_RATES = _parse_sample_rates(os.environ.get('PAYLOAD_LOG_SAMPLE_RATES'))
+
+
+def is_sampled(name: str = None, sample_key: str = None) -> bool:
+    """
+    Deterministically decide whether a payload is logged. The same sample key
+    (e.g. the request id) always gives the same answer, so every payload of a
+    sampled invocation is logged together.
+    """
+    rate = SAMPLE_RATES.get(name, DEFAULT_SAMPLE_RATE)
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    bucket = zlib.crc32(str(sample_key).encode()) % 10000
+    return bucket < rate * 10000
+
+
+def _truncate_str(value: str, limit: int):
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}...<{len(value) - limit} more chars>"
+
+
+def _sanitize(value, depth=0):
+    """Redact sensitive keys and cap strings/collections, without mutating the input"""
+    if depth >= MAX_DEPTH:
+        return "<max depth>"
+
+    if isinstance(value, dict):
+        sanitized = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index >= MAX_ITEMS:
+                sanitized["..."] = f"<{len(value) - MAX_ITEMS} more keys>"
+                break
+            if str(key).lower() in REDACT_KEYS:
+                sanitized[key] = REDACTED
+            else:
+                sanitized[key] = _sanitize(item, depth + 1)
+        return sanitized
+
+    if isinstance(value, (list, tuple)):
+        sanitized = [_sanitize(item, depth + 1) for item in value[:MAX_ITEMS]]
+        if len(value) > MAX_ITEMS:
+            sanitized.append(f"<{len(value) - MAX_ITEMS} more items>")
+        return sanitized
+
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+
+    if isinstance(value, str):
+        return _truncate_str(value, MAX_FIELD_CHARS)
+
+    return value
+
+
+def render_payload(payload) -> str:
+    """Render a payload the way it appears in the logs"""
+    if isinstance(payload, str):
+        # Raw bodies are logged as-is apart from the size cap
+        return _truncate_str(payload, MAX_CHARS)
+    try:
+        rendered = json.dumps(_sanitize(payload), default=str)
+    except (TypeError, ValueError):
+        rendered = str(payload)
+    return _truncate_str(rendered, MAX_CHARS)
+
+
+class LazyPayload:
+    """Log argument that renders its payload only when the record is formatted"""
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        return render_payload(self.payload)
+
+
+def log_payload(
+    logger: logging.Logger,
+    label: str,
+    payload,
+    name: str = None,
+    sample_key: str = None,
+    level: int = logging.INFO
+):
+    """
+    Log a payload if the level is enabled and the invocation is sampled in.
+
+    Args:
+        logger (logging.Logger): Logger to write to
+        label (str): Prefix for the log line, e.g. 'Request body'
+        payload: Payload to log (dict, list, str, ...)
+        name (str, optional): Route / event name used to pick the sampling rate
+        sample_key (str, optional): Stable key to sample on, usually the request id
+        level (int, optional): Log level, defaults to INFO
+    """
+    if not logger.isEnabledFor(level) or not is_sampled(name, sample_key):
+        return
+    logger.log(level, "%s: %s", label, LazyPayload(payload))
@@ -0,0 +1,308 @@
+"""
+Per-client rate limiting for API routes.
+
+Each route that declares a rate limit policy gets a token bucket per client,
+checked before the route's handler is imported, its input parsed or any
+handler work done. Over the limit, the caller gets a 429 with Retry-After.
+
+Route policy (declared in the controller details next to timeoutInSecs):
+    "rateLimit": {
+        "requestsPerSec": 5,            # required, sustained rate per client
+        "burst": 10,                    # optional, bucket size, defaults to max(1, requestsPerSec)
+        "keyBy": ["apiKey", "ip"],      # optional, the first identity the request has:
+                                        # apiKey (x-api-key header) | ip | origin | route.
+                                        # "route" is one bucket for every caller, i.e. load shedding
+        "shared": True                  # optional, also enforce across containers when
+                                        # RATE_LIMIT_REDIS_URL is set, defaults to True
+    }
+
+Buckets are kept in the container first. That check is a dict lookup, and
+since a container only sees part of a client's traffic its bucket never
+rejects a request the shared one would accept, so over-limit clients are
+turned away without a network hop. When RATE_LIMIT_REDIS_URL is set, the
+requests that pass are then checked against the shared bucket in Redis so a
+client can't multiply its quota by the number of warm containers. If Redis is
+unreachable the limiter falls back to the container buckets for
+RATE_LIMIT_REDIS_RETRY_SECS instead of failing requests.
+
+Buckets use GCRA, the token bucket expressed as a single "theoretical arrival
+time" per client, so each bucket is one float and one Redis key.
+
+Configuration (environment variables):
+    RATE_LIMIT_ENABLED              "false" turns every route's limit off (default true)
+    RATE_LIMIT_REDIS_URL            Shared backend, e.g. redis://localhost:6379/0 (default: none)
+    RATE_LIMIT_REDIS_TIMEOUT_SECS   Redis connect / read timeout (default 0.05)
+    RATE_LIMIT_REDIS_RETRY_SECS     Time to wait after a Redis error before using it again (default 5)
+    RATE_LIMIT_MAX_KEYS             Client buckets kept per container, least recently used are
+                                    dropped first (default 10000)
+"""
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from src.utils.lazy_import import lazy_import
+
+# Only imported when a shared backend is configured
+redis = lazy_import("redis")
+
+logger = logging.getLogger('WFGClients')
+
+ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() not in ('false', '0', 'no')
+REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+REDIS_TIMEOUT_SECS = float(os.environ.get('RATE_LIMIT_REDIS_TIMEOUT_SECS', '0.05'))
+REDIS_RETRY_SECS = float(os.environ.get('RATE_LIMIT_REDIS_RETRY_SECS', '5'))
+MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '10000'))
+
+KEY_PREFIX = "ratelimit:"
+IDENTITIES = ("apiKey", "ip", "origin", "route")
+DEFAULT_KEY_BY = ("apiKey", "ip")
+
+# Optimistic transaction attempts on a contended Redis key
+MAX_SHARED_ATTEMPTS = 5
+
+
+class RateLimitExceeded(Exception):
+    """
+    The caller is over a route's quota. ``retry_after_secs`` is the whole
+    number of seconds until its next request would be accepted.
+    """
+    status_code = 429
+
+    def __init__(self, message: str, retry_after_secs: float):
+        super().__init__(message)
+        self.retry_after_secs = max(1, math.ceil(retry_after_secs))
+
+
+class RateLimitPolicy:
+    """A route's validated "rateLimit" declaration"""
+
+    def __init__(self, policy: dict):
+        rate = policy.get("requestsPerSec")
+        if not isinstance(rate, (int, float)) or rate <= 0:
+            raise ValueError(f"rateLimit requires a positive requestsPerSec: {policy}")
+        burst = policy.get("burst", max(1, rate))
+        if not isinstance(burst, (int, float)) or burst < 1:
+            raise ValueError(f"rateLimit burst must be at least 1: {policy}")
+        key_by = tuple(policy.get("keyBy") or DEFAULT_KEY_BY)
+        unknown = [identity for identity in key_by if identity not in IDENTITIES]
+        if unknown:
+            raise ValueError(f"rateLimit keyBy has unknown identities: {unknown}")
+
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.key_by = key_by
+        self.shared = bool(policy.get("shared", True))
+        # Seconds one request costs, and how far ahead of now a bucket may run
+        self.interval = 1.0 / self.rate
+        self.tolerance = self.interval * self.burst
+
+
+def gcra(tat, now: float, interval: float, tolerance: float):
+    """
+    One token bucket step.
+
+    Args:
+        tat (float or None): The bucket's theoretical arrival time, None for a new bucket
+        now (float): Current time in seconds
+        interval (float): Seconds per request at the sustained rate
+        tolerance (float): interval * burst
+
+    Returns:
+        tuple: (allowed, tat to store, seconds until a request would be allowed)
+    """
+    tat = now if tat is None else max(tat, now)
+    new_tat = tat + interval
+    allow_at = new_tat - tolerance
+    if now < allow_at:
+        return False, tat, allow_at - now
+    return True, new_tat, 0.0
+
+
+class LocalBuckets:
+    """Container-local buckets in a size-bounded LRU"""
+
+    def __init__(self, max_keys: int = MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tats)
+
+    def acquire(self, key: str, policy: RateLimitPolicy, now: float):
+        """Take a token if one is available. Returns (allowed, retry after secs)"""
+        with self._lock:
+            allowed, tat, retry_after = gcra(self._tats.get(key), now, policy.interval, policy.tolerance)
+            if allowed:
+                self._tats[key] = tat
+                self._tats.move_to_end(key)
+                while len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)
+            return allowed, retry_after
+
+    def refund(self, key: str, policy: RateLimitPolicy):
+        """Give back a token taken for a request that the shared bucket rejected"""
+        with self._lock:
+            if key in self._tats:
+                self._tats[key] -= policy.interval
+
+    def clear(self):
+        with self._lock:
+            self._tats.clear()
+
+
+class RedisBuckets:
+    """
+    Buckets shared by every container, one Redis key per bucket holding its
+    theoretical arrival time. Updates use WATCH/MULTI/EXEC so concurrent
+    containers can't both spend the last token.
+    """
+
+    def __init__(self, url: str, timeout_secs: float = REDIS_TIMEOUT_SECS):
+        self.client = redis.Redis.from_url(
+            url, socket_timeout=timeout_secs, socket_connect_timeout=timeout_secs
+        )
+
+    def acquire(self, key: str, policy: RateLimitPolicy, now: float):
+        """Take a token if one is available. Returns (allowed, retry after secs)"""
+        key = KEY_PREFIX + key
+        with self.client.pipeline() as pipe:
+            for _ in range(MAX_SHARED_ATTEMPTS):
+                try:
+                    pipe.watch(key)
+                    stored = pipe.get(key)
+                    allowed, tat, retry_after = gcra(
+                        float(stored) if stored is not None else None, now, policy.interval, policy.tolerance
+                    )
+                    if not allowed:
+                        pipe.unwatch()
+                        return False, retry_after
+                    pipe.multi()
+                    # The key expires once the bucket would be full again
+                    pipe.set(key, repr(tat), px=max(1, math.ceil((tat - now) * 1000)))
+                    pipe.execute()
+                    return True, 0.0
+                except redis.WatchError:
+                    continue
+        # Every attempt lost to a concurrent request on the same bucket, which
+        # only happens when it's hammered: count this one as over the limit
+        return False, policy.interval
+
+
+class RateLimiter:
+    """
+    Checks requests against their route's quota, in the container's buckets
+    and then, if configured, the shared ones.
+
+    Args:
+        shared (RedisBuckets, optional): Shared backend
+        max_keys (int): Container-local buckets to keep
+    """
+
+    def __init__(self, shared=None, max_keys: int = MAX_KEYS):
+        self.local = LocalBuckets(max_keys)
+        self.shared = shared
+        self._shared_down_until = 0.0
+        self._policies = {}
+
+    def policy_for(self, route_key: str, policy: dict) -> RateLimitPolicy:
+        """The compiled policy of a route, validated on first use"""
+        compiled = self._policies.get(route_key)
+        if compiled is None:
+            compiled = self._policies[route_key] = RateLimitPolicy(policy)
+        return compiled
+
+    def check(self, route_key: str, policy: dict, request, now: float = None):
+        """
+        Spend one of the caller's tokens for a route.
+
+        Args:
+            route_key (str): Route the quota applies to, e.g. 'GET hello'
+            policy (dict): The route's "rateLimit" declaration
+            request (ApiRequest): The incoming request, used to identify the caller
+            now (float, optional): Current epoch time in seconds
+
+        Raises:
+            RateLimitExceeded: The caller has no tokens left
+        """
+        compiled = self.policy_for(route_key, policy)
+        identity, value = client_identity(request, compiled.key_by)
+        key = f"{route_key}|{identity}|{_fingerprint(value)}"
+        now = time.time() if now is None else now
+
+        allowed, retry_after = self.local.acquire(key, compiled, now)
+        if allowed and compiled.shared and self.shared is not None and now >= self._shared_down_until:
+            try:
+                allowed, retry_after = self.shared.acquire(key, compiled, now)
+            except redis.RedisError as ex:
+                self._shared_down_until = now + REDIS_RETRY_SECS
+                logger.warning(
+                    f"Shared rate limit backend unavailable, using container buckets for {REDIS_RETRY_SECS}s: {ex}"
+                )
+            else:
+                if not allowed:
+                    self.local.refund(key, compiled)
+
+        if not allowed:
+            raise RateLimitExceeded(
+                f"Rate limit of {compiled.rate:g}/s exceeded for {route_key} by {identity}", retry_after
+            )
+
+
+def client_identity(request, key_by=DEFAULT_KEY_BY):
+    """
+    The first identity in key_by that the request carries.
+
+    Returns:
+        tuple: (identity kind, value), ('anonymous', '') when none is present
+    """
+    for identity in key_by:
+        if identity == "route":
+            return identity, ""
+        if identity == "apiKey":
+            value = request.get_header("x-api-key")
+        elif identity == "ip":
+            value = request.client_ip
+        else:
+            value = request.get_header("Origin")
+        if value and value != "unknown":
+            return identity, value
+    return "anonymous", ""
+
+
+def _fingerprint(value: str) -> str:
+    # Keeps API keys out of bucket keys and bounds the key length
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()[:16] if value else "-"
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    The container-wide limiter, created on first use.
+
+    Returns:
+        RateLimiter or None: None when RATE_LIMIT_ENABLED is false
+    """
+    global _limiter
+    if not ENABLED:
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                shared = RedisBuckets(REDIS_URL) if REDIS_URL else None
+                _limiter = RateLimiter(shared)
+                logger.info(f"Rate limiting with {'shared Redis and ' if shared else ''}container buckets")
+    return _limiter
+
+
+def prime_rate_limiter():
+    """Priming hook: create the limiter and connect to the shared backend, if any"""
+    limiter = get_rate_limiter()
+    if limiter is not None and limiter.shared is not None:
+        limiter.shared.client.ping()
@@ -0,0 +1,470 @@
+"""
+Reference-data cache: datasets materialized to /tmp and memory-mapped.
+
+Reference datasets (client lists, code mappings) are written once per
+container to a compact, sorted file under /tmp and read through mmap. The
+data lives in the OS page cache rather than as Python dicts on the heap, and
+a lookup decodes only the value it returns:
+
+    register_dataset("clients", load_clients, key="client_id", ttl_secs=900)
+    clients = get_dataset("clients")
+    client = clients.get("c-123")
+    for client_id, client in clients.range("c-100", "c-200"):
+        ...
+
+Datasets are refreshed when their TTL passes. If a version function is
+given, the TTL check first compares versions and only reloads on a change.
+A refresh that fails keeps serving the previous file.
+
+Datasets can also be declared in the REFERENCE_DATASETS config key (JSON list),
+and are then loaded from Supabase:
+
+    [{"name": "clients", "table": "clients", "key": "client_id",
+      "select": "client_id,name,tier", "ttlInSecs": 900,
+      "versionColumn": "updated_at", "preload": true}]
+
+init_reference_data() runs during the managers' init, right after the
+configuration is loaded, and materializes every dataset marked for preloading.
+
+File layout (little-endian):
+
+    header   magic, format version, key type, row count, metadata length
+    metadata JSON: dataset version, creation time
+    index    one fixed-width entry per row, sorted by encoded key:
+             (key offset, key length, value offset, value length)
+    keys     encoded keys (UTF-8, or order-preserving 8-byte ints)
+    values   serialized values
+
+Configuration (environment variables):
+    REFERENCE_CACHE_DIR        Directory of the dataset files (default /tmp/reference-data)
+    REFERENCE_CACHE_SEED_DIR   Read-only directory of prebuilt dataset files (e.g. baked
+                               into the image), used until the first refresh
+    REFERENCE_CACHE_TTL_SECS   Default TTL (default 3600)
+"""
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from src.utils.config import get_config
+import src.utils.serializer as serializer
+
+logger = logging.getLogger('WFGClients')
+
+CACHE_DIR = os.environ.get('REFERENCE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'reference-data'))
+SEED_DIR = os.environ.get('REFERENCE_CACHE_SEED_DIR')
+DEFAULT_TTL_SECS = int(os.environ.get('REFERENCE_CACHE_TTL_SECS', '3600'))
+
+MAGIC = b"WFGREF\x00\x01"
+FORMAT_VERSION = 1
+KEY_TYPE_STR = 0
+KEY_TYPE_INT = 1
+
+_HEADER = struct.Struct("<8sHHQI")
+_ENTRY = struct.Struct("<QIQI")
+_INT_OFFSET = 1 << 63
+
+
+class ReferenceDataError(Exception):
+    """Raised when a dataset can't be loaded or a dataset file is invalid"""
+
+
+def _encode_key(key, key_type):
+    if key_type == KEY_TYPE_INT:
+        # Shift into unsigned range so byte order equals numeric order
+        return (int(key) + _INT_OFFSET).to_bytes(8, "big")
+    return str(key).encode("utf-8")
+
+
+def _decode_key(raw, key_type):
+    if key_type == KEY_TYPE_INT:
+        return int.from_bytes(raw, "big") - _INT_OFFSET
+    return raw.decode("utf-8")
+
+
+def write_dataset(path, items, version=None):
+    """
+    Write (key, value) pairs to a dataset file, atomically replacing `path`.
+
+    Keys must be all ints or all strings; values anything the serializer handles.
+
+    Args:
+        path (str): Destination file
+        items (iterable): (key, value) pairs; later duplicates win
+        version (str, optional): Dataset version recorded in the file
+
+    Returns:
+        int: Number of rows written
+    """
+    rows = {}
+    for key, value in items:
+        rows[key] = value
+    key_type = KEY_TYPE_INT if rows and all(
+        isinstance(key, int) and not isinstance(key, bool) for key in rows
+    ) else KEY_TYPE_STR
+
+    encoded = sorted(
+        (_encode_key(key, key_type), serializer.dumps(value).encode("utf-8"))
+        for key, value in rows.items()
+    )
+    metadata = json.dumps({"version": version, "createdAt": time.time()}).encode("utf-8")
+
+    index_offset = _HEADER.size + len(metadata)
+    keys_offset = index_offset + _ENTRY.size * len(encoded)
+    values_offset = keys_offset + sum(len(key) for key, _ in encoded)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, key_type, len(encoded), len(metadata)))
+            f.write(metadata)
+            key_position, value_position = keys_offset, values_offset
+            for key, value in encoded:
+                f.write(_ENTRY.pack(key_position, len(key), value_position, len(value)))
+                key_position += len(key)
+                value_position += len(value)
+            for key, _ in encoded:
+                f.write(key)
+            for _, value in encoded:
+                f.write(value)
+        # Readers holding the old file keep their mapping; new opens see the new one
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(encoded)
+
+
+class ReferenceDataset:
+    """
+    Read-only, memory-mapped view of a dataset file.
+
+    Lookups binary-search the fixed-width index (O(log n)) and decode only the
+    matching value; nothing is loaded onto the Python heap up front.
+
+    Args:
+        path (str): Dataset file written by write_dataset()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, format_version, self.key_type, self.count, metadata_length = \
+                _HEADER.unpack_from(self._mmap, 0)
+        except struct.error:
+            raise ReferenceDataError(f"Truncated dataset file: {path}")
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ReferenceDataError(f"Not a dataset file (or an older format): {path}")
+
+        metadata = json.loads(self._mmap[_HEADER.size:_HEADER.size + metadata_length])
+        self.version = metadata.get("version")
+        self.created_at = metadata.get("createdAt")
+        self._index_offset = _HEADER.size + metadata_length
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        encoded_key = self._encode(key)
+        position = self._bisect(encoded_key)
+        return position < self.count and self._key_at(position) == encoded_key
+
+    def _encode(self, key):
+        return _encode_key(key, self.key_type)
+
+    def _entry(self, position):
+        return _ENTRY.unpack_from(self._mmap, self._index_offset + position * _ENTRY.size)
+
+    def _key_at(self, position):
+        key_offset, key_length, _, _ = self._entry(position)
+        return self._mmap[key_offset:key_offset + key_length]
+
+    def _value_at(self, position):
+        _, _, value_offset, value_length = self._entry(position)
+        return serializer.loads(self._mmap[value_offset:value_offset + value_length])
+
+    def _bisect(self, encoded_key):
+        """First position whose key is >= encoded_key"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < encoded_key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get(self, key, default=None):
+        """Value for `key`, or `default`"""
+        encoded_key = self._encode(key)
+        position = self._bisect(encoded_key)
+        if position < self.count and self._key_at(position) == encoded_key:
+            return self._value_at(position)
+        return default
+
+    def range(self, start=None, end=None):
+        """
+        Yield (key, value) pairs with start <= key < end, in key order.
+        Either bound may be None for an open range.
+        """
+        position = self._bisect(self._encode(start)) if start is not None else 0
+        encoded_end = self._encode(end) if end is not None else None
+        while position < self.count:
+            raw_key = self._key_at(position)
+            if encoded_end is not None and raw_key >= encoded_end:
+                return
+            yield _decode_key(raw_key, self.key_type), self._value_at(position)
+            position += 1
+
+    def prefix(self, prefix: str):
+        """Yield (key, value) pairs whose string key starts with `prefix`"""
+        encoded_prefix = str(prefix).encode("utf-8")
+        position = self._bisect(encoded_prefix)
+        while position < self.count:
+            raw_key = self._key_at(position)
+            if not raw_key.startswith(encoded_prefix):
+                return
+            yield _decode_key(raw_key, self.key_type), self._value_at(position)
+            position += 1
+
+    def keys(self):
+        for position in range(self.count):
+            yield _decode_key(self._key_at(position), self.key_type)
+
+    @property
+    def nbytes(self):
+        return len(self._mmap)
+
+    def touch(self):
+        """
+        Read one byte of every page so the file is resident before the first
+        lookup needs it. Returns the number of pages touched
+        """
+        pages = 0
+        for offset in range(0, len(self._mmap), mmap.PAGESIZE):
+            self._mmap[offset]
+            pages += 1
+        return pages
+
+
+class _DatasetSpec:
+    __slots__ = ("name", "loader", "key", "ttl_secs", "version_fn", "preload",
+                 "dataset", "checked_at", "lock")
+
+    def __init__(self, name, loader, key, ttl_secs, version_fn, preload):
+        self.name = name
+        self.loader = loader
+        self.key = key
+        self.ttl_secs = ttl_secs
+        self.version_fn = version_fn
+        self.preload = preload
+        self.dataset = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+
+# Registered datasets, keyed by name
+_datasets = {}
+_datasets_lock = threading.Lock()
+
+
+def register_dataset(name, loader, key=None, ttl_secs=None, version_fn=None, preload=False):
+    """
+    Declare a reference dataset.
+
+    Args:
+        name (str): Dataset name, also its file name
+        loader (callable): loader() -> iterable of rows (dicts, keyed by `key`)
+                           or of (key, value) pairs when `key` is None
+        key (str, optional): Key field of the rows
+        ttl_secs (float, optional): Seconds before the dataset is revalidated,
+                                    defaults to REFERENCE_CACHE_TTL_SECS
+        version_fn (callable, optional): version_fn() -> current version of the
+                                         source; a matching version skips the reload
+        preload (bool): Materialize during init_reference_data()
+    """
+    with _datasets_lock:
+        _datasets[name] = _DatasetSpec(
+            name, loader, key, ttl_secs or DEFAULT_TTL_SECS, version_fn, preload
+        )
+
+
+def _path(name, directory=None):
+    return os.path.join(directory or CACHE_DIR, f"{name}.ref")
+
+
+def _materialize(spec: _DatasetSpec, version):
+    started_at = time.perf_counter()
+    rows = spec.loader()
+    items = ((row[spec.key], row) for row in rows) if spec.key else rows
+    path = _path(spec.name)
+    count = write_dataset(path, items, version)
+    dataset = ReferenceDataset(path)
+    logger.info(
+        f"Reference data {spec.name}: {count} rows, {dataset.nbytes} bytes "
+        f"in {round((time.perf_counter() - started_at) * 1000, 2)} ms"
+    )
+    return dataset
+
+
+def _open_existing(name):
+    """Dataset already on disk: this container's /tmp first, then the seed directory"""
+    for directory in filter(None, (CACHE_DIR, SEED_DIR)):
+        path = _path(name, directory)
+        if os.path.exists(path):
+            try:
+                return ReferenceDataset(path)
+            except (ReferenceDataError, ValueError, OSError) as ex:
+                logger.warning(f"Ignoring unreadable reference data file {path}: {ex}")
+    return None
+
+
+def _refresh(spec: _DatasetSpec):
+    """Bring the dataset up to date (caller holds spec.lock)"""
+    if spec.dataset is None:
+        spec.dataset = _open_existing(spec.name)
+        if spec.dataset is not None:
+            spec.checked_at = spec.dataset.created_at
+
+    now = time.time()
+    if spec.dataset is not None and spec.checked_at and now - spec.checked_at < spec.ttl_secs:
+        return spec.dataset
+
+    try:
+        version = spec.version_fn() if spec.version_fn else None
+        if spec.dataset is not None and version is not None and version == spec.dataset.version:
+            # Source unchanged: keep the file, restart the TTL
+            spec.checked_at = now
+            return spec.dataset
+        spec.dataset = _materialize(spec, version)
+        spec.checked_at = now
+    except Exception as ex:
+        if spec.dataset is None:
+            raise ReferenceDataError(f"Could not load reference data {spec.name}: {ex}") from ex
+        # Keep serving what we have and retry after another TTL
+        logger.warning(f"Refreshing reference data {spec.name} failed, serving the cached copy: {ex}")
+        spec.checked_at = now
+    return spec.dataset
+
+
+def get_dataset(name) -> ReferenceDataset:
+    """
+    The named dataset, loaded or refreshed if needed.
+
+    Raises:
+        KeyError: No dataset registered under `name`
+        ReferenceDataError: The dataset isn't cached and couldn't be loaded
+    """
+    spec = _datasets[name]
+    dataset, checked_at = spec.dataset, spec.checked_at
+    if dataset is not None and checked_at and time.time() - checked_at < spec.ttl_secs:
+        return dataset
+    with spec.lock:
+        return _refresh(spec)
+
+
+def lookup(name, key, default=None):
+    """Shortcut for get_dataset(name).get(key, default)"""
+    return get_dataset(name).get(key, default)
+
+
+def _supabase_table(config):
+    # Imported here so the API function only pays for it when datasets are declared
+    from src.functions.data_sync.sync_engine import SupabaseTable
+    app_config = get_config()
+    return SupabaseTable(app_config.SUPABASE_URL, config["table"], app_config.SUPABASE_KEY)
+
+
+def _supabase_loader(config):
+    def load():
+        table = _supabase_table(config)
+        for page in table.fetch_pages(config.get("key", "id"), select=config.get("select", "*"),
+                                      filters=config.get("filters")):
+            yield from page
+    return load
+
+
+def _supabase_version_fn(config):
+    column = config["versionColumn"]
+
+    def version():
+        # Latest value of the version column, e.g. max(updated_at)
+        table = _supabase_table(config)
+        response = table.session.get(
+            table.url,
+            params={
+                "select": column,
+                "order": f"{column}.desc.nullslast",
+                "limit": "1",
+                **(config.get("filters") or {}),
+            },
+            headers=table.headers,
+            timeout=table.timeout,
+        )
+        response.raise_for_status()
+        rows = response.json()
+        return str(rows[0][column]) if rows else ""
+    return version
+
+
+def _register_configured_datasets():
+    """Register the datasets declared in the REFERENCE_DATASETS config key"""
+    configured = get_config().REFERENCE_DATASETS
+    for config in configured:
+        if config["name"] in _datasets:
+            continue
+        register_dataset(
+            config["name"],
+            _supabase_loader(config),
+            key=config.get("key", "id"),
+            ttl_secs=config.get("ttlInSecs"),
+            version_fn=_supabase_version_fn(config) if config.get("versionColumn") else None,
+            preload=config.get("preload", False),
+        )
+
+
+def init_reference_data():
+    """
+    Init hook for the managers: registers the configured datasets and
+    materializes the ones marked for preloading. Failures are logged, not
+    raised, so a reference-data outage doesn't fail the container's init;
+    the dataset is then loaded on first use instead.
+
+    Returns:
+        dict: Loaded datasets by name
+    """
+    try:
+        _register_configured_datasets()
+    except Exception as ex:
+        logger.error(f"Invalid REFERENCE_DATASETS configuration: {ex}")
+
+    loaded = {}
+    for name, spec in list(_datasets.items()):
+        if not spec.preload:
+            continue
+        try:
+            loaded[name] = get_dataset(name)
+        except Exception as ex:
+            logger.error(f"Preloading reference data {name} failed: {ex}")
+    if loaded:
+        logger.info(f"Reference data loaded: {', '.join(loaded)}")
+    return loaded
+
+
+def prime_reference_data():
+    """
+    Priming hook: init_reference_data(), which also refreshes preloaded
+    datasets past their TTL, then page in each loaded dataset file.
+
+    Returns:
+        dict: Pages touched per dataset name
+    """
+    return {name: dataset.touch() for name, dataset in init_reference_data().items()}
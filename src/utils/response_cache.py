@@ -0,0 +1,188 @@
+"""
+In-container response cache for idempotent API routes.
+
+Each route that declares a cache policy gets its own size-bounded LRU cache,
+which lives at module level and so survives across warm invocations of the
+same container. Entries expire after the route's TTL.
+
+Set RESPONSE_CACHE_ENABLED=false to bypass every route's cache (e.g. when
+benchmarking the handlers themselves).
+
+Route policy (declared in the controller details next to timeoutInSecs):
+    "cache": {
+        "ttlInSecs": 30,                  # required
+        "maxEntries": 128,                # optional, defaults to DEFAULT_MAX_ENTRIES
+        "varyHeaders": ["Accept-Language"]  # optional, headers that are part of the key
+    }
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+
+DEFAULT_MAX_ENTRIES = 128
+
+# Content codings encoded_etag() may append to a tag
+ETAG_ENCODINGS = ("gzip", "br", "deflate")
+
+# Only these methods are ever served from the cache
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache with per-entry expiry.
+    """
+
+    def __init__(self, ttl_secs: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_secs = ttl_secs
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value for a key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries over capacity"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_secs, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Route name -> ResponseCache
+_route_caches = {}
+_route_caches_lock = threading.Lock()
+
+
+def get_route_cache(route_name: str, policy: dict) -> ResponseCache:
+    """
+    Get (or create on first use) the cache for a route.
+
+    Args:
+        route_name (str): Route name from the controller details
+        policy (dict): The route's cache policy
+
+    Returns:
+        ResponseCache: The route's cache
+    """
+    cache = _route_caches.get(route_name)
+    if cache is None:
+        with _route_caches_lock:
+            cache = _route_caches.get(route_name)
+            if cache is None:
+                cache = ResponseCache(
+                    policy["ttlInSecs"],
+                    policy.get("maxEntries", DEFAULT_MAX_ENTRIES)
+                )
+                _route_caches[route_name] = cache
+    return cache
+
+
+def clear_route_caches():
+    """Drop every cached response, e.g. after a config change"""
+    with _route_caches_lock:
+        for cache in _route_caches.values():
+            cache.clear()
+
+
+def build_cache_key(method: str, query_params: dict, headers: dict, vary_headers=None, path_params=None):
+    """
+    Build a cache key from the path params, the normalized query params and
+    the vary headers. Param order and header name case don't affect the key.
+    Path params keep templated routes (e.g. 'items/{item_id}') from serving
+    one item's response for another.
+    """
+    path_key = tuple(sorted((path_params or {}).items()))
+    query_key = tuple(sorted((query_params or {}).items()))
+    header_key = ()
+    if vary_headers:
+        lowered = {key.lower(): value for key, value in (headers or {}).items()}
+        header_key = tuple(lowered.get(name.lower()) for name in vary_headers)
+    # HEAD is answered from GET entries
+    return ("GET" if method == "HEAD" else method, path_key, query_key, header_key)
+
+
+def compute_etag(body) -> str:
+    """Compute a strong ETag for a response body"""
+    data = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of a content-coded variant of a response, e.g. '"<hash>-gzip"'.
+    Strong ETags have to differ between representations, so the compressed
+    bytes don't share a tag with the identity ones.
+    """
+    if not etag or not encoding or etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _identity_etag(etag: str) -> str:
+    """Strip a W/ prefix and a content-coding suffix added by encoded_etag()"""
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for encoding in ETAG_ENCODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def matching_etag(if_none_match: str, etag: str):
+    """
+    Check an If-None-Match header against a response's identity ETag, with
+    the weak comparison If-None-Match calls for: W/ prefixed tags and tags of
+    any content-coded variant of the same body match.
+
+    Returns:
+        str or None: The client's matching tag ('*' for a wildcard), None when nothing matches
+    """
+    if not if_none_match or not etag:
+        return None
+    if if_none_match.strip() == "*":
+        return "*"
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if _identity_etag(candidate) == etag:
+            return candidate
+    return None
+
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
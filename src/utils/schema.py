@@ -0,0 +1,220 @@
+"""
+Compiled validators for a JSON Schema subset.
+
+Schemas are compiled once (e.g. when the route table is built at init) into
+nested closures, so validating a request is a few function calls rather than a
+walk over the schema dict:
+
+    validate = compile_schema({
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"type": "string", "minLength": 1, "maxLength": 100},
+            "limit": {"type": "integer", "minimum": 1, "maximum": 500},
+        },
+        "additionalProperties": False,
+    })
+    body = validate(body)        # raises SchemaError on the first violation
+
+Supported keywords: type (a name or a list of names), enum, const,
+properties, required, additionalProperties (bool or schema), items,
+minItems, maxItems, minLength, maxLength, pattern, minimum, maximum,
+exclusiveMinimum, exclusiveMaximum.
+
+With coerce=True, strings are converted to the integer / number / boolean
+their schema asks for, which is what query string and path parameters need.
+"""
+import re
+
+_TYPE_CHECKS = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+
+_BOOLEAN_STRINGS = {"true": True, "1": True, "false": False, "0": False}
+
+
+class SchemaError(ValueError):
+    """
+    Raised when a value doesn't match its schema.
+
+    Args:
+        path (str): Location of the offending value, e.g. 'body.items[2].id'
+        message (str): What is wrong with it
+    """
+
+    def __init__(self, path: str, message: str):
+        self.path = path
+        self.message = message
+        super().__init__(f"{path}: {message}" if path else message)
+
+
+def _coerce_string(value, types):
+    """Convert a query/path string into the first scalar type it parses as"""
+    if not isinstance(value, str):
+        return value
+    for type_name in types:
+        try:
+            if type_name == "integer":
+                return int(value)
+            if type_name == "number":
+                return float(value)
+        except ValueError:
+            continue
+        if type_name == "boolean" and value.lower() in _BOOLEAN_STRINGS:
+            return _BOOLEAN_STRINGS[value.lower()]
+        if type_name == "string":
+            return value
+    return value
+
+
+def compile_schema(schema: dict, coerce: bool = False, path: str = ""):
+    """
+    Compile a schema into a validator.
+
+    Args:
+        schema (dict): JSON Schema (subset, see module docstring)
+        coerce (bool): Convert strings to the scalar types the schema declares
+        path (str): Prefix for error locations
+
+    Returns:
+        callable: validator(value, path=path) -> value (coerced if enabled);
+                  raises SchemaError
+    """
+    checks = []
+
+    types = schema.get("type")
+    if types is not None:
+        types = [types] if isinstance(types, str) else list(types)
+        unknown = [t for t in types if t not in _TYPE_CHECKS]
+        if unknown:
+            raise ValueError(f"Unknown schema type(s): {unknown}")
+        type_checks = [_TYPE_CHECKS[t] for t in types]
+        expected = " or ".join(types)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        checks.append(lambda value, at: value in allowed or _fail(at, f"must be one of {allowed}"))
+    if "const" in schema:
+        const = schema["const"]
+        checks.append(lambda value, at: value == const or _fail(at, f"must be {const!r}"))
+
+    # Strings
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+        checks.append(lambda value, at: not isinstance(value, str) or len(value) >= min_length
+                      or _fail(at, f"must be at least {min_length} characters"))
+    if "maxLength" in schema:
+        max_length = schema["maxLength"]
+        checks.append(lambda value, at: not isinstance(value, str) or len(value) <= max_length
+                      or _fail(at, f"must be at most {max_length} characters"))
+    if "pattern" in schema:
+        pattern = re.compile(schema["pattern"])
+        checks.append(lambda value, at: not isinstance(value, str) or pattern.search(value)
+                      or _fail(at, f"must match {pattern.pattern}"))
+
+    # Numbers
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    if "minimum" in schema:
+        minimum = schema["minimum"]
+        checks.append(lambda value, at: not is_number(value) or value >= minimum
+                      or _fail(at, f"must be >= {minimum}"))
+    if "maximum" in schema:
+        maximum = schema["maximum"]
+        checks.append(lambda value, at: not is_number(value) or value <= maximum
+                      or _fail(at, f"must be <= {maximum}"))
+    if "exclusiveMinimum" in schema:
+        exclusive_minimum = schema["exclusiveMinimum"]
+        checks.append(lambda value, at: not is_number(value) or value > exclusive_minimum
+                      or _fail(at, f"must be > {exclusive_minimum}"))
+    if "exclusiveMaximum" in schema:
+        exclusive_maximum = schema["exclusiveMaximum"]
+        checks.append(lambda value, at: not is_number(value) or value < exclusive_maximum
+                      or _fail(at, f"must be < {exclusive_maximum}"))
+
+    # Arrays
+    if "minItems" in schema:
+        min_items = schema["minItems"]
+        checks.append(lambda value, at: not isinstance(value, list) or len(value) >= min_items
+                      or _fail(at, f"must have at least {min_items} items"))
+    if "maxItems" in schema:
+        max_items = schema["maxItems"]
+        checks.append(lambda value, at: not isinstance(value, list) or len(value) <= max_items
+                      or _fail(at, f"must have at most {max_items} items"))
+    item_validator = compile_schema(schema["items"], coerce) if isinstance(schema.get("items"), dict) else None
+
+    # Objects
+    property_validators = {
+        name: compile_schema(property_schema, coerce)
+        for name, property_schema in (schema.get("properties") or {}).items()
+    }
+    required = list(schema.get("required") or [])
+    additional = schema.get("additionalProperties", True)
+    additional_validator = compile_schema(additional, coerce) if isinstance(additional, dict) else None
+
+    def validate(value, at=path):
+        if coerce and types is not None:
+            value = _coerce_string(value, types)
+        if types is not None and not any(check(value) for check in type_checks):
+            _fail(at, f"expected {expected}, got {_type_name(value)}")
+        for check in checks:
+            check(value, at)
+
+        if isinstance(value, dict) and (property_validators or required or additional is not True):
+            for name in required:
+                if name not in value:
+                    _fail(_join(at, name), "is required")
+            validated = None
+            for name, item in value.items():
+                property_validator = property_validators.get(name)
+                if property_validator is None:
+                    if additional is False:
+                        _fail(_join(at, name), "is not allowed")
+                    if additional_validator is None:
+                        continue
+                    property_validator = additional_validator
+                checked = property_validator(item, _join(at, name))
+                if checked is not item:
+                    # Only copy the dict when coercion changed something
+                    if validated is None:
+                        validated = dict(value)
+                    validated[name] = checked
+            if validated is not None:
+                value = validated
+
+        if item_validator is not None and isinstance(value, list):
+            value = [item_validator(item, f"{at}[{index}]") for index, item in enumerate(value)]
+        return value
+
+    return validate
+
+
+def _fail(path, message):
+    raise SchemaError(path, message)
+
+
+def _join(path, name):
+    return f"{path}.{name}" if path else name
+
+
+def _type_name(value):
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, (int, float)):
+        return "number"
+    return type(value).__name__
@@ -0,0 +1,172 @@
+"""
+JSON serialization for API and event responses.
+
+Uses orjson when it's installed and falls back to the stdlib json module
+otherwise. Both encoders understand the types our data handlers return:
+
+  - numpy scalars and ndarrays (orjson encodes contiguous arrays natively)
+  - pandas DataFrame / Series, encoded by pandas' own C JSON writer and spliced
+    into the output, so no intermediate .to_dict()/.tolist() object copy is made
+  - Decimal (emitted as an exact JSON number), datetime/date/time (ISO 8601),
+    UUID, sets and bytes
+
+numpy and pandas are never imported here; values are recognised by type.
+
+Configuration (environment variables):
+    JSON_ENCODER        'auto' (default), 'orjson' or 'stdlib'
+    JSON_FRAME_ORIENT   DataFrame layout: 'records' (default) or 'columnar'
+"""
+import base64
+import datetime
+import decimal
+import json
+import os
+import re
+import secrets
+import uuid
+
+from src.utils.lazy_import import is_available, lazy_import
+
+ENCODER = os.environ.get('JSON_ENCODER', 'auto').lower()
+FRAME_ORIENT = os.environ.get('JSON_FRAME_ORIENT', 'records').lower()
+
+ORIENT_RECORDS = "records"
+ORIENT_COLUMNAR = "columnar"
+
+orjson = lazy_import("orjson")
+_use_orjson = ENCODER == 'orjson' or (ENCODER == 'auto' and is_available("orjson"))
+
+# orjson >= 3.9 embeds pre-rendered JSON (Decimals, DataFrames) as a Fragment.
+# Otherwise it's passed through the encoder as a placeholder string and
+# substituted afterwards. The placeholder carries a random per-call token, so a
+# string in the data can't be mistaken for one
+_HAS_FRAGMENT = None
+_RAW_PATTERN = re.compile(r'"\\u0000RAW([0-9a-f]+):(\d+)\\u0000"')
+
+
+def _orjson_fragments() -> bool:
+    global _HAS_FRAGMENT
+    if _HAS_FRAGMENT is None:
+        _HAS_FRAGMENT = hasattr(orjson, "Fragment")
+    return _HAS_FRAGMENT
+
+
+def get_encoder_name() -> str:
+    """Name of the encoder in use, 'orjson' or 'stdlib'"""
+    return "orjson" if _use_orjson else "stdlib"
+
+
+def _type_module(obj) -> str:
+    return type(obj).__module__.split(".", 1)[0]
+
+
+def _frame_to_json(frame, orient: str) -> str:
+    """Render a DataFrame with pandas' C JSON writer"""
+    if orient == ORIENT_COLUMNAR:
+        # {"column": [values...], ...}
+        columns = (
+            f"{json.dumps(str(name))}:{frame[name].to_json(orient='values', date_format='iso')}"
+            for name in frame.columns
+        )
+        return "{" + ",".join(columns) + "}"
+    return frame.to_json(orient="records", date_format="iso")
+
+
+class _Encoder:
+    """
+    Per-call encoding state: the default hook plus the raw JSON fragments
+    collected while encoding.
+    """
+    __slots__ = ("orient", "fragments", "token", "use_fragment")
+
+    def __init__(self, orient: str, use_fragment: bool = False):
+        self.orient = orient
+        self.fragments = []
+        self.token = secrets.token_hex(8)
+        self.use_fragment = use_fragment
+
+    def raw(self, fragment: str):
+        if self.use_fragment:
+            return orjson.Fragment(fragment)
+        self.fragments.append(fragment)
+        return f"\x00RAW{self.token}:{len(self.fragments) - 1}\x00"
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return self.raw(str(obj)) if obj.is_finite() else None
+        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+            return obj.isoformat()
+        if isinstance(obj, uuid.UUID):
+            return str(obj)
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        if isinstance(obj, (bytes, bytearray)):
+            return base64.b64encode(obj).decode("ascii")
+
+        module = _type_module(obj)
+        if module == "pandas":
+            name = type(obj).__name__
+            if name == "DataFrame":
+                return self.raw(_frame_to_json(obj, self.orient))
+            if name == "Series":
+                return self.raw(obj.to_json(orient="values", date_format="iso"))
+            if name == "Timestamp":
+                return obj.isoformat()
+        if module == "numpy":
+            # ndarrays orjson can't take natively (non-contiguous, object dtype...)
+            # and numpy scalars for the stdlib encoder
+            if hasattr(obj, "tolist"):
+                return obj.tolist()
+
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def splice(self, text: str) -> str:
+        fragments = self.fragments
+
+        def substitute(match):
+            token, index = match.group(1), int(match.group(2))
+            if token != self.token or index >= len(fragments):
+                return match.group(0)
+            return fragments[index]
+        return _RAW_PATTERN.sub(substitute, text)
+
+
+def dumps(obj, orient: str = None, use_orjson: bool = None) -> str:
+    """
+    Serialize an object to a JSON string.
+
+    Args:
+        obj: Object to serialize
+        orient (str, optional): DataFrame layout, 'records' or 'columnar'.
+                                Defaults to JSON_FRAME_ORIENT
+        use_orjson (bool, optional): Force an encoder, defaults to JSON_ENCODER
+
+    Returns:
+        str: JSON document
+    """
+    if use_orjson is None:
+        use_orjson = _use_orjson
+    orient = orient or FRAME_ORIENT
+    if use_orjson:
+        encoder = _Encoder(orient, use_fragment=_orjson_fragments())
+        try:
+            text = orjson.dumps(
+                obj,
+                default=encoder.default,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+            return encoder.splice(text) if encoder.fragments else text
+        except TypeError as ex:
+            # orjson only takes 64-bit integers; the stdlib encoder has no limit
+            if "Integer exceeds 64-bit range" not in str(ex):
+                raise
+    encoder = _Encoder(orient)
+    text = json.dumps(obj, default=encoder.default, separators=(",", ":"))
+    return encoder.splice(text) if encoder.fragments else text
+
+
+def loads(text):
+    """Parse a JSON document (str or bytes)"""
+    if _use_orjson:
+        return orjson.loads(text)
+    return json.loads(text)
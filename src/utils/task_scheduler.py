@@ -0,0 +1,313 @@
+"""
+Dependency-aware task scheduler for multi-step jobs.
+
+Tasks declare the tasks they depend on; every task whose dependencies have
+succeeded is started right away on a shared thread pool, so independent
+branches of the graph run in parallel:
+
+    scheduler = TaskScheduler()
+    scheduler.add("load_config", load_config)
+    scheduler.add("refresh_aggregates", refresh_aggregates, depends_on=["load_config"])
+    scheduler.add("expire_records", expire_records, depends_on=["load_config"])
+    report = scheduler.run()
+
+A task is called with a dict of its dependencies' results and may be a plain
+or an `async def` function. When a task fails, only the tasks that depend on
+it (directly or transitively) are skipped; the rest of the graph still runs.
+Tasks not started by the invocation's deadline are skipped too.
+
+Workers are threads: Lambda has no /dev/shm, so multiprocessing pools can't
+start there. CPU-heavy tasks should use libraries that release the GIL
+(numpy, pandas, zlib, hashlib).
+
+Configuration (environment variables):
+    SCHEDULER_MAX_WORKERS   Pool size (default: sized from the function's vCPU share)
+"""
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.utils.async_runtime import call_handler
+from src.utils.deadline import get_current_deadline
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger('WFGClients')
+
+# Lambda allocates CPU in proportion to memory: one full vCPU at 1769 MB
+MB_PER_VCPU = 1769
+# Scheduled tasks mostly wait on I/O, so each vCPU is given a few threads
+THREADS_PER_VCPU = 4
+
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+STATUS_TIMED_OUT = "timed_out"
+
+
+def get_vcpu_share() -> float:
+    """vCPUs available to this function, from its memory size (or the host outside Lambda)"""
+    memory_mb = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    if not memory_mb:
+        return float(os.cpu_count() or 1)
+    return min(int(memory_mb) / MB_PER_VCPU, float(os.cpu_count() or 1))
+
+
+def default_max_workers() -> int:
+    configured = os.environ.get('SCHEDULER_MAX_WORKERS')
+    if configured:
+        return int(configured)
+    return max(2, math.ceil(get_vcpu_share() * THREADS_PER_VCPU))
+
+
+# Created on first use and reused across warm invocations, one per pool size
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int):
+    executor = _executors.get(max_workers)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(max_workers)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+                _executors[max_workers] = executor
+    return executor
+
+
+class Task:
+    """
+    A unit of work in the graph.
+
+    Args:
+        name (str): Unique task name
+        func (callable): func(inputs) -> result, inputs being {dependency name: result}
+        depends_on (iterable, optional): Names of the tasks that have to succeed first
+    """
+    __slots__ = ("name", "func", "depends_on")
+
+    def __init__(self, name: str, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+class TaskResult:
+    """Outcome of one task"""
+    __slots__ = ("name", "status", "result", "error", "duration_ms")
+
+    def __init__(self, name, status, result=None, error=None, duration_ms=None):
+        self.name = name
+        self.status = status
+        self.result = result
+        self.error = error
+        self.duration_ms = duration_ms
+
+    def to_dict(self):
+        details = {"status": self.status}
+        if self.duration_ms is not None:
+            details["duration_ms"] = self.duration_ms
+        if self.error is not None:
+            details["error"] = self.error
+        return details
+
+
+class ScheduleReport:
+    """Results of a scheduler run"""
+
+    def __init__(self, results: dict, elapsed_ms: float):
+        self.results = results
+        self.elapsed_ms = elapsed_ms
+
+    def names(self, status):
+        return [name for name, result in self.results.items() if result.status == status]
+
+    @property
+    def ok(self) -> bool:
+        return all(result.status == STATUS_SUCCEEDED for result in self.results.values())
+
+    def output(self, name):
+        """Result returned by a task, or None if it didn't succeed"""
+        result = self.results.get(name)
+        return result.result if result is not None else None
+
+    def to_dict(self):
+        return {
+            "succeeded": self.names(STATUS_SUCCEEDED),
+            "failed": self.names(STATUS_FAILED) + self.names(STATUS_TIMED_OUT),
+            "skipped": self.names(STATUS_SKIPPED),
+            "elapsed_ms": self.elapsed_ms,
+            "tasks": {name: result.to_dict() for name, result in self.results.items()},
+        }
+
+
+class ScheduleFailed(RuntimeError):
+    """
+    Raised by jobs whose schedule had failed or timed out tasks, so the
+    invocation fails and is retried. ``report`` is the ScheduleReport.
+    """
+
+    def __init__(self, report: ScheduleReport):
+        self.report = report
+        details = report.to_dict()
+        super().__init__(
+            f"Tasks failed: {details['failed']}, skipped: {details['skipped']}"
+        )
+
+
+class TaskScheduler:
+    """
+    Runs a graph of tasks, each as soon as its dependencies have succeeded.
+
+    Args:
+        max_workers (int, optional): Tasks run at the same time,
+                                     defaults to SCHEDULER_MAX_WORKERS / the vCPU share
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or default_max_workers()
+        self.tasks = {}
+
+    def add(self, name: str, func, depends_on=()):
+        """Add a task. Dependencies may be added later, as long as they exist by run()."""
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        self.tasks[name] = Task(name, func, depends_on)
+        return self
+
+    def task(self, name: str = None, depends_on=()):
+        """Decorator form of add()"""
+        def register(func):
+            self.add(name or func.__name__, func, depends_on)
+            return func
+        return register
+
+    def _dependents(self):
+        dependents = {name: [] for name in self.tasks}
+        for task in self.tasks.values():
+            for dependency in task.depends_on:
+                dependents[dependency].append(task.name)
+        return dependents
+
+    def validate(self):
+        """
+        Raises:
+            ValueError: A dependency is unknown or the graph has a cycle
+        """
+        for task in self.tasks.values():
+            for dependency in task.depends_on:
+                if dependency not in self.tasks:
+                    raise ValueError(f"Task {task.name} depends on unknown task {dependency}")
+
+        # Kahn's algorithm: anything left unvisited is on a cycle
+        remaining = {name: len(task.depends_on) for name, task in self.tasks.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        dependents = self._dependents()
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for dependent in dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if visited != len(self.tasks):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Task graph has a cycle through: {', '.join(cyclic)}")
+
+    def _run_task(self, task: Task, inputs: dict) -> TaskResult:
+        started_at = time.perf_counter()
+        try:
+            result = call_handler(task.func, inputs)
+            status, error = STATUS_SUCCEEDED, None
+        except Exception as ex:
+            result, status, error = None, STATUS_FAILED, f"{type(ex).__name__}: {ex}"
+        duration_ms = round((time.perf_counter() - started_at) * 1000, 3)
+
+        get_metrics().put(f"Task.{task.name}Duration", duration_ms)
+        if error:
+            logger.error(f"Task {task.name} failed after {duration_ms} ms: {error}")
+        else:
+            logger.info(f"Task {task.name} succeeded in {duration_ms} ms")
+        return TaskResult(task.name, status, result, error, duration_ms)
+
+    def run(self) -> ScheduleReport:
+        """
+        Run every task in dependency order, independent tasks in parallel.
+
+        Returns:
+            ScheduleReport: Status, timing and result of every task
+        """
+        self.validate()
+        started_at = time.perf_counter()
+        deadline = get_current_deadline()
+        executor = _get_executor(self.max_workers)
+        dependents = self._dependents()
+
+        results = {}
+        waiting_on = {name: set(task.depends_on) for name, task in self.tasks.items()}
+        running = {}
+
+        def skip(name, reason):
+            # Skip a task and, transitively, everything that depends on it
+            if name in results:
+                return
+            results[name] = TaskResult(name, STATUS_SKIPPED, error=reason)
+            logger.warning(f"Task {name} skipped: {reason}")
+            for dependent in dependents[name]:
+                skip(dependent, f"dependency {name} did not succeed")
+
+        def start_ready():
+            for name, pending in waiting_on.items():
+                if pending or name in results or name in running.values():
+                    continue
+                if deadline.cancelled:
+                    skip(name, "invocation deadline reached")
+                    continue
+                task = self.tasks[name]
+                inputs = {dependency: results[dependency].result for dependency in task.depends_on}
+                future = executor.submit(contextvars.copy_context().run, self._run_task, task, inputs)
+                running[future] = name
+
+        start_ready()
+        while running:
+            done, _ = wait(running, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: stop waiting for what's still running; tasks
+                # checking the deadline will see it cancelled and stop
+                deadline.cancel()
+                for name in running.values():
+                    results[name] = TaskResult(name, STATUS_TIMED_OUT, error="invocation deadline reached")
+                    for dependent in dependents[name]:
+                        skip(dependent, f"dependency {name} did not finish")
+                break
+
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results[name] = result
+                if result.status == STATUS_SUCCEEDED:
+                    for dependent in dependents[name]:
+                        waiting_on[dependent].discard(name)
+                else:
+                    for dependent in dependents[name]:
+                        skip(dependent, f"dependency {name} failed")
+            start_ready()
+
+        # Keep the declaration order in the report
+        report = ScheduleReport(
+            {name: results[name] for name in self.tasks if name in results},
+            round((time.perf_counter() - started_at) * 1000, 3),
+        )
+        failed = len(report.names(STATUS_FAILED)) + len(report.names(STATUS_TIMED_OUT))
+        if failed:
+            get_metrics().increment("TaskFailed", failed)
+        logger.info(
+            f"Tasks completed in {report.elapsed_ms} ms: {len(report.names(STATUS_SUCCEEDED))} succeeded, "
+            f"{failed} failed, {len(report.names(STATUS_SKIPPED))} skipped"
+        )
+        return report
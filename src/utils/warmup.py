@@ -0,0 +1,169 @@
+"""
+Warm-up pings and priming hooks.
+
+Keep-warm schedulers invoke the functions directly with a small marker
+payload. Both entry points check for it first and answer through
+handle_warmup(), so a ping never reaches the API router or an event handler:
+
+    {"warmup": true}                            # e.g. an EventBridge rule's Input
+    {"source": "serverless-plugin-warmup"}      # serverless-plugin-warmup and compatible warmers
+
+A ping may carry "delayMs" (capped at WARMUP_MAX_DELAY_MS) to hold the
+container for a moment, so that concurrent pings land on distinct containers.
+
+Priming hooks are the work that makes a container fast for its first real
+request: opening connection pools, loading configuration, importing route
+handlers, touching caches. The managers register them at import:
+
+    register_priming_hook("referenceData", RC.prime_reference_data)
+    register_priming_hook("httpPools", prime_pools, phases=(PHASE_WARMUP,))
+    run_priming_hooks(PHASE_INIT)
+
+Hooks run in registration order, during init and/or on each warm-up ping.
+A failing hook is logged and reported, never raised, and every hook's
+duration is logged and returned in the warm-up response.
+
+Configuration (environment variables):
+    WARMUP_MAX_DELAY_MS   Longest delay a ping may request (default 1000)
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+import src.utils.serializer as serializer
+from src.utils.logger import update_master_logger
+from src.utils.metrics import UNIT_COUNT, start_invocation_metrics
+
+logger = logging.getLogger('WFGClients')
+
+MAX_DELAY_MS = int(os.environ.get('WARMUP_MAX_DELAY_MS', '1000'))
+
+PHASE_INIT = "init"
+PHASE_WARMUP = "warmup"
+
+WARMUP_SOURCES = ("serverless-plugin-warmup",)
+
+# Hook name -> (function, phases), in registration order
+_hooks = OrderedDict()
+_hooks_lock = threading.Lock()
+
+# Phase -> report of the last run
+_reports = {}
+
+
+def is_warmup_event(event) -> bool:
+    """True for keep-warm pings, which carry no real work"""
+    if not isinstance(event, dict):
+        return False
+    return event.get("warmup") is True or event.get("source") in WARMUP_SOURCES
+
+
+def register_priming_hook(name: str, func, phases=(PHASE_INIT, PHASE_WARMUP)):
+    """
+    Register (or replace) a priming hook.
+
+    Args:
+        name (str): Hook name, used in logs and reports
+        func (callable): Called without arguments
+        phases (tuple): PHASE_INIT and/or PHASE_WARMUP
+    """
+    unknown = [phase for phase in phases if phase not in (PHASE_INIT, PHASE_WARMUP)]
+    if unknown:
+        raise ValueError(f"Unknown priming phases for {name}: {unknown}")
+    with _hooks_lock:
+        _hooks[name] = (func, tuple(phases))
+
+
+def run_priming_hooks(phase: str) -> dict:
+    """
+    Run the hooks registered for a phase.
+
+    Args:
+        phase (str): PHASE_INIT or PHASE_WARMUP
+
+    Returns:
+        dict: {"phase", "durationMs", "hooks": {name: {"durationMs", "ok", "error"?}}}
+    """
+    with _hooks_lock:
+        hooks = [(name, func) for name, (func, phases) in _hooks.items() if phase in phases]
+
+    started_at = time.perf_counter()
+    results = {}
+    for name, func in hooks:
+        hook_started_at = time.perf_counter()
+        result = {"ok": True}
+        try:
+            func()
+        except Exception as ex:
+            logger.warning(f"Priming hook {name} failed: {ex}")
+            result = {"ok": False, "error": str(ex)}
+        result["durationMs"] = round((time.perf_counter() - hook_started_at) * 1000, 2)
+        results[name] = result
+        logger.info(f"Priming hook {name} ({phase}): {result['durationMs']} ms")
+
+    report = {
+        "phase": phase,
+        "durationMs": round((time.perf_counter() - started_at) * 1000, 2),
+        "hooks": results,
+    }
+    _reports[phase] = report
+    return report
+
+
+def get_priming_report(phase: str = PHASE_INIT):
+    """Report of the last run of a phase's hooks, or None if they haven't run"""
+    return _reports.get(phase)
+
+
+def handle_warmup(event: dict, context, service: str, init_duration_ms: float = None) -> dict:
+    """
+    Answer a warm-up ping: run the warm-up hooks and report what they took.
+
+    Args:
+        event (dict): The ping
+        context (object): Lambda context
+        service (str): 'API' or 'EVENT'
+        init_duration_ms (float, optional): The container's INIT duration
+
+    Returns:
+        dict: Response with statusCode 200 and a JSON body of the timings
+    """
+    # Hook failures are logged with the ping's request id
+    update_master_logger(f"{service}:__warmup", context.aws_request_id)
+
+    metrics = start_invocation_metrics(service, {"Route": "__warmup"})
+    metrics.set_property("RequestId", context.aws_request_id)
+    cold_start = metrics.cold_start
+    if cold_start and init_duration_ms is not None:
+        metrics.put("InitDuration", init_duration_ms)
+
+    report = run_priming_hooks(PHASE_WARMUP)
+    try:
+        delay_ms = int(event.get("delayMs") or 0)
+    except (TypeError, ValueError):
+        # A malformed delay must not fail the ping
+        logger.warning(f"Ignoring invalid warm-up delayMs: {event.get('delayMs')!r}")
+        delay_ms = 0
+    delay_ms = min(max(delay_ms, 0), MAX_DELAY_MS)
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
+
+    failed = [name for name, result in report["hooks"].items() if not result["ok"]]
+    metrics.increment("WarmUp")
+    metrics.put("PrimingDuration", report["durationMs"])
+    metrics.put("PrimingFailures", len(failed), UNIT_COUNT)
+    metrics.flush()
+    logger.info(f"Warm-up ping handled in {report['durationMs']} ms (cold start: {cold_start})")
+
+    body = {
+        "warmup": True,
+        "coldStart": cold_start,
+        "priming": report,
+    }
+    if cold_start:
+        body["init"] = {"durationMs": init_duration_ms, "priming": get_priming_report(PHASE_INIT)}
+    return {
+        "statusCode": 200,
+        "body": serializer.dumps(body),
+    }
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from src.utils.idempotency import (
+    IdempotencyInProgress, IdempotencyStore, MemoryBackend, make_idempotency_key
+)
+
+
+def _store():
+    return IdempotencyStore(MemoryBackend(), ttl_secs=60)
+
+
+def test_duplicate_while_in_progress_is_rejected():
+    store = _store()
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_job():
+        started.set()
+        finish.wait(5)
+        return {"done": True}
+
+    first = threading.Thread(target=store.run, args=("job:1", slow_job))
+    first.start()
+    started.wait(5)
+    try:
+        with pytest.raises(IdempotencyInProgress):
+            store.run("job:1", lambda: {"done": "twice"})
+    finally:
+        finish.set()
+        first.join()
+
+
+def test_completed_result_is_replayed():
+    store = _store()
+    calls = []
+
+    def job():
+        calls.append(1)
+        return {"rows": len(calls)}
+
+    first = store.run("job:1", job)
+    second = store.run("job:1", job)
+    assert not first.replayed
+    assert second.replayed
+    assert second.result == {"rows": 1}
+    assert len(calls) == 1
+
+
+def test_failed_run_releases_the_key():
+    store = _store()
+
+    def failing_job():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        store.run("job:1", failing_job)
+    outcome = store.run("job:1", lambda: {"retried": True})
+    assert not outcome.replayed
+    assert outcome.result == {"retried": True}
+
+
+def test_window_rolls_over_between_runs():
+    event = {"name": "DailyProcessing"}
+    first = make_idempotency_key("DailyProcessing", event, 3600, now=7200)
+    assert make_idempotency_key("DailyProcessing", event, 3600, now=7200 + 3599) == first
+    assert make_idempotency_key("DailyProcessing", event, 3600, now=7200 + 3600) != first
+
+
+def test_window_follows_the_scheduled_time():
+    event = {"name": "DailyProcessing", "time": "2026-10-18T05:00:00Z"}
+    on_time = make_idempotency_key("DailyProcessing", event, 3600, now=1792299600)
+    # A retry processed hours later is still the 05:00 run
+    late_retry = make_idempotency_key("DailyProcessing", event, 3600, now=1792299600 + 3 * 3600)
+    assert late_retry == on_time
+    next_run = make_idempotency_key(
+        "DailyProcessing", {**event, "time": "2026-10-18T06:00:00Z"}, 3600, now=1792299600
+    )
+    assert next_run != on_time
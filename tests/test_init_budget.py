@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from src.utils.init_profiler import ENTRY_POINTS, InitBudgetExceeded, check_init_budget, profile_init
+
+# Generous enough for a shared CI runner; a cold start that pays for boto3 or
+# pandas at import blows well past it
+BUDGET_MS = float(os.environ.get("INIT_BUDGET_MS", "1000"))
+
+# Entry points emit EMF lines at import when metrics are on
+CHILD_ENV = {"METRICS_ENABLED": "false"}
+
+HEAVY_MODULES = ("boto3", "botocore", "pandas", "numpy", "pyarrow")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _local_environment():
+    # Entry points resolve their config at import: keep them on the local
+    # secrets file, never AWS
+    saved = os.environ.pop("AWS_EXECUTION_ENV", None)
+    yield
+    if saved is not None:
+        os.environ["AWS_EXECUTION_ENV"] = saved
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_init_is_within_budget(module):
+    report = check_init_budget(module, BUDGET_MS, env=CHILD_ENV)
+    assert report["init_ms"] > 0
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_heavy_dependencies_are_not_imported_at_init(module):
+    report = profile_init(module, env=CHILD_ENV)
+    imported = [name for name in report["modules"] if name.split(".")[0] in HEAVY_MODULES]
+    assert imported == []
+
+
+def test_budget_check_fails_when_exceeded():
+    with pytest.raises(InitBudgetExceeded, match="budget"):
+        check_init_budget("src.api.app", budget_ms=0.001, env=CHILD_ENV)
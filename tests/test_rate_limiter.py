@@ -0,0 +1,100 @@
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from redis_stub import start_stub  # noqa: E402
+from src.utils.rate_limiter import (  # noqa: E402
+    RateLimiter, RateLimitExceeded, RateLimitPolicy, RedisBuckets, gcra
+)
+
+POLICY = {"requestsPerSec": 1, "burst": 3}
+ROUTE = "GET rate-test"
+NOW = 1_700_000_000.0
+
+
+class _Request:
+    def __init__(self, api_key=None, client_ip="203.0.113.7"):
+        self.headers = {"x-api-key": api_key} if api_key else {}
+        self.client_ip = client_ip
+
+    def get_header(self, name):
+        return self.headers.get(name.lower())
+
+
+@pytest.fixture
+def redis_url():
+    server, _, url = start_stub()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def _allowed(limiter, request, now=NOW):
+    try:
+        limiter.check(ROUTE, POLICY, request, now=now)
+    except RateLimitExceeded:
+        return False
+    return True
+
+
+def test_gcra_allows_the_burst_then_reports_retry_after():
+    policy = RateLimitPolicy(POLICY)
+    tat = None
+    for _ in range(3):
+        allowed, tat, _ = gcra(tat, NOW, policy.interval, policy.tolerance)
+        assert allowed
+    allowed, stored, retry_after = gcra(tat, NOW, policy.interval, policy.tolerance)
+    assert not allowed and stored == tat
+    assert retry_after == pytest.approx(1.0)
+    # One interval later one token has been earned back
+    assert gcra(tat, NOW + 1.0, policy.interval, policy.tolerance)[0]
+
+
+def test_local_limiter_rejects_past_the_burst():
+    limiter = RateLimiter()
+    request = _Request()
+    assert [_allowed(limiter, request) for _ in range(4)] == [True, True, True, False]
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        limiter.check(ROUTE, POLICY, request, now=NOW)
+    assert excinfo.value.retry_after_secs == 1
+    # Other callers have their own bucket
+    assert _allowed(limiter, _Request(client_ip="198.51.100.1"))
+
+
+def test_shared_bucket_limits_across_containers(redis_url):
+    first, second = RateLimiter(RedisBuckets(redis_url)), RateLimiter(RedisBuckets(redis_url))
+    request = _Request(api_key="key-1")
+
+    assert [_allowed(first, request) for _ in range(2)] == [True, True]
+    # The second container's own bucket is full, the shared one has one token left
+    assert [_allowed(second, request) for _ in range(2)] == [True, False]
+
+
+def test_local_token_is_refunded_when_the_shared_bucket_rejects(redis_url):
+    first, second = RateLimiter(RedisBuckets(redis_url)), RateLimiter(RedisBuckets(redis_url))
+    request = _Request(api_key="key-1")
+    for _ in range(3):
+        assert _allowed(first, request)
+
+    assert not _allowed(second, request)
+    (key, tat), = second.local._tats.items()
+    # The rejected request didn't spend the second container's token
+    assert tat == NOW
+
+
+def test_falls_back_to_local_buckets_when_redis_is_down():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    limiter = RateLimiter(RedisBuckets(f"redis://127.0.0.1:{port}/0"))
+    request = _Request()
+
+    assert _allowed(limiter, request)
+    assert limiter._shared_down_until > NOW
+    # Still limited by the container's bucket while Redis is skipped
+    assert [_allowed(limiter, request) for _ in range(3)] == [True, True, False]
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import uuid
+
+# The API manager resolves its config at import: serve it from a local file
+_secrets = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+json.dump({"wfg-clients-secrets": {"SUPABASE_URL": "http://localhost:54321", "LOG_LEVEL": "INFO"}}, _secrets)
+_secrets.close()
+os.environ.setdefault("LOCAL_SECRETS_PATH", _secrets.name)
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+import src.api.api_manager as api_manager  # noqa: E402
+import src.api.controllers.api_controller as CONTRL  # noqa: E402
+from src.utils.response_cache import build_cache_key, encoded_etag, matching_etag  # noqa: E402
+
+
+class _Context:
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+
+def _get_item(path_params):
+    return {"item": path_params["item_id"]}
+
+
+def _get_report():
+    return {"rows": [{"id": index, "name": f"row {index}"} for index in range(200)]}
+
+
+CONTRL.REGISTRY.register({
+    "name": "cache-test/report",
+    "method": "GET",
+    "handler": _get_report,
+    "cache": {"ttlInSecs": 60},
+})
+
+CONTRL.REGISTRY.register({
+    "name": "cache-test/items/{item_id}",
+    "method": "GET",
+    "handler": _get_item,
+    "params": ["path_params"],
+    "cache": {"ttlInSecs": 60},
+})
+
+
+def _get_report_response(headers):
+    event = {
+        "resource": "/cache-test/report",
+        "path": "/cache-test/report",
+        "httpMethod": "GET",
+        "headers": headers,
+    }
+    return api_manager.lambda_handler(event, _Context())
+
+
+def _get(item_id):
+    event = {
+        "resource": "/cache-test/items/{item_id}",
+        "path": f"/cache-test/items/{item_id}",
+        "httpMethod": "GET",
+        "headers": {},
+        "pathParameters": {"item_id": item_id},
+    }
+    response = api_manager.lambda_handler(event, _Context())
+    return json.loads(response["body"])["response"]
+
+
+def test_cache_key_includes_path_params():
+    first = build_cache_key("GET", {}, {}, path_params={"item_id": "1"})
+    second = build_cache_key("GET", {}, {}, path_params={"item_id": "2"})
+    assert first != second
+    assert first == build_cache_key("HEAD", {}, {}, path_params={"item_id": "1"})
+
+
+def test_templated_route_caches_each_path_separately():
+    assert _get("1") == {"item": "1"}
+    assert _get("2") == {"item": "2"}
+    # Both are now served from the cache, each from its own entry
+    assert _get("1") == {"item": "1"}
+    assert _get("2") == {"item": "2"}
+
+
+def test_encoded_etag_differs_from_identity_etag():
+    assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert encoded_etag('W/"abc"', "gzip") == 'W/"abc"'
+    assert matching_etag('"abc-gzip"', '"abc"') == '"abc-gzip"'
+    assert matching_etag('W/"abc-br", "other"', '"abc"') == 'W/"abc-br"'
+    assert matching_etag('"abd-gzip"', '"abc"') is None
+
+
+def test_compressed_variant_gets_its_own_etag():
+    identity = _get_report_response({})
+    gzipped = _get_report_response({"Accept-Encoding": "gzip"})
+    assert gzipped["headers"]["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity["headers"]
+    assert gzipped["headers"]["ETag"] == encoded_etag(identity["headers"]["ETag"], "gzip")
+
+    # Either tag revalidates, and the 304 carries the tag the client holds
+    not_modified = _get_report_response(
+        {"Accept-Encoding": "gzip", "If-None-Match": gzipped["headers"]["ETag"]}
+    )
+    assert not_modified["statusCode"] == 304
+    assert not_modified["headers"]["ETag"] == gzipped["headers"]["ETag"]
+    assert _get_report_response({"If-None-Match": identity["headers"]["ETag"]})["statusCode"] == 304
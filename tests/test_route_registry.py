@@ -0,0 +1,34 @@
+from src.api.controllers.route_registry import RouteRegistry
+
+
+def _handler():
+    return {}
+
+
+REGISTRY = RouteRegistry([
+    {"name": "hello", "handler": _handler},
+    {"name": "items/{item_id}", "method": "GET", "handler": _handler},
+    {"name": "items/{item_id}", "method": "DELETE", "handler": _handler},
+])
+
+
+def test_route_without_method_matches_every_method():
+    for method in ("GET", "POST", "PUT"):
+        route, _ = REGISTRY.resolve("hello", method)
+        assert route is not None and route["method"] == "ANY"
+    assert REGISTRY.allowed_methods("hello") == ["ANY"]
+
+
+def test_route_with_method_only_matches_it():
+    route, path_params = REGISTRY.resolve("items/{item_id}", "DELETE", "/items/7")
+    assert route["method"] == "DELETE"
+    route, path_params = REGISTRY.resolve("{proxy+}", "GET", "/items/7")
+    assert route["method"] == "GET" and path_params == {"item_id": "7"}
+
+    assert REGISTRY.resolve("items/{item_id}", "POST", "/items/7") == (None, {})
+    assert REGISTRY.allowed_methods("{proxy+}", "/items/7") == ["DELETE", "GET"]
+
+
+def test_unknown_path_allows_nothing():
+    assert REGISTRY.resolve("missing", "GET") == (None, {})
+    assert REGISTRY.allowed_methods("missing") == []
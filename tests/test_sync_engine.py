@@ -0,0 +1,131 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from supabase_stub import SOURCE_TABLE, start_stub  # noqa: E402
+from src.functions.data_sync.sync_engine import (  # noqa: E402
+    SYNC_MODE_FULL, SYNC_MODE_HASH, SYNC_MODE_WATERMARK, SupabaseTable, SyncStats, run_incremental_sync
+)
+from src.functions.data_sync.sync_state import MemoryStateStore, RowHashIndex  # noqa: E402
+
+ROWS = 250
+
+
+@pytest.fixture
+def stub():
+    server, state, base_url = start_stub(rows=ROWS)
+    yield state, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def _sync(base_url, store, mode, target="target_rows", **kwargs):
+    stats, state = run_incremental_sync(
+        SupabaseTable(base_url, SOURCE_TABLE),
+        kwargs.pop("target_table", None) or SupabaseTable(base_url, target),
+        store,
+        f"{SOURCE_TABLE}->{target}",
+        mode=mode,
+        page_size=100,
+        chunk_size=40,
+        **kwargs,
+    )
+    return stats, state
+
+
+def test_keyset_pagination_reads_every_row_once(stub):
+    state, base_url = stub
+    stats = SyncStats()
+    pages = list(SupabaseTable(base_url, SOURCE_TABLE).fetch_pages("id", page_size=100, stats=stats))
+
+    assert [len(page) for page in pages] == [100, 100, 50]
+    ids = [row["id"] for page in pages for row in page]
+    assert ids == list(range(1, ROWS + 1))
+    assert stats.rows_read == ROWS and stats.pages == 3
+    assert state.requests["GET"] == 3
+
+
+def test_keyset_pagination_starts_after_a_key(stub):
+    _, base_url = stub
+    pages = SupabaseTable(base_url, SOURCE_TABLE).fetch_pages("id", page_size=100, after=200)
+    assert [row["id"] for page in pages for row in page] == list(range(201, ROWS + 1))
+
+
+def test_full_sync_upserts_every_row_in_chunks(stub):
+    state, base_url = stub
+    stats, _ = _sync(base_url, MemoryStateStore(), SYNC_MODE_FULL)
+
+    assert stats.rows_written == ROWS
+    # 100 row pages in 40 row chunks: 40 + 40 + 20 per full page, then 40 + 10
+    assert stats.chunks == 8
+    assert sorted(state.tables["target_rows"]) == list(range(1, ROWS + 1))
+
+
+def test_watermark_sync_only_writes_changed_rows(stub):
+    state, base_url = stub
+    store = MemoryStateStore()
+
+    first, _ = _sync(base_url, store, SYNC_MODE_WATERMARK, watermark_column="updated_at")
+    unchanged, _ = _sync(base_url, store, SYNC_MODE_WATERMARK, watermark_column="updated_at")
+    state.touch([5, 17, 230], updated_at="2030-01-01T00:00:00")
+    changed, sync_state = _sync(base_url, store, SYNC_MODE_WATERMARK, watermark_column="updated_at")
+
+    assert first.rows_written == ROWS
+    assert unchanged.rows_read == 0 and unchanged.rows_written == 0
+    assert changed.rows_written == 3
+    assert sync_state["watermark"] == ["2030-01-01T00:00:00", 230]
+    assert state.tables["target_rows"][17]["updated_at"] == "2030-01-01T00:00:00"
+
+
+def test_hash_sync_only_writes_changed_rows(stub, tmp_path):
+    state, base_url = stub
+    store = MemoryStateStore()
+
+    def run():
+        index = RowHashIndex(f"{SOURCE_TABLE}->target_rows", directory=str(tmp_path))
+        try:
+            return _sync(base_url, store, SYNC_MODE_HASH, hash_index=index)[0]
+        finally:
+            index.close()
+
+    first = run()
+    unchanged = run()
+    state.touch([3, 99])
+    changed = run()
+
+    assert first.rows_written == ROWS
+    assert unchanged.rows_read == ROWS and unchanged.rows_written == 0
+    assert unchanged.rows_unchanged == ROWS
+    assert changed.rows_written == 2
+
+
+class _FailingTable(SupabaseTable):
+    """Target whose upserts start failing after a number of chunks"""
+
+    def __init__(self, base_url, table, fail_after_chunks):
+        super().__init__(base_url, table)
+        self.remaining = fail_after_chunks
+
+    def upsert(self, rows, on_conflict=None, stats=None):
+        if self.remaining == 0:
+            raise ConnectionError("target went away")
+        self.remaining -= 1
+        super().upsert(rows, on_conflict, stats)
+
+
+def test_failed_run_resumes_from_its_cursor(stub):
+    state, base_url = stub
+    store = MemoryStateStore()
+
+    with pytest.raises(ConnectionError):
+        _sync(base_url, store, SYNC_MODE_FULL, target_table=_FailingTable(base_url, "target_rows", 3))
+    assert store.get(f"{SOURCE_TABLE}->target_rows")["cursor"] == 100
+
+    stats, sync_state = _sync(base_url, store, SYNC_MODE_FULL)
+    assert sync_state["lastRun"]["resumed"] is True
+    assert stats.rows_read == ROWS - 100
+    assert sorted(state.tables["target_rows"]) == list(range(1, ROWS + 1))
+    assert "cursor" not in sync_state
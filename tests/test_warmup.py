@@ -0,0 +1,38 @@
+import json
+import uuid
+
+import pytest
+
+import src.utils.metrics as metrics
+import src.utils.warmup as WU
+
+
+class _Context:
+    def __init__(self):
+        self.aws_request_id = str(uuid.uuid4())
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+
+
+@pytest.mark.parametrize("delay", ["soon", "12.5", [], {"ms": 5}])
+def test_invalid_delay_is_treated_as_zero(monkeypatch, delay):
+    slept = []
+    monkeypatch.setattr(WU.time, "sleep", slept.append)
+
+    response = WU.handle_warmup({"warmup": True, "delayMs": delay}, _Context(), "API")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["warmup"] is True
+    assert slept == []
+
+
+def test_delay_is_capped(monkeypatch):
+    slept = []
+    monkeypatch.setattr(WU.time, "sleep", slept.append)
+
+    WU.handle_warmup({"warmup": True, "delayMs": "999999"}, _Context(), "API")
+
+    assert slept == [WU.MAX_DELAY_MS / 1000]